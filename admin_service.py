@@ -1,6 +1,6 @@
+import asyncio
 import logging
 import uuid
-import html
 from datetime import datetime
 from typing import List, Optional
 from telegram import Bot, Update
@@ -8,10 +8,15 @@ from telegram.constants import ParseMode
 from telegram.error import TelegramError
 
 from models import Storage, PendingPost, PostStatus, BotConfig
-from ai_service import evaluate_message_importance
+from ai_service import evaluate_message_importance_async
+from utils import escape_html
 
 logger = logging.getLogger(__name__)
 
+# Не больше 10 одновременных сообщений администраторам; общий лимит 30 сообщений/с держит AIORateLimiter
+ADMIN_NOTIFY_CONCURRENCY = 10
+admin_notify_semaphore = asyncio.Semaphore(ADMIN_NOTIFY_CONCURRENCY)  # Общий для всех рассылок
+
 class AdminService:
     """Сервис для администрирования бота и управления публикациями"""
     
@@ -124,7 +129,7 @@ class AdminService:
             user_prefs = Storage.get_user(post.user_id)
             
             # Оцениваем важность
-            importance_score = evaluate_message_importance(fake_message, user_prefs)
+            importance_score = await evaluate_message_importance_async(fake_message, user_prefs)
             post.importance_score = importance_score
             
             # Если оценка выше порога, публикуем автоматически
@@ -201,7 +206,8 @@ class AdminService:
         # Публикуем в канале
         if await AdminService.publish_to_channel(bot, publish_text):
             # Обновляем статус поста
-            Storage.update_post_status(post_id, PostStatus.APPROVED, admin_id, comment)
+            # Запись на диск выполняем в отдельном потоке, чтобы не блокировать цикл событий
+            await Storage.update_post_status_async(post_id, PostStatus.APPROVED, admin_id, comment)
             
             # Уведомляем пользователя об одобрении
             try:
@@ -212,7 +218,7 @@ class AdminService:
                 )
                 
                 if comment:
-                    notification_text += f"💬 <b>Комментарий:</b> {html.escape(comment)}\n"
+                    notification_text += f"💬 <b>Комментарий:</b> {escape_html(comment)}\n"
                 
                 notification_text += f"\n📅 <b>Опубликовано:</b> {datetime.now().strftime('%d.%m.%Y %H:%M')}"
                 
@@ -251,8 +257,8 @@ class AdminService:
             logger.warning(f"Попытка отклонить пост {post_id} со статусом {post.status}")
             return False
         
-        # Обновляем статус поста
-        Storage.update_post_status(post_id, PostStatus.REJECTED, admin_id, comment)
+        # Обновляем статус поста (запись на диск в отдельном потоке)
+        await Storage.update_post_status_async(post_id, PostStatus.REJECTED, admin_id, comment)
         
         # Уведомляем пользователя об отклонении
         try:
@@ -263,7 +269,7 @@ class AdminService:
             )
             
             if comment:
-                notification_text += f"💬 <b>Причина:</b> {html.escape(comment)}\n"
+                notification_text += f"💬 <b>Причина:</b> {escape_html(comment)}\n"
             
             notification_text += f"\n📅 <b>Рассмотрено:</b> {datetime.now().strftime('%d.%m.%Y %H:%M')}"
             
@@ -288,6 +294,29 @@ class AdminService:
         """
         return Storage.get_pending_posts(PostStatus.PENDING)
     
+    @staticmethod
+    async def send_to_admins(bot: Bot, admin_ids, text: str, **kwargs) -> List[int]:
+        """
+        Отправляет одно и то же HTML-сообщение всем администраторам одновременно
+        
+        Returns:
+            List[int]: ID администраторов, которым сообщение доставлено
+        """
+        admin_ids = list(admin_ids)
+        
+        async def send(admin_id):
+            async with admin_notify_semaphore:
+                return await bot.send_message(chat_id=admin_id, text=text, parse_mode=ParseMode.HTML, **kwargs)
+        
+        results = await asyncio.gather(*(send(admin_id) for admin_id in admin_ids), return_exceptions=True)
+        delivered = []
+        for admin_id, result in zip(admin_ids, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Не удалось уведомить администратора {admin_id}: {result}")
+            else:
+                delivered.append(admin_id)
+        return delivered
+    
     @staticmethod
     async def notify_admins_about_new_post(bot: Bot, post: PendingPost) -> None:
         """
@@ -304,23 +333,24 @@ class AdminService:
             return
         
         # Форматируем уведомление
-        notification_text = (
+        parts = [
             f"📝 <b>Новый пост на модерации</b>\n\n"
             f"📋 <b>ID поста:</b> {post.post_id}\n"
             f"👤 <b>От пользователя:</b> {post.user_id}\n"
             f"📅 <b>Время:</b> {post.submitted_at.strftime('%d.%m.%Y %H:%M')}\n"
-        )
+        ]
         
         if post.source_info:
-            notification_text += f"📋 <b>Источник:</b> {html.escape(post.source_info)}\n"
+            parts.append(f"📋 <b>Источник:</b> {escape_html(post.source_info)}\n")
         
         if post.importance_score:
-            notification_text += f"⭐ <b>Оценка ИИ:</b> {post.importance_score:.2f}\n"
+            parts.append(f"⭐ <b>Оценка ИИ:</b> {post.importance_score:.2f}\n")
         
-        notification_text += f"\n📄 <b>Текст:</b>\n{html.escape(post.message_text[:500])}"
+        parts.append(f"\n📄 <b>Текст:</b>\n{escape_html(post.message_text[:500])}")
         
         if len(post.message_text) > 500:
-            notification_text += "..."
+            parts.append("...")
+        notification_text = "".join(parts)
         
         # Добавляем inline кнопки для модерации
         from telegram import InlineKeyboardButton, InlineKeyboardMarkup
@@ -340,17 +370,8 @@ class AdminService:
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         # Отправляем уведомления всем администраторам
-        for admin_id in config.admin_ids:
-            try:
-                await bot.send_message(
-                    chat_id=admin_id,
-                    text=notification_text,
-                    parse_mode=ParseMode.HTML,
-                    reply_markup=reply_markup
-                )
-                logger.info(f"Уведомление о посте {post.post_id} отправлено администратору {admin_id}")
-            except TelegramError as e:
-                logger.warning(f"Не удалось уведомить администратора {admin_id}: {e}")
+        delivered = await AdminService.send_to_admins(bot, config.admin_ids, notification_text, reply_markup=reply_markup)
+        logger.info(f"Уведомление о посте {post.post_id} отправлено администраторам: {delivered}")
     
     @staticmethod
     async def process_important_message(bot: Bot, message, importance_score: float) -> bool:
@@ -1,10 +1,15 @@
+import asyncio
+import functools
 import json
 import uuid
 import os
 import logging
 import requests
+import threading
+from requests.adapters import HTTPAdapter
 import time
 from datetime import datetime, timedelta
+from typing import Optional
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -26,25 +31,59 @@ GIGACHAT_AVAILABLE = bool(CLIENT_ID and SECRET)
 if not GIGACHAT_AVAILABLE:
     logger.warning("CLIENT_ID или SECRET не установлены. Бот будет работать с упрощенной оценкой важности.")
 
+# Общие слова-маркеры важности для упрощенной оценки
+IMPORTANT_KEYWORDS = ('срочно', 'важно', 'critical', 'urgent', 'deadline', 'дедлайн',
+                      'встреча', 'meeting', 'внимание', 'attention', 'asap', 'немедленно')
+
+@functools.lru_cache(maxsize=1024)
+def lowercase_keywords(keywords: tuple) -> tuple:
+    """Lowercase a keyword list once; repeated lists are served from cache"""
+    return tuple(keyword.lower() for keyword in keywords)
+
+def contains_any(text_lower: str, keywords) -> bool:
+    """Check whether any of the keywords occurs in the lowercased text"""
+    return any(keyword in text_lower for keyword in keywords)
+
+# Общая сессия держит соединения с GigaChat открытыми между запросами,
+# чтобы не устанавливать TCP и TLS заново для каждой оценки
+GIGACHAT_POOL_SIZE = 20
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=GIGACHAT_POOL_SIZE))
+http_session.verify = False
+
+# Оценки идут в потоках: одновременно не больше запросов, чем соединений в пуле сессии
+scoring_semaphore = asyncio.Semaphore(GIGACHAT_POOL_SIZE)
+
+def close_http_session() -> None:
+    """Close pooled connections to GigaChat"""
+    http_session.close()
+
 # Token cache with expiration
 token_cache = {
     "token": None,
     "expires_at": None
 }
+# Токен обновляет только один поток, остальные ждут и берут его из кэша
+token_lock = threading.Lock()
 
 def get_access_token(force_refresh=False) -> str:
     """Get access token with caching and auto-refresh."""
     if not GIGACHAT_AVAILABLE:
         raise RuntimeError("GigaChat недоступен: CLIENT_ID или SECRET не установлены")
     
-    current_time = datetime.now()
-    
-    # Check if we have a valid cached token
-    if not force_refresh and token_cache["token"] and token_cache["expires_at"]:
-        if current_time < token_cache["expires_at"]:
-            return token_cache["token"]
-    
-    # Get new token
+    stale_token = token_cache["token"] if force_refresh else None
+    with token_lock:
+        current_time = datetime.now()
+        
+        # Check if we have a valid cached token (another thread may have just refreshed it)
+        if token_cache["token"] and token_cache["expires_at"] and token_cache["token"] != stale_token:
+            if current_time < token_cache["expires_at"]:
+                return token_cache["token"]
+        
+        return request_access_token(current_time)
+
+def request_access_token(current_time: datetime) -> str:
+    """Request a new access token and cache it; called under token_lock."""
     url = "https://ngw.devices.sberbank.ru:9443/api/v2/oauth"
     headers = {
         'Content-Type': 'application/x-www-form-urlencoded',
@@ -58,12 +97,11 @@ def get_access_token(force_refresh=False) -> str:
     
     for attempt in range(max_retries):
         try:
-            res = requests.post(
+            res = http_session.post(
                 url=url,
                 headers=headers,
                 auth=requests.auth.HTTPBasicAuth(CLIENT_ID, SECRET),
                 data=payload,
-                verify=False,
                 timeout=10
             )
             token = res.json().get("access_token")
@@ -110,14 +148,14 @@ def send_prompt(msg: str, access_token: str, retry_on_auth_error=True):
 
     for attempt in range(max_retries):
         try:
-            response = requests.post(url, headers=headers, data=payload, verify=False, timeout=30)
+            response = http_session.post(url, headers=headers, data=payload, timeout=30)
             
             if response.status_code == 401 and retry_on_auth_error:
                 logger.warning("Получен 401 ошибка, обновляем токен...")
                 access_token = get_access_token(force_refresh=True)
                 headers['Authorization'] = f'Bearer {access_token}'
                 # Retry with new token (only once)
-                response = requests.post(url, headers=headers, data=payload, verify=False, timeout=30)
+                response = http_session.post(url, headers=headers, data=payload, timeout=30)
             
             response.raise_for_status()
             
@@ -147,7 +185,8 @@ def send_prompt(msg: str, access_token: str, retry_on_auth_error=True):
             else:
                 raise RuntimeError(f"Ошибка сети после {max_retries} попыток: {e}")
 
-def apply_importance_criteria(base_score: float, message: Message, user_preferences: UserPreferences) -> float:
+def apply_importance_criteria(base_score: float, message: Message, user_preferences: UserPreferences,
+                              text_lower: Optional[str] = None) -> float:
     """Apply additional importance criteria to modify the base AI score"""
     config = Storage.bot_config
     criteria = config.importance_criteria
@@ -161,31 +200,23 @@ def apply_importance_criteria(base_score: float, message: Message, user_preferen
         modified_score *= 0.8  # Slightly reduce importance for very long messages
     
     # Keywords boost/reduce
-    message_lower = message.text.lower()
+    message_lower = text_lower if text_lower is not None else message.text.lower()
     
     # Check boost keywords
-    for keyword in criteria.keywords_boost:
-        if keyword.lower() in message_lower:
-            modified_score = min(1.0, modified_score + 0.2)
-            break
+    if contains_any(message_lower, lowercase_keywords(tuple(criteria.keywords_boost))):
+        modified_score = min(1.0, modified_score + 0.2)
     
     # Check reduce keywords
-    for keyword in criteria.keywords_reduce:
-        if keyword.lower() in message_lower:
-            modified_score = max(0.0, modified_score - 0.3)
-            break
+    if contains_any(message_lower, lowercase_keywords(tuple(criteria.keywords_reduce))):
+        modified_score = max(0.0, modified_score - 0.3)
     
     # User personal keywords
-    for keyword in user_preferences.keywords:
-        if keyword.lower() in message_lower:
-            modified_score = min(1.0, modified_score + 0.25)
-            break
+    if contains_any(message_lower, lowercase_keywords(tuple(user_preferences.keywords))):
+        modified_score = min(1.0, modified_score + 0.25)
     
     # User exclude keywords
-    for keyword in user_preferences.exclude_keywords:
-        if keyword.lower() in message_lower:
-            modified_score = max(0.0, modified_score - 0.4)
-            break
+    if contains_any(message_lower, lowercase_keywords(tuple(user_preferences.exclude_keywords))):
+        modified_score = max(0.0, modified_score - 0.4)
     
     # Source-based adjustments
     if message.chat_id in criteria.sources_boost:
@@ -203,41 +234,34 @@ def apply_importance_criteria(base_score: float, message: Message, user_preferen
     
     return max(0.0, min(1.0, modified_score))
 
-def simple_evaluate_importance(message: Message, user_preferences: UserPreferences) -> float:
+def simple_evaluate_importance(message: Message, user_preferences: UserPreferences,
+                               text_lower: Optional[str] = None) -> float:
     """
     Simple rule-based importance evaluation when AI is not available.
     
     Args:
         message: The message to evaluate
         user_preferences: User preferences for filtering
+        text_lower: Lowercased message text, if already computed by the caller
     
     Returns:
         float: Importance score from 0.0 to 1.0
     """
-    text_lower = message.text.lower()
+    if text_lower is None:
+        text_lower = message.text.lower()
     score = 0.3  # Base score
     
     # Check for important keywords
-    important_keywords = ['срочно', 'важно', 'critical', 'urgent', 'deadline', 'дедлайн', 
-                         'встреча', 'meeting', 'внимание', 'attention', 'asap', 'немедленно']
-    for keyword in important_keywords:
-        if keyword in text_lower:
-            score = max(score, 0.7)
-            break
+    if contains_any(text_lower, IMPORTANT_KEYWORDS):
+        score = max(score, 0.7)
     
     # Check user's keywords
-    if user_preferences.keywords:
-        for keyword in user_preferences.keywords:
-            if keyword.lower() in text_lower:
-                score = max(score, 0.8)
-                break
+    if contains_any(text_lower, lowercase_keywords(tuple(user_preferences.keywords))):
+        score = max(score, 0.8)
     
     # Check exclude keywords
-    if user_preferences.exclude_keywords:
-        for keyword in user_preferences.exclude_keywords:
-            if keyword.lower() in text_lower:
-                score = min(score, 0.2)
-                break
+    if contains_any(text_lower, lowercase_keywords(tuple(user_preferences.exclude_keywords))):
+        score = min(score, 0.2)
     
     # Check message length (longer messages might be more important)
     if len(message.text) > 200:
@@ -254,13 +278,15 @@ def simple_evaluate_importance(message: Message, user_preferences: UserPreferenc
     # Ensure score is within bounds
     return max(0.0, min(1.0, score))
 
-def evaluate_message_importance(message: Message, user_preferences: UserPreferences) -> float:
+def evaluate_message_importance(message: Message, user_preferences: UserPreferences,
+                                text_lower: Optional[str] = None) -> float:
     """
     Evaluate the importance of a message using AI and additional criteria.
     
     Args:
         message: The message to evaluate
         user_preferences: User preferences for filtering
+        text_lower: Lowercased message text, if already computed by the caller
     
     Returns:
         float: Importance score from 0.0 to 1.0
@@ -268,7 +294,7 @@ def evaluate_message_importance(message: Message, user_preferences: UserPreferen
     
     # If GigaChat is not available, use simple evaluation
     if not GIGACHAT_AVAILABLE:
-        return simple_evaluate_importance(message, user_preferences)
+        return simple_evaluate_importance(message, user_preferences, text_lower)
     
     # System prompt for importance evaluation
     system_prompt = f"""
@@ -341,7 +367,7 @@ def evaluate_message_importance(message: Message, user_preferences: UserPreferen
             logger.info(f"Базовая оценка важности сообщения от ИИ: {base_score:.2f} - {reason}")
         
         # Apply additional criteria
-        final_score = apply_importance_criteria(base_score, message, user_preferences)
+        final_score = apply_importance_criteria(base_score, message, user_preferences, text_lower)
         
         if abs(final_score - base_score) > 0.05:
             logger.info(f"Оценка скорректирована критериями: {base_score:.2f} → {final_score:.2f}")
@@ -352,4 +378,17 @@ def evaluate_message_importance(message: Message, user_preferences: UserPreferen
         logger.error(f"Ошибка оценки важности сообщения: {e}")
         # Return a default score in case of error, but still apply criteria
         base_score = 0.5
-        return apply_importance_criteria(base_score, message, user_preferences) 
\ No newline at end of file
+        return apply_importance_criteria(base_score, message, user_preferences, text_lower) 
+
+async def evaluate_message_importance_async(message: Message, user_preferences: UserPreferences,
+                                            text_lower: Optional[str] = None) -> float:
+    """
+    Evaluate message importance from async code without blocking the event loop.
+    
+    The GigaChat request uses blocking HTTP, so it runs in a worker thread;
+    the simple rule-based evaluation is cheap and runs inline.
+    """
+    if not GIGACHAT_AVAILABLE:
+        return simple_evaluate_importance(message, user_preferences, text_lower)
+    async with scoring_semaphore:
+        return await asyncio.to_thread(evaluate_message_importance, message, user_preferences, text_lower)
@@ -1,16 +1,23 @@
 import logging
 import asyncio
-import html
+import functools
+import hashlib
+import re
+import time
+from collections import OrderedDict, deque
+from itertools import islice
 from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Set
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
-from telegram.ext import Application, CommandHandler, CallbackContext, MessageHandler, CallbackQueryHandler, filters
+from telegram.ext import AIORateLimiter, Application, CommandHandler, CallbackContext, MessageHandler, CallbackQueryHandler, filters
 from telegram.constants import ParseMode
 
 from config import TELEGRAM_TOKEN, DEFAULT_IMPORTANCE_THRESHOLD, USERBOT_ENABLED
-from models import Message, Storage, UserPreferences, PostStatus
-from ai_service import evaluate_message_importance
-from admin_service import AdminService
-from utils import setup_logging
+from models import Message, Storage, UserPreferences, PostStatus, PendingPost
+from ai_service import close_http_session, evaluate_message_importance_async
+from admin_service import ADMIN_NOTIFY_CONCURRENCY, AdminService
+from outbox import MAX_CONCURRENT_REQUESTS, outbox
+from utils import escape_html, setup_logging
 
 # Import userbot functionality
 if USERBOT_ENABLED:
@@ -22,14 +29,174 @@ setup_logging()
 # Enable logging
 logger = logging.getLogger(__name__)
 
+# Отображение статусов постов
+STATUS_EMOJI = {
+    PostStatus.PENDING: "⏳",
+    PostStatus.APPROVED: "✅",
+    PostStatus.REJECTED: "❌",
+    PostStatus.PUBLISHED: "📢"
+}
+
+STATUS_TEXT = {
+    PostStatus.PENDING: "Ожидает",
+    PostStatus.APPROVED: "Одобрен",
+    PostStatus.REJECTED: "Отклонен",
+    PostStatus.PUBLISHED: "Опубликован"
+}
+
+# Готовые заголовки статусов: один поиск на пост вместо двух и без повторного форматирования
+STATUS_LABEL = {status: f"{STATUS_EMOJI[status]} <b>{STATUS_TEXT[status]}</b>" for status in PostStatus}
+UNKNOWN_STATUS_LABEL = "❓ <b>Неизвестно</b>"
+
+INVALID_CALLBACK_TEXT = "❌ Некорректные данные кнопки."
+
+# Лимит Telegram - 4096 символов, оставляем запас под разметку и подпись
+MESSAGE_PAGE_LIMIT = 3500
+
+class ChatInfo(NamedTuple):
+    """Fields of a Telegram chat the bot actually displays."""
+    id: int
+    title: Optional[str]
+    username: Optional[str]
+    type: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+# Кэш информации о чатах: chat_id -> (время получения, ChatInfo)
+# Храним только нужные поля, а не весь объект Chat
+CHAT_CACHE_TTL = 600  # секунд
+CHAT_CACHE_LIMIT = 4096  # Самые давно использованные записи вытесняются
+chat_cache: "OrderedDict[int, tuple]" = OrderedDict()
+
+# Размеры пулов соединений Bot API: отдельный маленький пул для getUpdates,
+# чтобы долгий опрос не занимал соединения обработчиков
+CONNECTION_POOL_SIZE = 256
+GET_UPDATES_POOL_SIZE = 16
+
+# Не больше 20 одновременных get_chat, чтобы не переполнять пул соединений
+GET_CHAT_CONCURRENCY = 20
+
+# Не больше 20 одновременных уведомлений при рассылке
+NOTIFY_CONCURRENCY = 20
+
+# Семафоры общие для всех обработчиков: лимит действует на весь бот, а не на один вызов.
+# Их сумма ограничена размером пула - см. проверку после ADMIN_CHECK_CONCURRENCY
+get_chat_semaphore = asyncio.Semaphore(GET_CHAT_CONCURRENCY)
+notify_semaphore = asyncio.Semaphore(NOTIFY_CONCURRENCY)
+
+# Иконки источников по типу чата
+CHAT_TYPE_ICON = {'channel': "📢", 'group': "💬", 'supergroup': "💬"}
+
+# Фоновые задачи держим в множестве, иначе цикл событий может их собрать
+background_tasks: Set[asyncio.Task] = set()
+
+async def get_chat_cached(bot, chat_id, ttl: float = CHAT_CACHE_TTL) -> ChatInfo:
+    """Get chat info, reusing a recent result instead of calling Telegram again."""
+    now = time.monotonic()
+    cached = chat_cache.get(chat_id)
+    if cached and now - cached[0] < ttl:
+        chat_cache.move_to_end(chat_id)
+        return cached[1]
+    
+    chat = await bot.get_chat(chat_id)
+    info = ChatInfo(chat.id, chat.title, chat.username, chat.type, chat.first_name, chat.last_name)
+    chat_cache[chat_id] = (now, info)
+    chat_cache.move_to_end(chat_id)
+    if len(chat_cache) > CHAT_CACHE_LIMIT:
+        chat_cache.popitem(last=False)
+    return info
+
+async def get_chats_concurrently(bot, chat_ids: List[int]) -> List:
+    """Fetch several chats at once; failed lookups are returned as exceptions in place."""
+    async def fetch(chat_id):
+        async with get_chat_semaphore:
+            return await get_chat_cached(bot, chat_id)
+    
+    return await asyncio.gather(*(fetch(chat_id) for chat_id in chat_ids), return_exceptions=True)
+
+def set_user_state(user: UserPreferences, state: Optional[str]) -> None:
+    """Set the user's dialog state, writing to storage only when it actually changes."""
+    if user.current_state != state:
+        Storage.set_user_state(user.user_id, state)
+
+def user_display_name(info: ChatInfo) -> str:
+    """Build a display name of a private chat: @username, full name or a placeholder."""
+    if info.username:
+        return f"@{info.username}"
+    if info.first_name:
+        return f"{info.first_name} {info.last_name}" if info.last_name else info.first_name
+    return "Неизвестный пользователь"
+
+def invalidate_chat_cache(chat_id) -> None:
+    """Drop cached chat info."""
+    chat_cache.pop(chat_id, None)
+
+def message_local_date(tg_message) -> datetime:
+    """Return the Telegram message date as naive local time, like the rest of the bot uses."""
+    if tg_message.date is None:
+        return datetime.now()
+    return tg_message.date.astimezone().replace(tzinfo=None)
+
+def hidden_sender_id(sender_name: str) -> int:
+    """Build a pseudo chat ID for a hidden forward sender that stays the same across restarts."""
+    # hash() для строк меняется при каждом запуске (PYTHONHASHSEED), поэтому берем blake2b.
+    # 56 бит со знаком минус не пересекаются с ID пользователей и обычно не совпадают с ID групп
+    digest = hashlib.blake2b(sender_name.encode("utf-8"), digest_size=7).digest()
+    return -int.from_bytes(digest, "big") - 1
+
+# Предложенные каналы по короткому ID: callback_data ограничена 64 байтами, а ссылка может быть длиннее
+CHANNEL_SUGGESTIONS_LIMIT = 1024
+channel_suggestions: "OrderedDict[str, str]" = OrderedDict()
+
+def remember_channel_suggestion(text: str) -> str:
+    """Store a suggested channel and return a short ID to put into callback_data."""
+    suggestion_id = hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+    channel_suggestions[suggestion_id] = text
+    channel_suggestions.move_to_end(suggestion_id)
+    if len(channel_suggestions) > CHANNEL_SUGGESTIONS_LIMIT:
+        channel_suggestions.popitem(last=False)
+    return suggestion_id
+
+def get_running_userbot():
+    """Return the userbot if it is enabled and running, otherwise None."""
+    if not USERBOT_ENABLED:
+        return None
+    userbot = get_userbot()
+    return userbot if userbot.is_running else None
+
+def collect_monitored_sources(user: UserPreferences) -> Set[int]:
+    """Collect the user's chats and channels plus the sources watched by the userbot."""
+    all_sources = user.monitored_chats | user.monitored_channels
+    userbot = get_running_userbot()
+    if userbot is not None:
+        all_sources.update(userbot.get_monitored_sources())
+    return all_sources
+
+def parse_chat_id(value: str) -> Optional[int]:
+    """Parse a chat ID from callback data, returning None for malformed input."""
+    try:
+        chat_id = int(value)
+    except ValueError:
+        return None
+    # ID в Telegram API - знаковое 64-битное число
+    if not -2**63 <= chat_id < 2**63:
+        return None
+    return chat_id
+
+# Названия и username чатов повторяются от вызова к вызову - кэшируем экранирование
+escape_cached = functools.lru_cache(maxsize=1024)(escape_html)
+
 # ===========================================
 # MAIN MENU KEYBOARDS
 # ===========================================
 
 def get_main_reply_keyboard(user_id: int) -> ReplyKeyboardMarkup:
     """Создает основную клавиатуру с reply кнопками"""
-    is_admin = Storage.is_admin(user_id)
-    
+    return build_main_reply_keyboard(Storage.is_admin(user_id))
+
+@functools.lru_cache(maxsize=2)
+def build_main_reply_keyboard(is_admin: bool) -> ReplyKeyboardMarkup:
+    """Собирает клавиатуру для роли (вариантов всего два, поэтому кэшируется)"""
     if is_admin:
         # Упрощенное меню для администраторов
         keyboard = [
@@ -46,6 +213,41 @@ def get_main_reply_keyboard(user_id: int) -> ReplyKeyboardMarkup:
     
     return ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=False)
 
+@functools.lru_cache(maxsize=256)
+def get_moderation_keyboard(post_id: str, show_navigation: bool = True) -> InlineKeyboardMarkup:
+    """Создает клавиатуру модерации поста (разметка неизменяема, поэтому кэшируется)"""
+    keyboard = [
+        [
+            InlineKeyboardButton("✅ Одобрить", callback_data=f"admin_approve_{post_id}"),
+            InlineKeyboardButton("❌ Отклонить", callback_data=f"admin_reject_{post_id}")
+        ]
+    ]
+    
+    if show_navigation:
+        keyboard.append([
+            InlineKeyboardButton("📄 Полный текст", callback_data=f"admin_full_{post_id}"),
+            InlineKeyboardButton("⏭️ Следующий", callback_data="admin_next_post")
+        ])
+    
+    return InlineKeyboardMarkup(keyboard)
+
+# Кнопка не зависит от сообщения - создается один раз
+SKIP_MONITORING_BUTTON = InlineKeyboardButton("❌ Пропустить", callback_data="skip_monitoring")
+
+def get_submit_forwarded_keyboard(message_id: int, important: bool) -> InlineKeyboardMarkup:
+    """Создает клавиатуру для предложения пересланного сообщения к публикации"""
+    label = "📝 Предложить для публикации" if important else "📝 Всё равно предложить для публикации"
+    return InlineKeyboardMarkup.from_button(InlineKeyboardButton(label, callback_data=f"submit_forwarded_{message_id}"))
+
+@functools.lru_cache(maxsize=256)
+def get_new_source_keyboard(chat_id: int, source_type: str) -> InlineKeyboardMarkup:
+    """Создает клавиатуру для нового источника (разметка неизменяема, поэтому кэшируется)"""
+    return InlineKeyboardMarkup.from_column([
+        InlineKeyboardButton("✅ Добавить в мониторинг", callback_data=f"add_passive_monitoring_{chat_id}_{source_type}"),
+        InlineKeyboardButton("🔍 Просто проанализировать", callback_data=f"analyze_once_{chat_id}_{source_type}"),
+        SKIP_MONITORING_BUTTON
+    ])
+
 
 
 
@@ -54,73 +256,135 @@ def get_main_reply_keyboard(user_id: int) -> ReplyKeyboardMarkup:
 # ESSENTIAL COMMANDS (минимум)
 # ===========================================
 
+# Статусы участника, при которых бот может публиковать в канале
+ADMIN_STATUSES = frozenset({'administrator', 'creator'})
+
+# Не больше 16 одновременных проверок каналов (get_chat_member, затем get_chat)
+ADMIN_CHECK_CONCURRENCY = 16
+admin_check_semaphore = asyncio.Semaphore(ADMIN_CHECK_CONCURRENCY)
+
+# Все рассылки и проверки одновременно не должны занимать больше соединений, чем есть в пуле.
+# Семафоры общие, поэтому сумма лимитов - действительный максимум одновременных запросов
+FAN_OUT_CONNECTIONS = (ADMIN_CHECK_CONCURRENCY + GET_CHAT_CONCURRENCY + NOTIFY_CONCURRENCY
+                       + ADMIN_NOTIFY_CONCURRENCY + MAX_CONCURRENT_REQUESTS)
+if FAN_OUT_CONNECTIONS > CONNECTION_POOL_SIZE:
+    raise RuntimeError(f"Лимиты одновременных запросов ({FAN_OUT_CONNECTIONS}) превышают пул соединений ({CONNECTION_POOL_SIZE})")
+
+# Кэш прав бота в каналах: channel_id -> (время проверки, данные канала или None, если бот не админ)
+ADMIN_CACHE_TTL = 300  # секунд
+admin_channel_cache: Dict = {}
+
+# Готовый список каналов для повторных открытий настройки канала: (время сборки, список)
+ADMIN_CHANNELS_LIST_TTL = 30  # секунд
+admin_channels_list_cache: Optional[tuple] = None
+
+def invalidate_admin_channel_cache(channel_id=None) -> None:
+    """Drop cached admin status for one channel, or for all channels."""
+    global admin_channels_list_cache
+    admin_channels_list_cache = None
+    if channel_id is None:
+        admin_channel_cache.clear()
+    else:
+        admin_channel_cache.pop(channel_id, None)
+
 async def get_bot_admin_channels(bot):
     """Получает список каналов, где бот является администратором"""
+    global admin_channels_list_cache
+    if admin_channels_list_cache and time.monotonic() - admin_channels_list_cache[0] < ADMIN_CHANNELS_LIST_TTL:
+        return [dict(channel) for channel in admin_channels_list_cache[1]]
+    
     admin_channels = []
     try:
-        # Получаем информацию о боте
-        bot_info = await bot.get_me()
-        bot_id = bot_info.id
-        
-        checked_channels = set()
-        
-        # Проверяем все каналы из конфига пользователей
-        all_users = Storage.get_all_users()
-        for user in all_users.values():
-            for channel_id in user.monitored_channels:
-                if channel_id not in checked_channels:
-                    checked_channels.add(channel_id)
-                    try:
-                        chat = await bot.get_chat(channel_id)
-                        # Проверяем, является ли бот администратором
-                        member = await bot.get_chat_member(channel_id, bot_id)
-                        if member.status in ['administrator', 'creator']:
-                            admin_channels.append({
-                                'id': channel_id,
-                                'title': chat.title,
-                                'username': chat.username
-                            })
-                    except Exception as e:
-                        logger.debug(f"Не удалось проверить канал {channel_id}: {e}")
+        # ID бота известен после инициализации приложения - get_me не нужен
+        bot_id = bot.id
+        
+        # Каналы пользователей берем из обратного индекса - перебирать всех пользователей не нужно
+        channel_ids = Storage.get_monitored_channel_ids()
         
         # Также проверяем канал из конфига, если он есть
         config = Storage.bot_config
-        if config.publish_channel_id and config.publish_channel_id not in checked_channels:
-            try:
-                chat = await bot.get_chat(config.publish_channel_id)
-                member = await bot.get_chat_member(config.publish_channel_id, bot_id)
-                if member.status in ['administrator', 'creator']:
-                    admin_channels.append({
-                        'id': config.publish_channel_id,
-                        'title': chat.title,
-                        'username': chat.username
-                    })
-            except Exception as e:
-                logger.debug(f"Не удалось проверить канал конфига {config.publish_channel_id}: {e}")
+        if config.publish_channel_id:
+            channel_ids.add(config.publish_channel_id)
+        
+        async def check_channel(channel_id):
+            cached = admin_channel_cache.get(channel_id)
+            if cached and time.monotonic() - cached[0] < ADMIN_CACHE_TTL:
+                return cached[1]
+            
+            async with admin_check_semaphore:
+                # Сначала проверяем статус бота: информация о канале нужна только там, где он админ
+                member = await bot.get_chat_member(channel_id, bot_id)
+                chat = await get_chat_cached(bot, channel_id) if member.status in ADMIN_STATUSES else None
+            
+            channel = None
+            if chat is not None:
+                channel_name = chat.title or ''
+                if chat.username:
+                    channel_name += f" (@{chat.username})"
+                channel = {
+                    'id': channel_id,
+                    'title': chat.title,
+                    'username': chat.username,
+                    # Готовое к отправке в HTML название: экранируется один раз на время жизни кэша
+                    'html_name': escape_html(channel_name)
+                }
+            admin_channel_cache[channel_id] = (time.monotonic(), channel)
+            return channel
+        
+        # Проверяем все каналы параллельно
+        channel_ids = list(channel_ids)
+        results = await asyncio.gather(*(check_channel(channel_id) for channel_id in channel_ids), return_exceptions=True)
+        
+        for channel_id, result in zip(channel_ids, results):
+            if isinstance(result, Exception):
+                logger.debug(f"Не удалось проверить канал {channel_id}: {result}")
+            elif result:
+                admin_channels.append(dict(result))
+        
+        admin_channels_list_cache = (time.monotonic(), [dict(channel) for channel in admin_channels])
                 
     except Exception as e:
         logger.error(f"Ошибка при получении списка каналов: {e}")
     
     return admin_channels
 
+# Шаблоны ответов команд: статичный текст собирается один раз, подставляются только значения
+WELCOME_TEXT_TEMPLATE = (
+    "🤖 <b>Добро пожаловать!</b>\n\n"
+    "Я анализирую сообщения из ваших чатов и каналов с помощью ИИ "
+    "и уведомляю только о важных сообщениях.\n\n"
+    "📊 <b>Ваши настройки:</b>\n"
+    "• Порог важности: {threshold} (глобальный)\n"
+    "• Мониторится источников: {sources}\n"
+    "• Ключевых слов: {keywords}\n\n"
+    "💡 Используйте кнопки ниже для навигации"
+)
+
+MAIN_MENU_TEXT = "🎛️ <b>Главное меню</b>\n\nВыберите нужный раздел:"
+
+ADMIN_PANEL_TEMPLATE = (
+    "🔧 <b>Панель администратора</b>\n\n"
+    "📊 <b>Статистика:</b>\n"
+    "• Администраторов: {admins}\n"
+    "• Постов на модерации: {pending}\n"
+    "• Канал публикации: {channel}\n"
+    "• Автопубликация: {auto_publish}\n"
+    "• Требует одобрения: {approval}\n\n"
+    "🎛️ Используйте кнопки для управления:"
+)
+
 async def start_command(update: Update, context: CallbackContext) -> None:
     """Send a welcome message when the command /start is issued."""
     user_id = update.effective_user.id
     user = Storage.get_user(user_id)
     
-    # Сбрасываем состояние пользователя
-    user.current_state = None
-    Storage.update_user(user)
-    
-    welcome_text = (
-        f"🤖 <b>Добро пожаловать!</b>\n\n"
-        f"Я анализирую сообщения из ваших чатов и каналов с помощью ИИ "
-        f"и уведомляю только о важных сообщениях.\n\n"
-        f"📊 <b>Ваши настройки:</b>\n"
-        f"• Порог важности: {Storage.bot_config.importance_threshold} (глобальный)\n"
-        f"• Мониторится источников: {len(user.monitored_chats) + len(user.monitored_channels)}\n"
-        f"• Ключевых слов: {len(user.keywords)}\n\n"
-        f"💡 Используйте кнопки ниже для навигации"
+    # Сбрасываем состояние пользователя (запись только если оно было задано)
+    set_user_state(user, None)
+    
+    welcome_text = WELCOME_TEXT_TEMPLATE.format(
+        threshold=Storage.bot_config.importance_threshold,
+        sources=len(user.monitored_chats) + len(user.monitored_channels),
+        keywords=len(user.keywords)
     )
     
     reply_markup = get_main_reply_keyboard(user_id)
@@ -135,15 +399,14 @@ async def menu_command(update: Update, context: CallbackContext) -> None:
     """Show main menu."""
     user_id = update.effective_user.id
     
-    # Сбрасываем состояние пользователя
+    # Сбрасываем состояние пользователя (запись только если оно было задано)
     user = Storage.get_user(user_id)
-    user.current_state = None
-    Storage.update_user(user)
+    set_user_state(user, None)
     
     reply_markup = get_main_reply_keyboard(user_id)
     
     await update.message.reply_text(
-        "🎛️ <b>Главное меню</b>\n\nВыберите нужный раздел:",
+        MAIN_MENU_TEXT,
         reply_markup=reply_markup,
         parse_mode=ParseMode.HTML
     )
@@ -156,20 +419,17 @@ async def admin_command(update: Update, context: CallbackContext) -> None:
         await update.message.reply_text("❌ У вас нет прав администратора.")
         return
     
-    reply_markup = get_main_reply_keyboard(user_id)
+    reply_markup = build_main_reply_keyboard(True)
     
     config = Storage.bot_config
-    pending_posts = len(Storage.get_pending_posts(PostStatus.PENDING))
-    
-    admin_text = (
-        f"🔧 <b>Панель администратора</b>\n\n"
-        f"📊 <b>Статистика:</b>\n"
-        f"• Администраторов: {len(config.admin_ids)}\n"
-        f"• Постов на модерации: {pending_posts}\n"
-        f"• Канал публикации: {config.publish_channel_username or 'Не настроен'}\n"
-        f"• Автопубликация: {'Включена' if config.auto_publish_enabled else 'Отключена'}\n"
-        f"• Требует одобрения: {'Да' if config.require_admin_approval else 'Нет'}\n\n"
-        f"🎛️ Используйте кнопки для управления:"
+    pending_posts = Storage.count_pending_posts(PostStatus.PENDING)
+    
+    admin_text = ADMIN_PANEL_TEMPLATE.format(
+        admins=len(config.admin_ids),
+        pending=pending_posts,
+        channel=config.publish_channel_username or 'Не настроен',
+        auto_publish='Включена' if config.auto_publish_enabled else 'Отключена',
+        approval='Да' if config.require_admin_approval else 'Нет'
     )
     
     await update.message.reply_text(
@@ -194,7 +454,7 @@ async def submit_post_command(update: Update, context: CallbackContext) -> None:
             if hasattr(update.message.reply_to_message, 'forward_origin') and update.message.reply_to_message.forward_origin:
                 if hasattr(update.message.reply_to_message.forward_origin, 'chat'):
                     source_chat = update.message.reply_to_message.forward_origin.chat
-                    source_info = f"Пересланное из: {html.escape(source_chat.title or 'Неизвестный чат')}"
+                    source_info = f"Пересланное из: {escape_cached(source_chat.title or 'Неизвестный чат')}"
         else:
             await update.message.reply_text("❌ Пересланное сообщение не содержит текста.")
             return
@@ -226,7 +486,7 @@ async def submit_post_command(update: Update, context: CallbackContext) -> None:
         )
         
     except PermissionError as e:
-        await update.message.reply_text(f"❌ {html.escape(str(e))}")
+        await update.message.reply_text(f"❌ {e}")
     except Exception as e:
         logger.error(f"Ошибка при отправке поста: {e}")
         await update.message.reply_text("❌ Произошла ошибка при отправке поста.")
@@ -235,151 +495,233 @@ async def submit_post_command(update: Update, context: CallbackContext) -> None:
 # REPLY BUTTON HANDLERS
 # ===========================================
 
+# Обработчики reply-кнопок: единая сигнатура (update, context, user)
+async def reply_monitoring(update: Update, context: CallbackContext, user: UserPreferences) -> None:
+    await show_monitoring_interface(update, context, user)
+
+async def reply_submit_post(update: Update, context: CallbackContext, user: UserPreferences) -> None:
+    await show_submit_post_interface(update, context)
+
+async def reply_suggest_channel(update: Update, context: CallbackContext, user: UserPreferences) -> None:
+    context.user_data['awaiting_channel_suggestion'] = True
+    await update.message.reply_text(
+        "📢 <b>Предложение канала для мониторинга</b>\n\n"
+        "💡 <b>Отправьте:</b>\n"
+        "• Username канала (например: @my_channel)\n"
+        "• Ссылку на канал (например: https://t.me/my_channel)\n"
+        "• ID канала (например: -1001234567890)\n\n"
+        "🔧 <b>Ваше предложение будет рассмотрено администратором.</b>",
+        parse_mode=ParseMode.HTML
+    )
+
+async def reply_important_channel(update: Update, context: CallbackContext, user: UserPreferences) -> None:
+    await show_important_channel_info(update, context)
+
+async def reply_statistics(update: Update, context: CallbackContext, user: UserPreferences) -> None:
+    await show_statistics_interface(update, context, user)
+
+async def reply_settings(update: Update, context: CallbackContext, user: UserPreferences) -> None:
+    await show_settings_interface(update, context, user)
+
+async def reply_help(update: Update, context: CallbackContext, user: UserPreferences) -> None:
+    await show_help_interface(update, context)
+
+async def reply_channel_config(update: Update, context: CallbackContext, user: UserPreferences) -> None:
+    await show_channel_config(update, context, user)
+
+async def reply_admins(update: Update, context: CallbackContext, user: UserPreferences) -> None:
+    # Состояние управления администраторами задано в handle_reply_buttons
+    await show_admins_management(update, context)
+
+async def reply_main_menu(update: Update, context: CallbackContext, user: UserPreferences) -> None:
+    # Состояние уже сброшено в handle_reply_buttons
+    reply_markup = get_main_reply_keyboard(user.user_id)
+    await update.message.reply_text(
+        MAIN_MENU_TEXT,
+        reply_markup=reply_markup,
+        parse_mode=ParseMode.HTML
+    )
+
+ADMIN_ONLY_FEATURE_TEXT = "❌ Эта функция доступна только администраторам."
+NO_ADMIN_RIGHTS_TEXT = "❌ У вас нет прав администратора."
+
+# Текст кнопки -> (обработчик, текст отказа для не-админов или None, состояние пользователя после нажатия)
+REPLY_ROUTES = {
+    # Main menu buttons
+    "📊 Мониторинг": (reply_monitoring, ADMIN_ONLY_FEATURE_TEXT, None),
+    "📝 Предложить пост": (reply_submit_post, None, None),
+    "📢 Предложить канал": (reply_suggest_channel, None, None),
+    "📬 Канал важных сообщений": (reply_important_channel, None, None),
+    "📈 Статистика": (reply_statistics, None, None),
+    "⚙️ Настройки": (reply_settings, ADMIN_ONLY_FEATURE_TEXT, None),
+    "ℹ️ Справка": (reply_help, None, None),
+    # Admin buttons
+    "📢 Канал публикации": (reply_channel_config, NO_ADMIN_RIGHTS_TEXT, "channel_setup"),
+    "👥 Администраторы": (reply_admins, NO_ADMIN_RIGHTS_TEXT, "admin_management"),
+    # Back to main menu
+    "🔙 Главное меню": (reply_main_menu, None, None),
+}
+
+# Подписи кнопок, которые не принимаются за текст поста (в том числе кнопки старых клавиатур)
+KNOWN_BUTTONS = frozenset(REPLY_ROUTES) | frozenset((
+    "📝 Модерация постов", "🤖 Userbot", "🔑 Ключевые слова", "🚀 Запустить", "🛑 Остановить"
+))
+
 async def handle_reply_buttons(update: Update, context: CallbackContext) -> bool:
     """Handle reply button presses. Returns True if button was handled."""
+    route = REPLY_ROUTES.get(update.message.text)
+    if route is None:
+        return False
+    
+    handler, denied_text, state = route
     user_id = update.effective_user.id
     user = Storage.get_user(user_id)
-    text = update.message.text
-    
-    # Сбрасываем состояние пользователя при нажатии любой кнопки
-    if user.current_state:
-        user.current_state = None
-        Storage.update_user(user)
-    
-    # Main menu buttons
-    if text == "📊 Мониторинг":
-        if Storage.is_admin(user_id):
-            await show_monitoring_interface(update, context, user)
-        else:
-            await update.message.reply_text("❌ Эта функция доступна только администраторам.")
-        return True
-    
-    elif text == "📝 Предложить пост":
-        await show_submit_post_interface(update, context)
-        return True
-    
-    elif text == "📢 Предложить канал":
-        context.user_data['awaiting_channel_suggestion'] = True
-        await update.message.reply_text(
-            "📢 <b>Предложение канала для мониторинга</b>\n\n"
-            "💡 <b>Отправьте:</b>\n"
-            "• Username канала (например: @my_channel)\n"
-            "• Ссылку на канал (например: https://t.me/my_channel)\n"
-            "• ID канала (например: -1001234567890)\n\n"
-            "🔧 <b>Ваше предложение будет рассмотрено администратором.</b>",
-            parse_mode=ParseMode.HTML
-        )
-        return True
-    
-    elif text == "📬 Канал важных сообщений":
-        await show_important_channel_info(update, context)
-        return True
-    
-    elif text == "📈 Статистика":
-        user = Storage.get_user(user_id)
-        await show_statistics_interface(update, context, user)
-        return True
+    denied = denied_text is not None and not Storage.is_admin(user_id)
     
-    elif text == "⚙️ Настройки":
-        if Storage.is_admin(user_id):
-            await show_settings_interface(update, context, user)
-        else:
-            await update.message.reply_text("❌ Эта функция доступна только администраторам.")
-        return True
+    # Нажатие кнопки сбрасывает состояние или задает состояние раздела - одной записью
+    set_user_state(user, None if denied else state)
     
-    elif text == "ℹ️ Справка":
-        await show_help_interface(update, context)
+    if denied:
+        await update.message.reply_text(denied_text)
         return True
     
-    # Admin buttons
-    elif text == "📢 Канал публикации":
-        if Storage.is_admin(user_id):
-            await show_channel_config(update, context)
-        else:
-            await update.message.reply_text("❌ У вас нет прав администратора.")
-        return True
-    
-    elif text == "👥 Администраторы":
-        if Storage.is_admin(user_id):
-            # Устанавливаем состояние для управления администраторами
-            user.current_state = "admin_management"
-            Storage.update_user(user)
-            await show_admins_management(update, context)
-        else:
-            await update.message.reply_text("❌ У вас нет прав администратора.")
-        return True
-    
-
-
-    
-    # Back to main menu
-    elif text == "🔙 Главное меню":
-        # Сбрасываем состояние пользователя
-        user = Storage.get_user(user_id)
-        user.current_state = None
-        Storage.update_user(user)
-        
-        reply_markup = get_main_reply_keyboard(user_id)
-        await update.message.reply_text(
-            "🎛️ <b>Главное меню</b>\n\nВыберите нужный раздел:",
-            reply_markup=reply_markup,
-            parse_mode=ParseMode.HTML
-        )
-        return True
-    
-    # If no button matched, return False
-    return False
+    await handler(update, context, user)
+    return True
 
 # ===========================================
 # INTERFACE FUNCTIONS
 # ===========================================
 
+# Статичные клавиатуры интерфейсов: разметка неизменяема, поэтому создается один раз
+MONITORING_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("➕ Добавить источник", callback_data="monitoring_add"),
+        InlineKeyboardButton("📋 Список источников", callback_data="monitoring_list")
+    ],
+    [
+        InlineKeyboardButton("🗑️ Удалить источник", callback_data="monitoring_remove"),
+        InlineKeyboardButton("🧹 Очистить все", callback_data="monitoring_clear")
+    ]
+])
+
+SUBMIT_POST_KEYBOARD = InlineKeyboardMarkup.from_button(
+    InlineKeyboardButton("📄 Мои предложения", callback_data="my_submissions")
+)
+
+STATISTICS_KEYBOARD = InlineKeyboardMarkup.from_button(
+    InlineKeyboardButton("🔄 Обновить", callback_data="stats_refresh")
+)
+
+KEYWORDS_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("➕ Добавить важное", callback_data="keywords_add_important"),
+        InlineKeyboardButton("➖ Добавить исключаемое", callback_data="keywords_add_exclude")
+    ],
+    [
+        InlineKeyboardButton("🗑️ Удалить важное", callback_data="keywords_remove_important"),
+        InlineKeyboardButton("🗑️ Удалить исключаемое", callback_data="keywords_remove_exclude")
+    ],
+    [
+        InlineKeyboardButton("🧹 Очистить все", callback_data="keywords_clear_all")
+    ]
+])
+
+ADMIN_HELP_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🚀 Быстрый старт", callback_data="help_quickstart"),
+        InlineKeyboardButton("💡 Советы", callback_data="help_tips")
+    ],
+    [
+        InlineKeyboardButton("❓ FAQ", callback_data="help_faq")
+    ]
+])
+
+ADMIN_CONFIG_KEYBOARD = InlineKeyboardMarkup.from_button(
+    InlineKeyboardButton("📊 Изменить порог важности", callback_data="admin_threshold")
+)
+
+ADMIN_STATS_KEYBOARD = InlineKeyboardMarkup.from_button(
+    InlineKeyboardButton("🔄 Обновить", callback_data="admin_stats_refresh")
+)
+
+SUBMIT_TEXT_CONFIRM_KEYBOARD = InlineKeyboardMarkup.from_row([
+    InlineKeyboardButton("✅ Да, отправить на модерацию", callback_data="confirm_submit_text"),
+    InlineKeyboardButton("❌ Отмена", callback_data="cancel_submit")
+])
+
+def build_clear_confirm_keyboard(confirm_data: str) -> InlineKeyboardMarkup:
+    """Клавиатура подтверждения очистки с общей кнопкой отмены"""
+    return InlineKeyboardMarkup.from_row([
+        InlineKeyboardButton("✅ Да, очистить", callback_data=confirm_data),
+        InlineKeyboardButton("❌ Отмена", callback_data="cancel_clear")
+    ])
+
+CLEAR_MONITORING_CONFIRM_KEYBOARD = build_clear_confirm_keyboard("confirm_clear_monitoring")
+CLEAR_DATA_CONFIRM_KEYBOARD = build_clear_confirm_keyboard("confirm_clear_data")
+CLEAR_KEYWORDS_CONFIRM_KEYBOARD = build_clear_confirm_keyboard("confirm_clear_keywords")
+
+# Кнопки действий под списком каналов в настройке канала публикации
+CHANNEL_SETUP_ACTION_ROWS = (
+    (InlineKeyboardButton("🔄 Обновить список", callback_data="refresh_channels"),),
+    (InlineKeyboardButton("🗑️ Очистить настройки", callback_data="admin_clear_channel"),),
+    (InlineKeyboardButton("❌ Отмена", callback_data="cancel_channel_setup"),)
+)
+
+# Статичные строки клавиатуры настроек; динамические кнопки добавляются при отрисовке
+SETTINGS_KEYWORDS_ROW = (InlineKeyboardButton("🔑 Ключевые слова", callback_data="settings_keywords"),)
+SETTINGS_THRESHOLD_ROW = (InlineKeyboardButton("📊 Глобальный порог", callback_data="admin_threshold"),)
+SETTINGS_DATA_ROW = (
+    InlineKeyboardButton("🗑️ Очистить данные", callback_data="settings_clear"),
+    InlineKeyboardButton("🔄 Сброс настроек", callback_data="settings_reset")
+)
+
+# Неизменяемые части текстов интерфейсов: к ним добавляется только динамическое начало
+MONITORING_HELP_BLOCK = (
+    "💡 <b>Как работает мониторинг:</b>\n"
+    "• Бот автоматически отслеживает все сообщения\n"
+    "• ИИ анализирует важность каждого сообщения\n"
+    "• Вы получаете уведомления о важных событиях\n\n"
+    "➕ <b>Добавить источник можно:</b>\n"
+    "• Переслав сообщение из канала/чата боту\n"
+    "• Отправив ссылку на канал или @username\n"
+    "• Добавив бота в групповой чат"
+)
+
+CHANNEL_FORMATS_BLOCK = (
+    "💡 <b>Или отправьте вручную:</b>\n"
+    "• ID канала (например: -1001234567890)\n"
+    "• Username канала (например: @my_channel)\n"
+    "• Ссылку на канал (например: https://t.me/my_channel)\n"
+    "• Короткую ссылку (например: t.me/my_channel)\n\n"
+    "🔧 <b>Просто отправьте любой из этих форматов следующим сообщением!</b>"
+)
+
+ADMINS_MANAGEMENT_HINT_BLOCK = (
+    "\n💡 <b>Для добавления/удаления отправьте:</b>\n"
+    "• <code>+123456789</code> - добавить админа по ID\n"
+    "• <code>+@username</code> - добавить админа по юзернейму\n"
+    "• <code>-123456789</code> - удалить админа по ID\n"
+    "• <code>-@username</code> - удалить админа по юзернейму\n\n"
+    "🔧 <b>Или используйте команды:</b>\n"
+    "/admin_add user_id_или_@username\n"
+    "/admin_remove user_id_или_@username"
+)
+
 async def show_monitoring_interface(update: Update, context: CallbackContext, user: UserPreferences) -> None:
     """Show monitoring interface with inline buttons."""
     # Подсчитываем все источники мониторинга
-    all_sources = set()
-    all_sources.update(user.monitored_chats)
-    all_sources.update(user.monitored_channels)
-    
-    if USERBOT_ENABLED:
-        userbot = get_userbot()
-        if userbot.is_running:
-            userbot_sources = userbot.get_monitored_sources()
-            all_sources.update(userbot_sources)
-    
-    total_sources = len(all_sources)
+    total_sources = len(collect_monitored_sources(user))
     
     monitoring_text = (
         f"📊 <b>Мониторинг источников</b>\n\n"
         f"📈 <b>Статистика:</b>\n"
         f"• Всего источников: {total_sources}\n"
         f"• Порог важности: {Storage.bot_config.importance_threshold}\n\n"
-        f"💡 <b>Как работает мониторинг:</b>\n"
-        f"• Бот автоматически отслеживает все сообщения\n"
-        f"• ИИ анализирует важность каждого сообщения\n"
-        f"• Вы получаете уведомления о важных событиях\n\n"
-        f"➕ <b>Добавить источник можно:</b>\n"
-        f"• Переслав сообщение из канала/чата боту\n"
-        f"• Отправив ссылку на канал или @username\n"
-        f"• Добавив бота в групповой чат"
-    )
-    
-    keyboard = [
-        [
-            InlineKeyboardButton("➕ Добавить источник", callback_data="monitoring_add"),
-            InlineKeyboardButton("📋 Список источников", callback_data="monitoring_list")
-        ],
-        [
-            InlineKeyboardButton("🗑️ Удалить источник", callback_data="monitoring_remove"),
-            InlineKeyboardButton("🧹 Очистить все", callback_data="monitoring_clear")
-        ]
-    ]
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    ) + MONITORING_HELP_BLOCK
     
     await update.message.reply_text(
         monitoring_text,
-        reply_markup=reply_markup,
+        reply_markup=MONITORING_KEYBOARD,
         parse_mode=ParseMode.HTML
     )
 
@@ -402,55 +744,47 @@ async def show_submit_post_interface(update: Update, context: CallbackContext) -
         f"✅ <b>Попробуйте прямо сейчас!</b>"
     )
     
-    keyboard = [
-        [InlineKeyboardButton("📄 Мои предложения", callback_data="my_submissions")]
-    ]
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
     await update.message.reply_text(
         submit_text,
-        reply_markup=reply_markup,
+        reply_markup=SUBMIT_POST_KEYBOARD,
         parse_mode=ParseMode.HTML
     )
 
 async def show_settings_interface(update: Update, context: CallbackContext, user: UserPreferences) -> None:
     """Show settings interface with inline buttons."""
-    keywords = ", ".join(user.keywords) if user.keywords else "Не указаны"
-    exclude_keywords = ", ".join(user.exclude_keywords) if user.exclude_keywords else "Не указаны"
+    keywords = join_truncated(user.keywords) if user.keywords else "Не указаны"
+    exclude_keywords = join_truncated(user.exclude_keywords) if user.exclude_keywords else "Не указаны"
     config = Storage.bot_config
     
-    settings_text = (
+    parts = [
         f"⚙️ <b>Настройки</b>\n\n"
         f"📊 <b>Ваши параметры:</b>\n"
-        f"• Порог важности: {Storage.bot_config.importance_threshold} (глобальный)\n"
+        f"• Порог важности: {config.importance_threshold} (глобальный)\n"
         f"• Мониторится чатов: {len(user.monitored_chats)}\n"
         f"• Мониторится каналов: {len(user.monitored_channels)}\n"
         f"• Можете предлагать посты: {'Да' if user.can_submit_posts else 'Нет'}\n\n"
         f"🔑 <b>Ключевые слова:</b>\n"
-        f"• Важные: {keywords[:100]}{'...' if len(keywords) > 100 else ''}\n"
-        f"• Исключаемые: {exclude_keywords[:100]}{'...' if len(exclude_keywords) > 100 else ''}\n"
-    )
+        f"• Важные: {keywords}\n"
+        f"• Исключаемые: {exclude_keywords}\n"
+    ]
     
     # Добавляем глобальные настройки для администраторов
-    if Storage.is_admin(user.user_id):
-        settings_text += (
+    is_admin = Storage.is_admin(user.user_id)
+    if is_admin:
+        parts.append(
             f"\n\n🌐 <b>Глобальные настройки:</b>\n"
             f"• Автопубликация: {'Включена' if config.auto_publish_enabled else 'Отключена'}\n"
             f"• Требует одобрения: {'Да' if config.require_admin_approval else 'Нет'}\n"
             f"• Глобальный порог: {config.importance_threshold}\n"
         )
     
-    settings_text += "\n\n💡 Используйте кнопки для изменения настроек"
+    parts.append("\n\n💡 Используйте кнопки для изменения настроек")
+    settings_text = "".join(parts)
     
-    keyboard = [
-        [
-            InlineKeyboardButton("🔑 Ключевые слова", callback_data="settings_keywords")
-        ]
-    ]
+    keyboard = [SETTINGS_KEYWORDS_ROW]
     
     # Добавляем кнопки глобальных настроек для администраторов
-    if Storage.is_admin(user.user_id):
+    if is_admin:
         keyboard.append([
             InlineKeyboardButton(
                 f"🤖 Автопубликация: {'✅' if config.auto_publish_enabled else '❌'}", 
@@ -463,14 +797,9 @@ async def show_settings_interface(update: Update, context: CallbackContext, user
                 callback_data="admin_toggle_approval"
             )
         ])
-        keyboard.append([
-            InlineKeyboardButton("📊 Глобальный порог", callback_data="admin_threshold")
-        ])
+        keyboard.append(SETTINGS_THRESHOLD_ROW)
     
-    keyboard.append([
-        InlineKeyboardButton("🗑️ Очистить данные", callback_data="settings_clear"),
-        InlineKeyboardButton("🔄 Сброс настроек", callback_data="settings_reset")
-    ])
+    keyboard.append(SETTINGS_DATA_ROW)
     
     reply_markup = InlineKeyboardMarkup(keyboard)
     
@@ -500,79 +829,42 @@ async def show_statistics_interface(update: Update, context: CallbackContext, us
         f"• Может предлагать посты: {'Да' if user.can_submit_posts else 'Нет'}"
     )
     
-    keyboard = [
-        [InlineKeyboardButton("🔄 Обновить", callback_data="stats_refresh")]
-    ]
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    # Check if this is a callback query or regular message
-    if update.callback_query:
-        # Called from a callback query (button press)
-        await update.callback_query.edit_message_text(
-            stats_text,
-            reply_markup=reply_markup,
-            parse_mode=ParseMode.HTML
-        )
-    else:
-        # Called from a regular message
-        await update.message.reply_text(
-            stats_text,
-            reply_markup=reply_markup,
-            parse_mode=ParseMode.HTML
-        )
+    # Вызывается и по кнопке, и из обычного сообщения
+    await respond(update, stats_text, STATISTICS_KEYBOARD)
 
 async def show_keywords_interface(update: Update, context: CallbackContext, user: UserPreferences) -> None:
     """Show keywords management interface."""
-    keywords_text = (
+    parts = [
         f"🔑 <b>Управление ключевыми словами</b>\n\n"
         f"📈 <b>Важные слова</b> (повышают важность):\n"
-    )
+    ]
     
     if user.keywords:
-        keywords_text += "• " + "\n• ".join(user.keywords[:10])
+        parts.append("• " + "\n• ".join(user.keywords[:10]))
         if len(user.keywords) > 10:
-            keywords_text += f"\n• ... и еще {len(user.keywords) - 10}"
+            parts.append(f"\n• ... и еще {len(user.keywords) - 10}")
     else:
-        keywords_text += "Не указаны"
+        parts.append("Не указаны")
     
-    keywords_text += f"\n\n📉 <b>Исключаемые слова</b> (понижают важность):\n"
+    parts.append(f"\n\n📉 <b>Исключаемые слова</b> (понижают важность):\n")
     
     if user.exclude_keywords:
-        keywords_text += "• " + "\n• ".join(user.exclude_keywords[:10])
+        parts.append("• " + "\n• ".join(user.exclude_keywords[:10]))
         if len(user.exclude_keywords) > 10:
-            keywords_text += f"\n• ... и еще {len(user.exclude_keywords) - 10}"
+            parts.append(f"\n• ... и еще {len(user.exclude_keywords) - 10}")
     else:
-        keywords_text += "Не указаны"
+        parts.append("Не указаны")
     
-    keywords_text += (
+    parts.append(
         f"\n\n💡 <b>Как добавить:</b>\n"
         f"Просто отправьте сообщение с текстом:\n"
         f"<code>+слово</code> - добавить важное слово\n"
         f"<code>-слово</code> - добавить исключаемое слово"
     )
+    keywords_text = "".join(parts)
     
-    keyboard = [
-        [
-            InlineKeyboardButton("➕ Добавить важное", callback_data="keywords_add_important"),
-            InlineKeyboardButton("➖ Добавить исключаемое", callback_data="keywords_add_exclude")
-        ],
-        [
-            InlineKeyboardButton("🗑️ Удалить важное", callback_data="keywords_remove_important"),
-            InlineKeyboardButton("🗑️ Удалить исключаемое", callback_data="keywords_remove_exclude")
-        ],
-        [
-            InlineKeyboardButton("🧹 Очистить все", callback_data="keywords_clear_all")
-        ]
-    ]
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    await update.message.reply_text(
-        keywords_text,
-        reply_markup=reply_markup,
-        parse_mode=ParseMode.HTML
-    )
+    # Открывается кнопкой из настроек, поэтому update.message может отсутствовать
+    await respond(update, keywords_text, KEYWORDS_KEYBOARD)
 
 async def show_important_channel_info(update: Update, context: CallbackContext) -> None:
     """Show information about important messages channel."""
@@ -607,12 +899,80 @@ async def show_important_channel_info(update: Update, context: CallbackContext)
             parse_mode=ParseMode.HTML
         )
 
+# Статичные тексты справки
+USER_HELP_TEXT = (
+    "ℹ️ <b>Справка по боту</b>\n\n"
+    "🤖 <b>Что умеет этот бот:</b>\n"
+    "• Принимает предложения постов для публикации\n"
+    "• Принимает предложения каналов для мониторинга\n\n"
+    "📝 <b>Как предложить пост:</b>\n"
+    "1. Нажмите кнопку '📝 Предложить пост'\n"
+    "2. Отправьте текст вашего поста\n"
+    "3. Подтвердите отправку на модерацию\n\n"
+    "📢 <b>Как предложить канал:</b>\n"
+    "1. Нажмите кнопку '📢 Предложить канал'\n"
+    "2. Отправьте ссылку или username канала\n\n"
+    "💡 <b>Важно:</b>\n"
+    "• Все предложения рассматриваются администраторами\n"
+    "• Вы получите уведомление о решении по вашему посту"
+)
+
+QUICKSTART_HELP_TEXT = (
+    "🚀 <b>Быстрый старт</b>\n\n"
+    "1️⃣ <b>Перешлите сообщение</b>\n"
+    "Перешлите интересное сообщение из любого чата или канала боту\n\n"
+    "2️⃣ <b>Добавьте в мониторинг</b>\n"
+    "Выберите 'Добавить в мониторинг' в предложенном меню\n\n"
+    "3️⃣ <b>Настройте фильтры</b>\n"
+    "• Добавьте ключевые слова: +важно\n"
+    "• Настройте порог важности: 0.7\n\n"
+    "4️⃣ <b>Готово!</b>\n"
+    "Получайте уведомления о важных сообщениях"
+)
+
+TIPS_HELP_TEXT = (
+    "💡 <b>Полезные советы</b>\n\n"
+    "🔑 <b>Ключевые слова:</b>\n"
+    "• Используйте конкретные термины\n"
+    "• Добавляйте синонимы\n"
+    "• Исключайте шум (+важно, -реклама)\n\n"
+    "📊 <b>Порог важности:</b>\n"
+    "• 0.3-0.5: Только критически важные\n"
+    "• 0.5-0.7: Сбалансированный режим\n"
+    "• 0.7-0.9: Большинство сообщений\n\n"
+    "📊 <b>Мониторинг:</b>\n"
+    "• Лучший способ отслеживания\n"
+    "• Работает 24/7 автоматически\n"
+    "• Конфиденциальный анализ\n\n"
+    "📝 <b>Посты:</b>\n"
+    "• Предлагайте интересный контент\n"
+    "• Используйте пересланные сообщения\n"
+    "• Следите за уведомлениями о статусе"
+)
+
+FAQ_HELP_TEXT = (
+    "❓ <b>Часто задаваемые вопросы</b>\n\n"
+    "<b>Q: Как добавить закрытый канал?</b>\n"
+    "A: Используйте функцию мониторинга - она может работать с любыми каналами\n\n"
+    "<b>Q: Почему не приходят уведомления?</b>\n"
+    "A: Проверьте порог важности и ключевые слова\n\n"
+    "<b>Q: Можно ли мониторить без добавления бота?</b>\n"
+    "A: Да, используйте функцию мониторинга или перешлите сообщение\n\n"
+    "<b>Q: Как предложить пост для публикации?</b>\n"
+    "A: Используйте кнопку 'Предложить пост' или команду /submit_post\n\n"
+    "<b>Q: Бот не отвечает на команды</b>\n"
+    "A: Используйте кнопки вместо команд - это удобнее\n\n"
+    "<b>Q: Как стать администратором?</b>\n"
+    "A: Обратитесь к текущему администратору"
+)
+
 async def show_help_interface(update: Update, context: CallbackContext) -> None:
     """Show help interface."""
     user_id = update.effective_user.id
     is_admin = Storage.is_admin(user_id)
     
     if is_admin:
+        config = Storage.bot_config
         help_text = (
             f"ℹ️ <b>Справка администратора</b>\n\n"
             f"📝 <b>Модерация постов:</b>\n"
@@ -624,45 +984,18 @@ async def show_help_interface(update: Update, context: CallbackContext) -> None:
             f"• Добавьте источник в мониторинг\n"
             f"• Настройте ключевые слова\n\n"
             f"⚙️ <b>Настройки:</b>\n"
-            f"• Глобальный порог важности: {Storage.bot_config.importance_threshold}\n"
-            f"• Канал публикации: @{Storage.bot_config.publish_channel_username or 'не настроен'}\n\n"
+            f"• Глобальный порог важности: {config.importance_threshold}\n"
+            f"• Канал публикации: @{config.publish_channel_username or 'не настроен'}\n\n"
             "💡 <b>Совет:</b> Используйте мониторинг для отслеживания закрытых каналов"
         )
     else:
-        help_text = (
-            f"ℹ️ <b>Справка по боту</b>\n\n"
-            f"🤖 <b>Что умеет этот бот:</b>\n"
-            f"• Принимает предложения постов для публикации\n"
-            f"• Принимает предложения каналов для мониторинга\n\n"
-            f"📝 <b>Как предложить пост:</b>\n"
-            f"1. Нажмите кнопку '📝 Предложить пост'\n"
-            f"2. Отправьте текст вашего поста\n"
-            f"3. Подтвердите отправку на модерацию\n\n"
-            f"📢 <b>Как предложить канал:</b>\n"
-            f"1. Нажмите кнопку '📢 Предложить канал'\n"
-            f"2. Отправьте ссылку или username канала\n\n"
-            f"💡 <b>Важно:</b>\n"
-            f"• Все предложения рассматриваются администраторами\n"
-            f"• Вы получите уведомление о решении по вашему посту"
-        )
+        help_text = USER_HELP_TEXT
     
     # Inline кнопки только для администраторов
     if is_admin:
-        keyboard = [
-            [
-                InlineKeyboardButton("🚀 Быстрый старт", callback_data="help_quickstart"),
-                InlineKeyboardButton("💡 Советы", callback_data="help_tips")
-            ],
-            [
-                InlineKeyboardButton("❓ FAQ", callback_data="help_faq")
-            ]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await update.message.reply_text(
             help_text,
-            reply_markup=reply_markup,
+            reply_markup=ADMIN_HELP_KEYBOARD,
             parse_mode=ParseMode.HTML
         )
     else:
@@ -694,13 +1027,7 @@ async def show_admin_config(update: Update, context: CallbackContext) -> None:
         f"💡 <b>Все посты проходят модерацию перед публикацией</b>"
     )
     
-    keyboard = [
-        [
-            InlineKeyboardButton("📊 Изменить порог важности", callback_data="admin_threshold"),
-        ]
-    ]
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = ADMIN_CONFIG_KEYBOARD
     
     await update.message.reply_text(
         config_text,
@@ -708,17 +1035,15 @@ async def show_admin_config(update: Update, context: CallbackContext) -> None:
         parse_mode=ParseMode.HTML
     )
 
-async def show_channel_config(update: Update, context: CallbackContext) -> None:
+async def show_channel_config(update: Update, context: CallbackContext, user: UserPreferences) -> None:
     """Show channel configuration interface."""
     config = Storage.bot_config
-    channel_info = f"<code>{html.escape(str(config.publish_channel_id))}</code>" if config.publish_channel_id else "Не настроен"
-    username_info = f"@{html.escape(config.publish_channel_username)}" if config.publish_channel_username else "Не указан"
+    channel_info = f"<code>{config.publish_channel_id}</code>" if config.publish_channel_id else "Не настроен"
+    # Username в Telegram состоит из латиницы, цифр и "_" - экранировать нечего
+    username_info = f"@{config.publish_channel_username}" if config.publish_channel_username else "Не указан"
     
-    # Устанавливаем состояние для администратора
-    user_id = update.effective_user.id
-    user = Storage.get_user(user_id)
-    user.current_state = "channel_setup"
-    Storage.update_user(user)
+    # Остаемся в режиме настройки канала (запись только при смене состояния)
+    set_user_state(user, "channel_setup")
     
     # Получаем список каналов, где бот является администратором
     admin_channels = await get_bot_admin_channels(context.bot)
@@ -726,43 +1051,32 @@ async def show_channel_config(update: Update, context: CallbackContext) -> None:
     # Используем простой reply_text
     message_func = update.message.reply_text
     
-    channel_text = (
+    parts = [
         f"📢 <b>Настройка канала публикации</b>\n\n"
         f"📋 <b>Текущий канал:</b> {channel_info}\n"
         f"🏷️ <b>Username:</b> {username_info}\n\n"
-    )
+    ]
     
     keyboard = []
     
     if admin_channels:
-        channel_text += f"📊 <b>Доступные каналы (где бот админ):</b>\n"
+        parts.append(f"📊 <b>Доступные каналы (где бот админ):</b>\n")
         for channel in admin_channels:
-            channel_name = channel['title']
-            if channel['username']:
-                channel_name += f" (@{channel['username']})"
-            channel_text += f"• {html.escape(channel_name)}\n"
+            parts.append(f"• {channel['html_name']}\n")
             
             # Добавляем кнопку для быстрого выбора канала
             button_text = f"📢 {channel['title'][:30]}"
             keyboard.append([InlineKeyboardButton(button_text, callback_data=f"set_channel_{channel['id']}")])
         
-        channel_text += "\n💡 <b>Нажмите на канал выше для быстрого выбора</b>\n\n"
+        parts.append("\n💡 <b>Нажмите на канал выше для быстрого выбора</b>\n\n")
     else:
-        channel_text += "⚠️ <b>Нет доступных каналов</b>\n"
-        channel_text += "Добавьте бота администратором в канал, затем обновите эту страницу\n\n"
-    
-    channel_text += (
-        f"💡 <b>Или отправьте вручную:</b>\n"
-        f"• ID канала (например: -1001234567890)\n"
-        f"• Username канала (например: @my_channel)\n"
-        f"• Ссылку на канал (например: https://t.me/my_channel)\n"
-        f"• Короткую ссылку (например: t.me/my_channel)\n\n"
-        f"🔧 <b>Просто отправьте любой из этих форматов следующим сообщением!</b>"
-    )
+        parts.append("⚠️ <b>Нет доступных каналов</b>\n")
+        parts.append("Добавьте бота администратором в канал, затем обновите эту страницу\n\n")
+    
+    parts.append(CHANNEL_FORMATS_BLOCK)
+    channel_text = "".join(parts)
     
-    keyboard.append([InlineKeyboardButton("🔄 Обновить список", callback_data="refresh_channels")])
-    keyboard.append([InlineKeyboardButton("🗑️ Очистить настройки", callback_data="admin_clear_channel")])
-    keyboard.append([InlineKeyboardButton("❌ Отмена", callback_data="cancel_channel_setup")])
+    keyboard.extend(CHANNEL_SETUP_ACTION_ROWS)
     
     reply_markup = InlineKeyboardMarkup(keyboard)
     
@@ -778,290 +1092,431 @@ async def show_admins_management(update: Update, context: CallbackContext) -> No
     
     user_id = update.effective_user.id
     
-    admins_text = (
+    parts = [
         f"👥 <b>Администраторы бота</b>\n\n"
         f"📊 <b>Всего:</b> {len(config.admin_ids)}\n\n"
         f"📋 <b>Список:</b>\n"
-    )
+    ]
     
-    # Получаем информацию о каждом администраторе
-    for i, admin_id in enumerate(config.admin_ids, 1):
-        try:
-            # Пытаемся получить информацию о пользователе
-            chat_member = await context.bot.get_chat(admin_id)
-            username = chat_member.username
-            first_name = chat_member.first_name
-            last_name = chat_member.last_name
-            
-            # Формируем отображаемое имя
-            if username:
-                display_name = f"@{username}"
-            elif first_name:
-                display_name = f"{first_name}"
-                if last_name:
-                    display_name += f" {last_name}"
-            else:
-                display_name = "Неизвестный пользователь"
-            
-            admins_text += f"{i}. {display_name} (ID: {admin_id})\n"
-        except Exception as e:
+    # Получаем информацию об администраторах параллельно (повторные открытия берут ее из кэша)
+    admin_ids = list(config.admin_ids)
+    results = await get_chats_concurrently(context.bot, admin_ids)
+    for i, (admin_id, info) in enumerate(zip(admin_ids, results), 1):
+        if isinstance(info, Exception):
             # Если не удалось получить информацию, показываем только ID
-            admins_text += f"{i}. ID: {admin_id} (не удалось получить информацию)\n"
-    
-    admins_text += (
-        f"\n💡 <b>Для добавления/удаления отправьте:</b>\n"
-        f"• <code>+123456789</code> - добавить админа по ID\n"
-        f"• <code>+@username</code> - добавить админа по юзернейму\n"
-        f"• <code>-123456789</code> - удалить админа по ID\n"
-        f"• <code>-@username</code> - удалить админа по юзернейму\n\n"
-        f"🔧 <b>Или используйте команды:</b>\n"
-        f"/admin_add user_id_или_@username\n"
-        f"/admin_remove user_id_или_@username"
-    )
+            parts.append(f"{i}. ID: {admin_id} (не удалось получить информацию)\n")
+            continue
+        Storage.remember_admin_username(info.username, admin_id)
+        parts.append(f"{i}. {escape_cached(user_display_name(info))} (ID: {admin_id})\n")
+    
+    parts.append(ADMINS_MANAGEMENT_HINT_BLOCK)
+    admins_text = "".join(parts)
     
     await update.message.reply_text(
         admins_text,
         parse_mode=ParseMode.HTML
     )
 
+ADMIN_STATS_TEMPLATE = (
+    "📊 <b>Статистика администратора</b>\n\n"
+    "👥 <b>Пользователи:</b>\n"
+    "• Всего пользователей: {users}\n"
+    "• Администраторов: {admins}\n\n"
+    "📊 <b>Мониторинг:</b>\n"
+    "• Отслеживаемых чатов: {chats}\n"
+    "• Отслеживаемых каналов: {channels}\n"
+    "• Всего источников: {sources}\n\n"
+    "📝 <b>Посты:</b>\n"
+    "• На модерации: {pending}\n"
+    "• Одобрено: {approved}\n"
+    "• Отклонено: {rejected}\n"
+    "• Опубликовано: {published}\n\n"
+    "⚙️ <b>Настройки:</b>\n"
+    "• Автопубликация: {auto_publish}\n"
+    "• Требует одобрения: {approval}\n"
+    "• Порог важности: {threshold}\n"
+    "• Канал настроен: {channel_set}"
+)
+
 async def show_admin_statistics(update: Update, context: CallbackContext) -> None:
     """Show admin statistics."""
     config = Storage.bot_config
-    all_users = Storage.get_all_users()
-    pending_posts = Storage.get_pending_posts(PostStatus.PENDING)
-    approved_posts = Storage.get_pending_posts(PostStatus.APPROVED)
-    rejected_posts = Storage.get_pending_posts(PostStatus.REJECTED)
-    published_posts = Storage.get_pending_posts(PostStatus.PUBLISHED)
+    users_count = Storage.count_users()
+    posts_by_status = Storage.count_posts_by_status()
+    
+    # Счетчики источников поддерживаются Storage - перебирать пользователей не нужно
+    total_chats, total_channels = Storage.get_monitored_totals()
+    
+    # Повторное "Обновить" без изменений счетчиков не форматирует и не правит сообщение
+    stats_key = (
+        users_count, len(config.admin_ids), total_chats, total_channels,
+        tuple(posts_by_status[status] for status in PostStatus),
+        config.auto_publish_enabled, config.require_admin_approval,
+        config.importance_threshold, bool(config.publish_channel_id)
+    )
+    query = update.callback_query
+    if query and query.message:
+        rendered_key = (query.message.message_id, stats_key)
+        if context.chat_data.get("admin_stats_key") == rendered_key:
+            answer_query_in_background(query, "Актуально")
+            return
+    if query:
+        answer_query_in_background(query)
+    
+    stats_text = ADMIN_STATS_TEMPLATE.format(
+        users=users_count,
+        admins=len(config.admin_ids),
+        chats=total_chats,
+        channels=total_channels,
+        sources=total_chats + total_channels,
+        pending=posts_by_status[PostStatus.PENDING],
+        approved=posts_by_status[PostStatus.APPROVED],
+        rejected=posts_by_status[PostStatus.REJECTED],
+        published=posts_by_status[PostStatus.PUBLISHED],
+        auto_publish='Включена' if config.auto_publish_enabled else 'Отключена',
+        approval='Да' if config.require_admin_approval else 'Нет',
+        threshold=config.importance_threshold,
+        channel_set='Да' if config.publish_channel_id else 'Нет'
+    )
     
-    # Count monitored sources
-    total_chats = sum(len(user.monitored_chats) for user in all_users.values())
-    total_channels = sum(len(user.monitored_channels) for user in all_users.values())
+    # Вызывается и по кнопке, и из обычного сообщения
+    await respond(update, stats_text, ADMIN_STATS_KEYBOARD)
+    if query and query.message:
+        context.chat_data["admin_stats_key"] = rendered_key
+
+
+
+# ===========================================
+# TEXT MESSAGE HANDLERS
+# ===========================================
+
+# Ссылка или @username: начинается с "@" или "http" либо содержит "t.me/"
+CHANNEL_LINK_RE = re.compile(r"@|http|.*?t\.me/", re.DOTALL)
+# Числовой ID чата, в том числе отрицательный
+CHAT_ID_RE = re.compile(r"-?\d+")
+# Порог важности: целое или десятичное число, разделитель - точка или запятая
+THRESHOLD_RE = re.compile(r"\d+(?:[.,]\d*)?|[.,]\d+")
+
+# Предложения каналов от пользователей копятся несколько секунд и уходят администраторам одной сводкой,
+# чтобы поток предложений не превращался в поток сообщений каждому администратору
+SUGGESTION_DIGEST_DELAY = 2.0  # секунд
+SUGGESTION_DIGEST_LIMIT = 100
+pending_suggestions: deque = deque()  # (ID пользователя, текст, время)
+suggestion_digest_task: Optional[asyncio.Task] = None
+
+def queue_channel_suggestion(bot, user_id: int, text: str) -> None:
+    """Queue a channel suggestion for admins; a burst is sent as one digest."""
+    global suggestion_digest_task
+    if len(pending_suggestions) >= SUGGESTION_DIGEST_LIMIT:
+        dropped_user_id, dropped_text, _ = pending_suggestions.popleft()
+        logger.warning(f"Очередь предложений переполнена, отброшено предложение {dropped_text!r} от {dropped_user_id}")
+    pending_suggestions.append((user_id, text, datetime.now()))
+    
+    if suggestion_digest_task is None:
+        suggestion_digest_task = asyncio.create_task(send_suggestion_digest(bot))
+        background_tasks.add(suggestion_digest_task)
+        suggestion_digest_task.add_done_callback(background_tasks.discard)
+
+async def send_suggestion_digest(bot) -> None:
+    """Wait for the burst to settle, then send the collected suggestions to all admins."""
+    global suggestion_digest_task
+    await asyncio.sleep(SUGGESTION_DIGEST_DELAY)
+    # Новые предложения запустят следующую сводку
+    suggestion_digest_task = None
+    await deliver_suggestions(bot)
+
+async def flush_suggestion_digest(bot) -> None:
+    """Send queued suggestions right away instead of waiting for the digest delay."""
+    global suggestion_digest_task
+    if suggestion_digest_task is not None:
+        suggestion_digest_task.cancel()
+        suggestion_digest_task = None
+    if pending_suggestions:
+        await deliver_suggestions(bot)
+
+async def deliver_suggestions(bot) -> None:
+    """Send all queued suggestions to admins as one digest."""
+    entries = list(pending_suggestions)
+    pending_suggestions.clear()
+    
+    if len(entries) == 1:
+        user_id, text, suggested_at = entries[0]
+        parts = [
+            f"📢 <b>Предложение канала для мониторинга</b>\n\n"
+            f"👤 <b>От пользователя:</b> {user_id}\n"
+            f"📝 <b>Канал:</b> {escape_html(text)}\n"
+            f"📅 <b>Время:</b> {suggested_at.strftime('%d.%m.%Y %H:%M')}\n\n"
+        ]
+    else:
+        parts = [f"📢 <b>Предложения каналов для мониторинга ({len(entries)})</b>\n\n"]
+        parts.extend(
+            f"• {escape_html(text)} - от {user_id}, {suggested_at.strftime('%H:%M')}\n"
+            for user_id, text, suggested_at in entries
+        )
+        parts.append("\n")
+    parts.append("💡 <b>Для добавления канала в мониторинг используйте админ-панель.</b>")
     
-    stats_text = (
-        f"📊 <b>Статистика администратора</b>\n\n"
-        f"👥 <b>Пользователи:</b>\n"
-        f"• Всего пользователей: {len(all_users)}\n"
-        f"• Администраторов: {len(config.admin_ids)}\n\n"
-        f"📊 <b>Мониторинг:</b>\n"
-        f"• Отслеживаемых чатов: {total_chats}\n"
-        f"• Отслеживаемых каналов: {total_channels}\n"
-        f"• Всего источников: {total_chats + total_channels}\n\n"
-        f"📝 <b>Посты:</b>\n"
-        f"• На модерации: {len(pending_posts)}\n"
-        f"• Одобрено: {len(approved_posts)}\n"
-        f"• Отклонено: {len(rejected_posts)}\n"
-        f"• Опубликовано: {len(published_posts)}\n\n"
-        f"⚙️ <b>Настройки:</b>\n"
-        f"• Автопубликация: {'Включена' if config.auto_publish_enabled else 'Отключена'}\n"
-        f"• Требует одобрения: {'Да' if config.require_admin_approval else 'Нет'}\n"
-        f"• Порог важности: {config.importance_threshold}\n"
-        f"• Канал настроен: {'Да' if config.publish_channel_id else 'Нет'}"
-    )
+    for page in split_into_pages(parts):
+        await AdminService.send_to_admins(bot, Storage.bot_config.admin_ids, page)
+
+NO_ADMINS_FOR_SUGGESTION_TEXT = (
+    "❌ <b>Нет доступных администраторов</b>\n\n"
+    "К сожалению, в данный момент нет администраторов для рассмотрения вашего предложения."
+)
+REJECT_SUGGESTION_ROW = (InlineKeyboardButton("❌ Отклонить", callback_data="reject_channel_suggestion"),)
+REJECT_SUGGESTION_KEYBOARD = InlineKeyboardMarkup([REJECT_SUGGESTION_ROW])
+
+def is_channel_link(text: str) -> bool:
+    """Check whether text looks like a link or @username of a chat."""
+    return CHANNEL_LINK_RE.match(text) is not None
+
+def extract_username_from_link(link: str) -> str:
+    """Extract @username from a t.me link; a bare username gets the @ prefix."""
+    # Текст сообщения обрезан от пробелов в handle_text_messages
     
-    keyboard = [
-        [InlineKeyboardButton("🔄 Обновить", callback_data="admin_stats_refresh")]
-    ]
+    # Если уже username с @
+    if link.startswith('@'):
+        return link
+        
+    # Различные форматы ссылок t.me
+    if 't.me/' in link:
+        # Извлекаем часть после t.me/
+        username = link.split('t.me/')[-1]
+        # Убираем параметры после ?
+        username = username.split('?')[0]
+        # Убираем слеши в конце
+        username = username.rstrip('/')
+        return f"@{username}"
+    
+    # Если это просто username без @
+    if not link.startswith('http') and not CHAT_ID_RE.fullmatch(link):
+        return f"@{link}"
+        
+    return link
+
+def parse_threshold(text: str) -> Optional[float]:
+    """Parse an importance threshold between 0 and 1, or return None."""
+    if not THRESHOLD_RE.fullmatch(text):
+        return None
+    threshold = float(text.replace(',', '.', 1))
+    return threshold if 0 <= threshold <= 1 else None
+
+async def resolve_username(bot, username: str) -> Optional[int]:
+    """Получает ID пользователя по username; известных администраторов находит без запроса к API"""
+    admin_id = Storage.find_admin_by_username(username)
+    if admin_id is not None:
+        return admin_id
     
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    try:
+        chat = await bot.get_chat(f"@{username}")
+    except Exception:
+        return None
     
-    # Check if this is a callback query or regular message
-    if update.callback_query:
-        # Called from a callback query (button press)
-        await update.callback_query.edit_message_text(
-            stats_text,
-            reply_markup=reply_markup,
+    Storage.remember_admin_username(chat.username or username, chat.id)
+    return chat.id
+
+async def handle_source_link_text(update: Update, context: CallbackContext, text: str, user: UserPreferences) -> bool:
+    """Add a monitoring source from the link the user sent after pressing "add source"."""
+    set_user_state(user, None)
+    
+    # Обрабатываем ссылку или username
+    if is_channel_link(text):
+        # Используем функционал юзербота для присоединения
+        if USERBOT_ENABLED:
+            userbot = get_userbot()
+            if userbot.is_running:
+                try:
+                    chat_info = await userbot.join_chat(text)
+                    if chat_info:
+                        await update.message.reply_text(
+                            f"✅ <b>Источник добавлен в мониторинг!</b>\n\n"
+                            f"📌 <b>Название:</b> {escape_cached(chat_info['title'])}\n"
+                            f"🆔 <b>ID:</b> {chat_info['id']}\n\n"
+                            f"Теперь вы будете получать уведомления о важных сообщениях из этого источника.",
+                            parse_mode=ParseMode.HTML
+                        )
+                    else:
+                        await update.message.reply_text("❌ Не удалось добавить источник. Проверьте правильность ссылки.")
+                except Exception as e:
+                    await update.message.reply_text(f"❌ Ошибка при добавлении источника: {e}")
+            else:
+                await update.message.reply_text("❌ Система мониторинга не активна. Обратитесь к администратору.")
+        else:
+            await update.message.reply_text("❌ Функция мониторинга временно недоступна.")
+    else:
+        await update.message.reply_text(
+            "❌ <b>Неверный формат!</b>\n\n"
+            "Отправьте:\n"
+            "• @username канала\n"
+            "• Ссылку https://t.me/username\n"
+            "• Ссылку-приглашение",
             parse_mode=ParseMode.HTML
         )
+    return True
+
+async def handle_admin_management_text(update: Update, context: CallbackContext, text: str, user: UserPreferences) -> bool:
+    """Add or remove an admin by ID on the admin management screen."""
+    # +@username и прочие +слово и -слово разбирает общий каскад
+    if text[:1] in ('+', '-') and not text[1:].isdigit():
+        return False
+    
+    if text.startswith('+') and text[1:].isdigit():
+        admin_id = int(text[1:])
+        if admin_id not in Storage.bot_config.admin_ids:
+            await Storage.add_admin_async(admin_id)
+            
+            # Получаем информацию о добавленном пользователе
+            try:
+                info = await get_chat_cached(context.bot, admin_id)
+                Storage.remember_admin_username(info.username, admin_id)
+                display_name = user_display_name(info)
+                
+                await update.message.reply_text(f"✅ Пользователь {display_name} (ID: {admin_id}) добавлен в администраторы.")
+            except Exception:
+                await update.message.reply_text(f"✅ Пользователь {admin_id} добавлен в администраторы.")
+        else:
+            await update.message.reply_text(f"⚠️ Пользователь {admin_id} уже является администратором.")
+    elif text.startswith('-') and text[1:].isdigit():
+        admin_id = int(text[1:])
+        if admin_id == user.user_id:
+            await update.message.reply_text("❌ Нельзя удалить себя из администраторов.")
+        elif admin_id in Storage.bot_config.admin_ids:
+            await Storage.remove_admin_async(admin_id)
+            
+            # Получаем информацию об удаленном пользователе
+            try:
+                info = await get_chat_cached(context.bot, admin_id)
+                Storage.remember_admin_username(info.username, admin_id)
+                display_name = user_display_name(info)
+                
+                await update.message.reply_text(f"✅ Пользователь {display_name} (ID: {admin_id}) удален из администраторов.")
+            except Exception:
+                await update.message.reply_text(f"✅ Пользователь {admin_id} удален из администраторов.")
+        else:
+            await update.message.reply_text(f"❌ Пользователь {admin_id} не является администратором.")
     else:
-        # Called from a regular message
         await update.message.reply_text(
-            stats_text,
-            reply_markup=reply_markup,
+            "❌ Неверный формат. Используйте:\n"
+            "• <code>+123456789</code> - добавить админа\n"
+            "• <code>-123456789</code> - удалить админа",
             parse_mode=ParseMode.HTML
         )
+    return True
 
+async def handle_channel_setup_text(update: Update, context: CallbackContext, text: str, user: UserPreferences) -> bool:
+    """Take the publish channel from a link, @username or numeric ID."""
+    if not (is_channel_link(text) or CHAT_ID_RE.fullmatch(text)):
+        return False
+    await handle_channel_config_text(update, context, text)
+    return True
 
+async def handle_threshold_text(update: Update, context: CallbackContext, text: str, user: UserPreferences) -> bool:
+    """Set the global importance threshold from a number between 0 and 1."""
+    threshold = parse_threshold(text)
+    if threshold is None:
+        return False
+    
+    config = Storage.bot_config
+    config.importance_threshold = threshold
+    await Storage.update_config_async(config)
+    
+    # Сбрасываем состояние пользователя
+    set_user_state(user, None)
+    
+    await update.message.reply_text(
+        f"✅ <b>Глобальный порог важности установлен:</b> {threshold}\n\n"
+        f"💡 Теперь все пользователи будут получать уведомления о сообщениях с важностью выше {threshold}",
+        parse_mode=ParseMode.HTML
+    )
+    return True
 
-# ===========================================
-# TEXT MESSAGE HANDLERS
-# ===========================================
+# Состояние пользователя -> (обработчик, только для администраторов).
+# Обработчик возвращает False, если текст не относится к состоянию - тогда работает общий каскад
+TEXT_STATE_HANDLERS = {
+    "awaiting_source_link": (handle_source_link_text, False),
+    "admin_management": (handle_admin_management_text, True),
+    "channel_setup": (handle_channel_setup_text, True),
+    "admin_threshold_setup": (handle_threshold_text, True),
+}
 
 async def handle_text_messages(update: Update, context: CallbackContext) -> None:
     """Handle text messages for various inputs."""
     user_id = update.effective_user.id
     text = update.message.text.strip()
     user = Storage.get_user(user_id)  # Получаем пользователя в начале функции
+    is_admin = Storage.is_admin(user_id)
+    config = Storage.bot_config
     
     # Проверяем, не является ли это нажатием кнопки
     if await handle_reply_buttons(update, context):
         return
     
+    # Разбираем текст один раз для всех веток ниже
+    is_link = is_channel_link(text)
+    is_channel_ref = is_link or CHAT_ID_RE.fullmatch(text) is not None
+    state = user.current_state
+    
     # Обработка предложения канала
     if context.user_data.get('awaiting_channel_suggestion'):
         context.user_data.pop('awaiting_channel_suggestion', None)
         
+        if not config.admin_ids:
+            await update.message.reply_text(NO_ADMINS_FOR_SUGGESTION_TEXT, parse_mode=ParseMode.HTML)
+            return
+        
         # Отправляем предложение администраторам
-        config = Storage.bot_config
-        if config.admin_ids:
-            notification_text = (
-                f"📢 <b>Новое предложение канала</b>\n\n"
-                f"👤 <b>От пользователя:</b> {user_id}\n"
-                f"📅 <b>Время:</b> {datetime.now().strftime('%d.%m.%Y %H:%M')}\n"
-                f"📋 <b>Предложение:</b> {html.escape(text)}"
-            )
-            
-            # Создаем inline кнопки для быстрого добавления
-            keyboard = []
-            
-            # Проверяем формат предложения
-            if text.startswith('@') or 't.me/' in text or text.startswith('http'):
-                keyboard.append([
-                    InlineKeyboardButton("➕ Добавить в мониторинг", callback_data=f"add_suggested_channel_{text}")
-                ])
-            
-            keyboard.append([
-                InlineKeyboardButton("❌ Отклонить", callback_data="reject_channel_suggestion")
+        notification_text = (
+            f"📢 <b>Новое предложение канала</b>\n\n"
+            f"👤 <b>От пользователя:</b> {user_id}\n"
+            f"📅 <b>Время:</b> {datetime.now().strftime('%d.%m.%Y %H:%M')}\n"
+            f"📋 <b>Предложение:</b> {escape_html(text)}"
+        )
+        
+        # Кнопка быстрого добавления - только для ссылок и username
+        if is_link:
+            reply_markup = InlineKeyboardMarkup([
+                [InlineKeyboardButton("➕ Добавить в мониторинг", callback_data=f"add_suggested_channel_{remember_channel_suggestion(text)}")],
+                REJECT_SUGGESTION_ROW
             ])
-            
-            reply_markup = InlineKeyboardMarkup(keyboard) if keyboard else None
-            
-            for admin_id in config.admin_ids:
-                try:
-                    await context.bot.send_message(
-                        chat_id=admin_id,
-                        text=notification_text,
-                        parse_mode=ParseMode.HTML,
-                        reply_markup=reply_markup
-                    )
-                except Exception as e:
-                    logger.warning(f"Не удалось уведомить администратора {admin_id}: {e}")
-            
-            await update.message.reply_text(
-                "✅ <b>Ваше предложение отправлено администраторам!</b>\n\n"
-                "Они рассмотрят его в ближайшее время.",
-                parse_mode=ParseMode.HTML
-            )
         else:
-            await update.message.reply_text(
-                "❌ К сожалению, в данный момент нет администраторов для рассмотрения вашего предложения.",
-                parse_mode=ParseMode.HTML
-            )
-        return
-    
-    # Обработка добавления источника мониторинга
-    if user.current_state == "awaiting_source_link":
-        user.current_state = None
-        Storage.update_user(user)
+            reply_markup = REJECT_SUGGESTION_KEYBOARD
         
-        # Обрабатываем ссылку или username
-        if text.startswith('@') or 't.me/' in text or text.startswith('http'):
-            # Используем функционал юзербота для присоединения
-            if USERBOT_ENABLED:
-                userbot = get_userbot()
-                if userbot.is_running:
-                    try:
-                        chat_info = await userbot.join_chat(text)
-                        if chat_info:
-                            await update.message.reply_text(
-                                f"✅ <b>Источник добавлен в мониторинг!</b>\n\n"
-                                f"📌 <b>Название:</b> {html.escape(chat_info['title'])}\n"
-                                f"🆔 <b>ID:</b> {chat_info['id']}\n\n"
-                                f"Теперь вы будете получать уведомления о важных сообщениях из этого источника.",
-                                parse_mode=ParseMode.HTML
-                            )
-                        else:
-                            await update.message.reply_text(
-                                "❌ Не удалось добавить источник. Проверьте правильность ссылки.",
-                                parse_mode=ParseMode.HTML
-                            )
-                    except Exception as e:
-                        await update.message.reply_text(
-                            f"❌ Ошибка при добавлении источника: {str(e)}",
-                            parse_mode=ParseMode.HTML
-                        )
-                else:
-                    await update.message.reply_text(
-                        "❌ Система мониторинга не активна. Обратитесь к администратору.",
-                        parse_mode=ParseMode.HTML
-                    )
-            else:
-                await update.message.reply_text(
-                    "❌ Функция мониторинга временно недоступна.",
-                    parse_mode=ParseMode.HTML
-                )
-        else:
-            await update.message.reply_text(
-                "❌ <b>Неверный формат!</b>\n\n"
-                "Отправьте:\n"
-                "• @username канала\n"
-                "• Ссылку https://t.me/username\n"
-                "• Ссылку-приглашение",
-                parse_mode=ParseMode.HTML
-            )
-        return
-    
-    # Handle keyword additions
-    if text.startswith('+') and len(text) > 1:
-        if Storage.is_admin(user_id):
-            keyword = text[1:].strip().lower()
-            if keyword not in user.keywords:
-                user.keywords.append(keyword)
-                Storage.update_user(user)
-                await update.message.reply_text(f"✅ Добавлено важное слово: <b>{html.escape(keyword)}</b>", parse_mode=ParseMode.HTML)
-            else:
-                await update.message.reply_text(f"⚠️ Слово '<b>{html.escape(keyword)}</b>' уже есть в списке важных.", parse_mode=ParseMode.HTML)
-        else:
-            await update.message.reply_text("❌ Эта функция доступна только администраторам.")
+        await AdminService.send_to_admins(context.bot, config.admin_ids, notification_text, reply_markup=reply_markup)
+        
+        await update.message.reply_text(
+            "✅ <b>Ваше предложение отправлено администраторам!</b>\n\n"
+            "Они рассмотрят его в ближайшее время.",
+            parse_mode=ParseMode.HTML
+        )
         return
     
-    # Handle keyword exclusions
-    elif text.startswith('-') and len(text) > 1 and not text[1:].isdigit():
-        if Storage.is_admin(user_id):
-            keyword = text[1:].strip().lower()
-            if keyword not in user.exclude_keywords:
-                user.exclude_keywords.append(keyword)
-                Storage.update_user(user)
-                await update.message.reply_text(f"✅ Добавлено исключаемое слово: <b>{html.escape(keyword)}</b>", parse_mode=ParseMode.HTML)
-            else:
-                await update.message.reply_text(f"⚠️ Слово '<b>{html.escape(keyword)}</b>' уже есть в списке исключаемых.", parse_mode=ParseMode.HTML)
-        else:
-            await update.message.reply_text("❌ Эта функция доступна только администраторам.")
+    # Сообщения внутри диалога сразу уходят обработчику своего состояния
+    handler, admin_only = TEXT_STATE_HANDLERS.get(state, (None, False))
+    if handler and (is_admin or not admin_only) and await handler(update, context, text, user):
         return
     
     # Handle admin addition (for admins only)
-    elif text.startswith('+') and (text[1:].isdigit() or text[1:].startswith('@')):
-        if Storage.is_admin(user_id):
+    # +ID и +@username проверяются раньше ключевых слов, иначе их перехватит ветка "+слово"
+    if text.startswith('+') and (text[1:].isdigit() or text[1:].startswith('@')):
+        if is_admin:
             if text[1:].isdigit():
                 admin_id = int(text[1:])
             else:
                 # Обработка юзернейма
                 username = text[1:].lstrip('@')
-                try:
-                    # Пытаемся получить пользователя по юзернейму
-                    chat = await context.bot.get_chat(f"@{username}")
-                    admin_id = chat.id
-                except Exception as e:
+                admin_id = await resolve_username(context.bot, username)
+                if admin_id is None:
                     await update.message.reply_text(f"❌ Не удалось найти пользователя @{username}")
                     return
             
-            if admin_id not in Storage.bot_config.admin_ids:
-                Storage.add_admin(admin_id)
+            if admin_id not in config.admin_ids:
+                await Storage.add_admin_async(admin_id)
                 
                 # Получаем информацию о добавленном пользователе
                 try:
-                    chat_member = await context.bot.get_chat(admin_id)
-                    username = chat_member.username
-                    first_name = chat_member.first_name
-                    last_name = chat_member.last_name
-                    
-                    if username:
-                        display_name = f"@{username}"
-                    elif first_name:
-                        display_name = f"{first_name}"
-                        if last_name:
-                            display_name += f" {last_name}"
-                    else:
-                        display_name = "Неизвестный пользователь"
+                    info = await get_chat_cached(context.bot, admin_id)
+                    Storage.remember_admin_username(info.username, admin_id)
+                    display_name = user_display_name(info)
                     
                     await update.message.reply_text(f"✅ Пользователь {display_name} (ID: {admin_id}) добавлен в администраторы.")
                 except Exception:
@@ -1074,38 +1529,25 @@ async def handle_text_messages(update: Update, context: CallbackContext) -> None
     
     # Handle admin removal (for admins only)
     elif text.startswith('-') and (text[1:].isdigit() or text[1:].startswith('@')):
-        if Storage.is_admin(user_id):
+        if is_admin:
             if text[1:].isdigit():
                 admin_id = int(text[1:])
             else:
                 # Обработка юзернейма
                 username = text[1:].lstrip('@')
-                try:
-                    # Пытаемся получить пользователя по юзернейму
-                    chat = await context.bot.get_chat(f"@{username}")
-                    admin_id = chat.id
-                except Exception as e:
+                admin_id = await resolve_username(context.bot, username)
+                if admin_id is None:
                     await update.message.reply_text(f"❌ Не удалось найти пользователя @{username}")
                     return
             
-            if admin_id in Storage.bot_config.admin_ids:
-                Storage.remove_admin(admin_id)
+            if admin_id in config.admin_ids:
+                await Storage.remove_admin_async(admin_id)
                 
                 # Получаем информацию об удаленном пользователе
                 try:
-                    chat_member = await context.bot.get_chat(admin_id)
-                    username = chat_member.username
-                    first_name = chat_member.first_name
-                    last_name = chat_member.last_name
-                    
-                    if username:
-                        display_name = f"@{username}"
-                    elif first_name:
-                        display_name = f"{first_name}"
-                        if last_name:
-                            display_name += f" {last_name}"
-                    else:
-                        display_name = "Неизвестный пользователь"
+                    info = await get_chat_cached(context.bot, admin_id)
+                    Storage.remember_admin_username(info.username, admin_id)
+                    display_name = user_display_name(info)
                     
                     await update.message.reply_text(f"✅ Пользователь {display_name} (ID: {admin_id}) удален из администраторов.")
                 except Exception:
@@ -1116,154 +1558,52 @@ async def handle_text_messages(update: Update, context: CallbackContext) -> None
             await update.message.reply_text("❌ У вас нет прав для удаления администраторов.")
         return
     
-    # Handle admin management in admin interface
-    elif Storage.is_admin(user_id) and user.current_state == "admin_management":
-        if text.startswith('+') and text[1:].isdigit():
-            admin_id = int(text[1:])
-            if admin_id not in Storage.bot_config.admin_ids:
-                Storage.add_admin(admin_id)
-                
-                # Получаем информацию о добавленном пользователе
-                try:
-                    chat_member = await context.bot.get_chat(admin_id)
-                    username = chat_member.username
-                    first_name = chat_member.first_name
-                    last_name = chat_member.last_name
-                    
-                    if username:
-                        display_name = f"@{username}"
-                    elif first_name:
-                        display_name = f"{first_name}"
-                        if last_name:
-                            display_name += f" {last_name}"
-                    else:
-                        display_name = "Неизвестный пользователь"
-                    
-                    await update.message.reply_text(f"✅ Пользователь {display_name} (ID: {admin_id}) добавлен в администраторы.")
-                except Exception:
-                    await update.message.reply_text(f"✅ Пользователь {admin_id} добавлен в администраторы.")
-            else:
-                await update.message.reply_text(f"⚠️ Пользователь {admin_id} уже является администратором.")
-        elif text.startswith('-') and text[1:].isdigit():
-            admin_id = int(text[1:])
-            if admin_id == user_id:
-                await update.message.reply_text("❌ Нельзя удалить себя из администраторов.")
-            elif admin_id in Storage.bot_config.admin_ids:
-                Storage.remove_admin(admin_id)
-                
-                # Получаем информацию об удаленном пользователе
-                try:
-                    chat_member = await context.bot.get_chat(admin_id)
-                    username = chat_member.username
-                    first_name = chat_member.first_name
-                    last_name = chat_member.last_name
-                    
-                    if username:
-                        display_name = f"@{username}"
-                    elif first_name:
-                        display_name = f"{first_name}"
-                        if last_name:
-                            display_name += f" {last_name}"
-                    else:
-                        display_name = "Неизвестный пользователь"
-                    
-                    await update.message.reply_text(f"✅ Пользователь {display_name} (ID: {admin_id}) удален из администраторов.")
-                except Exception:
-                    await update.message.reply_text(f"✅ Пользователь {admin_id} удален из администраторов.")
+    # Handle keyword additions
+    elif text.startswith('+') and len(text) > 1:
+        if is_admin:
+            keyword = text[1:].strip().lower()
+            if keyword not in user.keywords:
+                user.keywords.append(keyword)
+                Storage.update_user_debounced(user)
+                await update.message.reply_text(f"✅ Добавлено важное слово: <b>{escape_html(keyword)}</b>", parse_mode=ParseMode.HTML)
             else:
-                await update.message.reply_text(f"❌ Пользователь {admin_id} не является администратором.")
+                await update.message.reply_text(f"⚠️ Слово '<b>{escape_html(keyword)}</b>' уже есть в списке важных.", parse_mode=ParseMode.HTML)
         else:
-            await update.message.reply_text(
-                "❌ Неверный формат. Используйте:\n"
-                "• <code>+123456789</code> - добавить админа\n"
-                "• <code>-123456789</code> - удалить админа",
-                parse_mode=ParseMode.HTML
-            )
+            await update.message.reply_text("❌ Эта функция доступна только администраторам.")
         return
     
-    # Handle channel configuration for admins (highest priority for admins)
-    if Storage.is_admin(user_id) and user.current_state == "channel_setup" and (
-        text.startswith('@') or 
-        text.lstrip('-').isdigit() or 
-        't.me/' in text or
-        text.startswith('http')
-    ):
-        await handle_channel_config_text(update, context, text)
+    # Handle keyword exclusions
+    elif text.startswith('-') and len(text) > 1:
+        if is_admin:
+            keyword = text[1:].strip().lower()
+            if keyword not in user.exclude_keywords:
+                user.exclude_keywords.append(keyword)
+                Storage.update_user_debounced(user)
+                await update.message.reply_text(f"✅ Добавлено исключаемое слово: <b>{escape_html(keyword)}</b>", parse_mode=ParseMode.HTML)
+            else:
+                await update.message.reply_text(f"⚠️ Слово '<b>{escape_html(keyword)}</b>' уже есть в списке исключаемых.", parse_mode=ParseMode.HTML)
+        else:
+            await update.message.reply_text("❌ Эта функция доступна только администраторам.")
         return
     
-    # Handle admin threshold setup
-    if Storage.is_admin(user_id) and user.current_state == "admin_threshold_setup" and text.replace('.', '').isdigit() and 0 <= float(text) <= 1:
-        threshold = float(text)
-        config = Storage.bot_config
-        config.importance_threshold = threshold
-        Storage.update_config(config)
+    # Handle channel suggestions from regular users
+    elif not is_admin and is_channel_ref:
+        if not config.admin_ids:
+            await update.message.reply_text(NO_ADMINS_FOR_SUGGESTION_TEXT, parse_mode=ParseMode.HTML)
+            return
         
-        # Сбрасываем состояние пользователя
-        user.current_state = None
-        Storage.update_user(user)
+        # Уведомляем администраторов о предложении канала (сводкой, без ожидания отправки)
+        queue_channel_suggestion(context.bot, user_id, text)
         
         await update.message.reply_text(
-            f"✅ <b>Глобальный порог важности установлен:</b> {threshold}\n\n"
-            f"💡 Теперь все пользователи будут получать уведомления о сообщениях с важностью выше {threshold}",
+            "✅ <b>Предложение канала отправлено администраторам!</b>\n\n"
+            "💡 Мы рассмотрим ваше предложение и добавим канал в мониторинг, если он подходит.",
             parse_mode=ParseMode.HTML
         )
         return
     
-
-    
-
-    
-    # Handle channel suggestions from regular users
-    elif not Storage.is_admin(user_id) and (
-        text.startswith('@') or 
-        text.lstrip('-').isdigit() or 
-        't.me/' in text or
-        text.startswith('http')
-    ):
-        # Уведомляем администраторов о предложении канала
-        admin_ids = Storage.bot_config.admin_ids
-        if admin_ids:
-            suggestion_text = (
-                f"📢 <b>Предложение канала для мониторинга</b>\n\n"
-                f"👤 <b>От пользователя:</b> {user_id}\n"
-                f"📝 <b>Канал:</b> {html.escape(text)}\n"
-                f"📅 <b>Время:</b> {datetime.now().strftime('%d.%m.%Y %H:%M')}\n\n"
-                f"💡 <b>Для добавления канала в мониторинг используйте админ-панель.</b>"
-            )
-            
-            for admin_id in admin_ids:
-                try:
-                    await context.bot.send_message(
-                        chat_id=admin_id,
-                        text=suggestion_text,
-                        parse_mode=ParseMode.HTML
-                    )
-                except Exception as e:
-                    logger.error(f"Не удалось отправить уведомление админу {admin_id}: {e}")
-            
-            await update.message.reply_text(
-                "✅ <b>Предложение канала отправлено администраторам!</b>\n\n"
-                "💡 Мы рассмотрим ваше предложение и добавим канал в мониторинг, если он подходит.",
-                parse_mode=ParseMode.HTML
-            )
-        else:
-            await update.message.reply_text(
-                "❌ <b>Нет доступных администраторов</b>\n\n"
-                "К сожалению, в данный момент нет администраторов для рассмотрения вашего предложения.",
-                parse_mode=ParseMode.HTML
-            )
-        return
-    
     # If nothing matched and it's not a button text, treat as post submission
-    # Check if text is not a known button
-    known_buttons = [
-        "📝 Предложить пост", "📢 Предложить канал", "ℹ️ Справка",
-        "📝 Модерация постов", "📢 Канал публикации", "👥 Администраторы",
-        "📊 Мониторинг", "🤖 Userbot", "⚙️ Настройки", "📈 Статистика",
-        "🔑 Ключевые слова", "🚀 Запустить", "🛑 Остановить", "🔙 Главное меню"
-    ]
-    
-    if text not in known_buttons and len(text) > 10 and not text.startswith('/'):
+    if text not in KNOWN_BUTTONS and len(text) > 10 and not text.startswith('/'):
         await handle_post_submission_text(update, context, text)
         return
 
@@ -1272,46 +1612,26 @@ async def handle_channel_config_text(update: Update, context: CallbackContext, t
     config = Storage.bot_config
     user_id = update.effective_user.id
     
-    # Сбрасываем состояние пользователя
+    # Сбрасываем состояние пользователя (запись только если оно было задано)
     user = Storage.get_user(user_id)
-    user.current_state = None
-    Storage.update_user(user)
-    
-    # Helper function to extract username from link
-    def extract_username_from_link(link: str) -> str:
-        link = link.strip()
-        
-        # Если уже username с @
-        if link.startswith('@'):
-            return link
-            
-        # Различные форматы ссылок t.me
-        if 't.me/' in link:
-            # Извлекаем часть после t.me/
-            username = link.split('t.me/')[-1]
-            # Убираем параметры после ?
-            username = username.split('?')[0]
-            # Убираем слеши в конце
-            username = username.rstrip('/')
-            return f"@{username}"
-        
-        # Если это просто username без @
-        if not link.startswith('@') and not link.startswith('http') and not link.lstrip('-').isdigit():
-            return f"@{link}"
-            
-        return link
+    set_user_state(user, None)
     
     async def check_bot_permissions(chat_id):
         """Проверяет права бота в канале"""
+        # Недавно подтвержденные права берем из кэша; отказ не кэшируем -
+        # администратор мог только что выдать боту права и повторить ввод
+        cached = admin_channel_cache.get(chat_id)
+        if cached and cached[1] is not None and time.monotonic() - cached[0] < ADMIN_CACHE_TTL:
+            return True
         try:
-            bot_info = await context.bot.get_me()
-            member = await context.bot.get_chat_member(chat_id, bot_info.id)
-            return member.status in ['administrator', 'creator']
+            # ID бота известен после инициализации - get_me не нужен
+            member = await context.bot.get_chat_member(chat_id, context.bot.id)
+            return member.status in ADMIN_STATUSES
         except Exception:
             return False
     
     # Process different formats
-    if text.startswith('@') or 't.me/' in text or text.startswith('http'):
+    if is_channel_link(text):
         # Username or link format
         if 't.me/' in text or text.startswith('http'):
             username = extract_username_from_link(text)
@@ -1320,7 +1640,7 @@ async def handle_channel_config_text(update: Update, context: CallbackContext, t
             
         try:
             # Try to get channel info to validate and get ID
-            chat = await context.bot.get_chat(username)
+            chat = await get_chat_cached(context.bot, username)
             
             # Проверяем права бота
             has_permissions = await check_bot_permissions(chat.id)
@@ -1328,7 +1648,7 @@ async def handle_channel_config_text(update: Update, context: CallbackContext, t
             if not has_permissions:
                 await update.message.reply_text(
                     f"⚠️ <b>Внимание!</b> Бот не является администратором в канале.\n\n"
-                    f"📝 <b>Название:</b> {html.escape(chat.title)}\n"
+                    f"📝 <b>Название:</b> {escape_cached(chat.title)}\n"
                     f"📋 <b>ID:</b> {chat.id}\n\n"
                     f"🔧 <b>Для публикации постов добавьте бота как администратора с правами:</b>\n"
                     f"• Отправка сообщений\n"
@@ -1346,14 +1666,15 @@ async def handle_channel_config_text(update: Update, context: CallbackContext, t
             
             # Сохраняем конфигурацию
             config.publish_channel_id = chat.id
+            invalidate_admin_channel_cache(chat.id)
             config.publish_channel_username = chat.username
-            Storage.update_config(config)
+            await Storage.update_config_async(config)
             
             await update.message.reply_text(
                 f"✅ <b>Канал публикации настроен успешно!</b>\n\n"
-                f"📝 <b>Название:</b> {html.escape(chat.title)}\n"
+                f"📝 <b>Название:</b> {escape_cached(chat.title)}\n"
                 f"📋 <b>ID:</b> {chat.id}\n"
-                f"🏷️ <b>Username:</b> @{html.escape(chat.username or 'отсутствует')}\n"
+                f"🏷️ <b>Username:</b> @{chat.username or 'отсутствует'}\n"
                 f"👤 <b>Участников:</b> {getattr(chat, 'member_count', 'неизвестно')}\n\n"
                 f"🤖 <b>Бот имеет права администратора</b> ✅\n"
                 f"🚀 <b>Готов к публикации постов!</b>",
@@ -1365,7 +1686,7 @@ async def handle_channel_config_text(update: Update, context: CallbackContext, t
             if "chat not found" in error_msg:
                 await update.message.reply_text(
                     f"❌ <b>Канал не найден</b>\n\n"
-                    f"🔗 <b>Проверьте:</b> {html.escape(text)}\n\n"
+                    f"🔗 <b>Проверьте:</b> {escape_html(text)}\n\n"
                     f"💡 <b>Возможные причины:</b>\n"
                     f"• Неправильная ссылка или username\n"
                     f"• Канал приватный и бот не добавлен\n"
@@ -1375,7 +1696,7 @@ async def handle_channel_config_text(update: Update, context: CallbackContext, t
             elif "forbidden" in error_msg:
                 await update.message.reply_text(
                     f"❌ <b>Нет доступа к каналу</b>\n\n"
-                    f"🔗 <b>Канал:</b> {html.escape(text)}\n\n"
+                    f"🔗 <b>Канал:</b> {escape_html(text)}\n\n"
                     f"🔧 <b>Решение:</b>\n"
                     f"1. Добавьте бота в канал как администратора\n"
                     f"2. Дайте права на отправку сообщений\n"
@@ -1385,8 +1706,8 @@ async def handle_channel_config_text(update: Update, context: CallbackContext, t
             else:
                 await update.message.reply_text(
                     f"❌ <b>Ошибка настройки канала</b>\n\n"
-                    f"🔗 <b>Ввод:</b> {html.escape(text)}\n"
-                    f"📋 <b>Ошибка:</b> {html.escape(str(e))}\n\n"
+                    f"🔗 <b>Ввод:</b> {escape_html(text)}\n"
+                    f"📋 <b>Ошибка:</b> {escape_html(str(e))}\n\n"
                     f"💡 <b>Попробуйте:</b>\n"
                     f"• Проверить правильность ссылки\n"
                     f"• Убедиться что бот добавлен в канал\n"
@@ -1394,29 +1715,30 @@ async def handle_channel_config_text(update: Update, context: CallbackContext, t
                     parse_mode=ParseMode.HTML
                 )
     
-    elif text.lstrip('-').isdigit():
+    elif CHAT_ID_RE.fullmatch(text):
         # ID format
         channel_id = int(text)
         
         try:
             # Try to get channel info
-            chat = await context.bot.get_chat(channel_id)
+            chat = await get_chat_cached(context.bot, channel_id)
             
             # Проверяем права бота
             has_permissions = await check_bot_permissions(channel_id)
             
             config.publish_channel_id = channel_id
+            invalidate_admin_channel_cache(channel_id)
             if chat.username:
                 config.publish_channel_username = chat.username
-            Storage.update_config(config)
+            await Storage.update_config_async(config)
             
             permission_status = "✅ Бот имеет права администратора" if has_permissions else "⚠️ Бот НЕ является администратором"
             
             await update.message.reply_text(
                 f"✅ <b>Канал настроен успешно!</b>\n\n"
-                f"�� <b>Название:</b> {html.escape(chat.title)}\n"
+                f"�� <b>Название:</b> {escape_cached(chat.title)}\n"
                 f"📋 <b>ID:</b> {channel_id}\n"
-                f"🏷️ <b>Username:</b> @{html.escape(chat.username or 'отсутствует')}\n\n"
+                f"🏷️ <b>Username:</b> @{chat.username or 'отсутствует'}\n\n"
                 f"🤖 <b>Статус бота:</b> {permission_status}\n\n"
                 f"{'🚀 Готов к публикации!' if has_permissions else '🔧 Добавьте бота как администратора для публикации'}",
                 parse_mode=ParseMode.HTML
@@ -1425,11 +1747,12 @@ async def handle_channel_config_text(update: Update, context: CallbackContext, t
         except Exception as e:
             # Save ID even if we can't get info
             config.publish_channel_id = channel_id
-            Storage.update_config(config)
+            invalidate_admin_channel_cache(channel_id)
+            await Storage.update_config_async(config)
             await update.message.reply_text(
                 f"⚠️ <b>Канал настроен</b>, но не удалось получить полную информацию\n\n"
                 f"📋 <b>ID канала:</b> {channel_id}\n"
-                f"📋 <b>Ошибка:</b> {html.escape(str(e))}\n\n"
+                f"📋 <b>Ошибка:</b> {escape_html(str(e))}\n\n"
                 f"💡 <b>Убедитесь что:</b>\n"
                 f"• Бот добавлен в канал как администратор\n"
                 f"• ID канала правильный\n"
@@ -1444,7 +1767,7 @@ async def handle_channel_config_text(update: Update, context: CallbackContext, t
             f"• Username: <code>@my_channel</code>\n"
             f"• Полная ссылка: <code>https://t.me/my_channel</code>\n"
             f"• Короткая ссылка: <code>t.me/my_channel</code>\n\n"
-            f"🔗 <b>Ваш ввод:</b> {html.escape(text)}",
+            f"🔗 <b>Ваш ввод:</b> {escape_html(text)}",
             parse_mode=ParseMode.HTML
         )
 
@@ -1455,14 +1778,7 @@ async def handle_post_submission_text(update: Update, context: CallbackContext,
     user_id = update.effective_user.id
     
     # Show confirmation
-    keyboard = [
-        [
-            InlineKeyboardButton("✅ Да, отправить на модерацию", callback_data=f"confirm_submit_text"),
-            InlineKeyboardButton("❌ Отмена", callback_data="cancel_submit")
-        ]
-    ]
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = SUBMIT_TEXT_CONFIRM_KEYBOARD
     
     # Store the text for later use
     context.user_data['pending_post_text'] = text
@@ -1487,7 +1803,10 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
     if not query:
         return
         
-    await query.answer()
+    # Ответ на callback идет параллельно с чтением данных и дальнейшей обработкой.
+    # Обновление статистики отвечает само: текст ответа зависит от того, изменились ли данные
+    if query.data != "admin_stats_refresh":
+        answer_query_in_background(query)
     
     data = query.data
     if not data:
@@ -1495,10 +1814,12 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
         
     user_id = update.effective_user.id
     user = Storage.get_user(user_id)
+    is_admin = Storage.is_admin(user_id)
     
     # Monitoring callbacks
     if data == "monitoring_add":
-        await query.edit_message_text(
+        await edit_query_message(
+            query,
             "➕ <b>Добавление источника мониторинга</b>\n\n"
             "📌 <b>Способы добавления:</b>\n\n"
             "1️⃣ <b>Отправьте ссылку на канал:</b>\n"
@@ -1514,8 +1835,7 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
             parse_mode=ParseMode.HTML
         )
         # Устанавливаем состояние ожидания ссылки
-        user.current_state = "awaiting_source_link"
-        Storage.update_user(user)
+        set_user_state(user, "awaiting_source_link")
     
     elif data == "monitoring_list":
         await show_monitoring_list(query, context, user)
@@ -1524,15 +1844,10 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
         await show_monitoring_remove(query, context, user)
     
     elif data == "monitoring_clear":
-        keyboard = [
-            [
-                InlineKeyboardButton("✅ Да, очистить", callback_data="confirm_clear_monitoring"),
-                InlineKeyboardButton("❌ Отмена", callback_data="cancel_clear")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = CLEAR_MONITORING_CONFIRM_KEYBOARD
         
-        await query.edit_message_text(
+        await edit_query_message(
+            query,
             "⚠️ <b>Очистить все источники мониторинга?</b>\n\n"
             "Это действие нельзя отменить.",
             reply_markup=reply_markup,
@@ -1544,15 +1859,10 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
         await show_keywords_interface(update, context, user)
     
     elif data == "settings_clear":
-        keyboard = [
-            [
-                InlineKeyboardButton("✅ Да, очистить", callback_data="confirm_clear_data"),
-                InlineKeyboardButton("❌ Отмена", callback_data="cancel_clear")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = CLEAR_DATA_CONFIRM_KEYBOARD
         
-        await query.edit_message_text(
+        await edit_query_message(
+            query,
             "⚠️ <b>Очистить все ваши данные?</b>\n\n"
             "Будут удалены:\n"
             "• Все источники мониторинга\n"
@@ -1565,7 +1875,8 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
     
     # Keywords callbacks
     elif data == "keywords_add_important":
-        await query.edit_message_text(
+        await edit_query_message(
+            query,
             "➕ <b>Добавление важного слова</b>\n\n"
             "💡 <b>Отправьте слово или фразу</b>\n"
             "Или используйте формат: <code>+слово</code>\n\n"
@@ -1577,7 +1888,8 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
         )
     
     elif data == "keywords_add_exclude":
-        await query.edit_message_text(
+        await edit_query_message(
+            query,
             "➖ <b>Добавление исключаемого слова</b>\n\n"
             "💡 <b>Отправьте слово или фразу</b>\n"
             "Или используйте формат: <code>-слово</code>\n\n"
@@ -1588,20 +1900,14 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
             parse_mode=ParseMode.HTML
         )
     
-    elif data.startswith("keywords_remove_"):
-        keyword_type = data.replace("keywords_remove_", "")
+    elif (keyword_type := data.removeprefix("keywords_remove_")) != data:
         await show_keywords_remove(query, context, user, keyword_type)
     
     elif data == "keywords_clear_all":
-        keyboard = [
-            [
-                InlineKeyboardButton("✅ Да, очистить", callback_data="confirm_clear_keywords"),
-                InlineKeyboardButton("❌ Отмена", callback_data="cancel_clear")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = CLEAR_KEYWORDS_CONFIRM_KEYBOARD
         
-        await query.edit_message_text(
+        await edit_query_message(
+            query,
             "⚠️ <b>Очистить все ключевые слова?</b>\n\n"
             "Будут удалены все важные и исключаемые слова.",
             reply_markup=reply_markup,
@@ -1610,13 +1916,12 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
     
     # Admin callbacks
     elif data == "admin_threshold":
-        if Storage.is_admin(user_id):
+        if is_admin:
             # Устанавливаем состояние для администратора
-            user = Storage.get_user(user_id)
-            user.current_state = "admin_threshold_setup"
-            Storage.update_user(user)
+            set_user_state(user, "admin_threshold_setup")
             
-            await query.edit_message_text(
+            await edit_query_message(
+                query,
                 "📊 <b>Изменение глобального порога важности</b>\n\n"
                 f"Текущий порог: <b>{Storage.bot_config.importance_threshold}</b>\n\n"
                 "💡 <b>Отправьте новое значение от 0.0 до 1.0</b>\n"
@@ -1628,15 +1933,16 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
                 parse_mode=ParseMode.HTML
             )
         else:
-            await query.edit_message_text("❌ У вас нет прав администратора.")
+            await edit_query_message(query, "❌ У вас нет прав администратора.")
     
     elif data == "admin_toggle_autopublish":
-        if Storage.is_admin(user_id):
+        if is_admin:
             config = Storage.bot_config
             config.auto_publish_enabled = not config.auto_publish_enabled
-            Storage.update_config(config)
+            await Storage.update_config_async(config)
             
-            await query.edit_message_text(
+            await edit_query_message(
+                query,
                 f"✅ <b>Настройка изменена</b>\n\n"
                 f"🤖 Автопубликация: {'Включена' if config.auto_publish_enabled else 'Отключена'}\n\n"
                 f"💡 {'Важные сообщения будут публиковаться автоматически' if config.auto_publish_enabled else 'Все посты требуют ручной модерации'}",
@@ -1644,21 +1950,21 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
             )
     
     elif data == "admin_toggle_approval":
-        if Storage.is_admin(user_id):
+        if is_admin:
             config = Storage.bot_config
             config.require_admin_approval = not config.require_admin_approval
-            Storage.update_config(config)
+            await Storage.update_config_async(config)
             
-            await query.edit_message_text(
+            await edit_query_message(
+                query,
                 f"✅ <b>Настройка изменена</b>\n\n"
                 f"✋ Требует одобрения админа: {'Да' if config.require_admin_approval else 'Нет'}\n\n"
                 f"💡 {'Все посты проходят модерацию' if config.require_admin_approval else 'Посты с высокой оценкой публикуются автоматически'}",
                 parse_mode=ParseMode.HTML
             )
     
-    elif data.startswith("admin_approve_"):
-        if Storage.is_admin(user_id):
-            post_id = data.replace("admin_approve_", "")
+    elif (post_id := data.removeprefix("admin_approve_")) != data:
+        if is_admin:
             success = await AdminService.approve_post(context.bot, post_id, user_id)
             
             if success:
@@ -1667,7 +1973,8 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
                 
                 if pending_posts:
                     # Показываем следующий пост
-                    await query.edit_message_text(
+                    await edit_query_message(
+                        query,
                         f"✅ Пост {post_id} одобрен и опубликован!\n\n"
                         f"📝 Осталось постов на модерации: {len(pending_posts)}",
                         parse_mode=ParseMode.HTML
@@ -1676,21 +1983,21 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
                     # Автоматически показываем следующий пост через 2 секунды
                     await asyncio.sleep(2)
                     
-                    # Эмулируем нажатие кнопки "Следующий"
-                    query.data = "admin_next_post"
-                    await callback_handler(update, context)
+                    # За время паузы другой администратор мог обработать посты - берем очередь заново.
+                    # Обработанный пост уже не в очереди - следующий стоит первым
+                    await show_next_pending_post(query, context, AdminService.get_posts_for_review(), position=0)
                 else:
-                    await query.edit_message_text(
+                    await edit_query_message(
+                        query,
                         f"✅ Пост {post_id} одобрен и опубликован!\n\n"
                         f"✅ Все посты обработаны!",
                         parse_mode=ParseMode.HTML
                     )
             else:
-                await query.edit_message_text(f"❌ Ошибка при одобрении поста {post_id}.")
+                await edit_query_message(query, f"❌ Ошибка при одобрении поста {post_id}.")
     
-    elif data.startswith("admin_reject_"):
-        if Storage.is_admin(user_id):
-            post_id = data.replace("admin_reject_", "")
+    elif (post_id := data.removeprefix("admin_reject_")) != data:
+        if is_admin:
             success = await AdminService.reject_post(context.bot, post_id, user_id, "Отклонен администратором")
             
             if success:
@@ -1699,7 +2006,8 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
                 
                 if pending_posts:
                     # Показываем следующий пост
-                    await query.edit_message_text(
+                    await edit_query_message(
+                        query,
                         f"❌ Пост {post_id} отклонен.\n\n"
                         f"📝 Осталось постов на модерации: {len(pending_posts)}",
                         parse_mode=ParseMode.HTML
@@ -1708,21 +2016,21 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
                     # Автоматически показываем следующий пост через 2 секунды
                     await asyncio.sleep(2)
                     
-                    # Эмулируем нажатие кнопки "Следующий"
-                    query.data = "admin_next_post"
-                    await callback_handler(update, context)
+                    # За время паузы другой администратор мог обработать посты - берем очередь заново.
+                    # Обработанный пост уже не в очереди - следующий стоит первым
+                    await show_next_pending_post(query, context, AdminService.get_posts_for_review(), position=0)
                 else:
-                    await query.edit_message_text(
+                    await edit_query_message(
+                        query,
                         f"❌ Пост {post_id} отклонен.\n\n"
                         f"✅ Все посты обработаны!",
                         parse_mode=ParseMode.HTML
                     )
             else:
-                await query.edit_message_text(f"❌ Ошибка при отклонении поста {post_id}.")
+                await edit_query_message(query, f"❌ Ошибка при отклонении поста {post_id}.")
     
-    elif data.startswith("admin_full_"):
-        if Storage.is_admin(user_id):
-            post_id = data.replace("admin_full_", "")
+    elif (post_id := data.removeprefix("admin_full_")) != data:
+        if is_admin:
             post = Storage.get_pending_post(post_id)
             
             if post:
@@ -1733,170 +2041,121 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
                     f"📝 <b>Текст:</b>\n{post.message_text}"
                 )
                 
-                keyboard = [
-                    [
-                        InlineKeyboardButton("✅ Одобрить", callback_data=f"admin_approve_{post.post_id}"),
-                        InlineKeyboardButton("❌ Отклонить", callback_data=f"admin_reject_{post.post_id}")
-                    ]
-                ]
-                
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(full_text, reply_markup=reply_markup, parse_mode=ParseMode.HTML)
+                reply_markup = get_moderation_keyboard(post.post_id, show_navigation=False)
+                await edit_query_message(query, full_text, reply_markup=reply_markup, parse_mode=ParseMode.HTML)
             else:
-                await query.edit_message_text("❌ Пост не найден.")
+                await edit_query_message(query, "❌ Пост не найден.")
     
     elif data == "admin_next_post":
-        if Storage.is_admin(user_id):
+        if is_admin:
             # Получаем список постов на модерации
             pending_posts = AdminService.get_posts_for_review()
-            
-            if len(pending_posts) <= 1:
-                await query.edit_message_text(
-                    "✅ <b>Больше нет постов на модерации</b>\n\n"
-                    "Все предложенные посты обработаны.",
-                    parse_mode=ParseMode.HTML
-                )
-                return
-            
-            # Находим следующий пост (пропускаем первый, так как он уже показан)
-            next_post = pending_posts[1] if len(pending_posts) > 1 else pending_posts[0]
-            
-            post_text = (
-                f"📝 <b>Пост на модерации</b> (2 из {len(pending_posts)})\n\n"
-                f"📋 <b>ID поста:</b> {next_post.post_id}\n"
-                f"👤 <b>От пользователя:</b> {next_post.user_id}\n"
-                f"📅 <b>Время:</b> {next_post.submitted_at.strftime('%d.%m.%Y %H:%M')}\n"
-            )
-            
-            if next_post.source_info:
-                post_text += f"📋 <b>Источник:</b> {next_post.source_info}\n"
-            
-            if next_post.importance_score:
-                post_text += f"⭐ <b>Оценка ИИ:</b> {next_post.importance_score:.2f}\n"
-            
-            post_text += f"\n📄 <b>Текст:</b>\n{next_post.message_text[:400]}"
-            
-            if len(next_post.message_text) > 400:
-                post_text += "..."
-            
-            keyboard = [
-                [
-                    InlineKeyboardButton("✅ Одобрить", callback_data=f"admin_approve_{next_post.post_id}"),
-                    InlineKeyboardButton("❌ Отклонить", callback_data=f"admin_reject_{next_post.post_id}")
-                ],
-                [
-                    InlineKeyboardButton("📄 Полный текст", callback_data=f"admin_full_{next_post.post_id}"),
-                    InlineKeyboardButton("⏭️ Следующий", callback_data="admin_next_post")
-                ]
-            ]
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
-                post_text,
-                reply_markup=reply_markup,
-                parse_mode=ParseMode.HTML
-            )
+            await show_next_pending_post(query, context, pending_posts)
     
     elif data == "admin_clear_channel":
-        if Storage.is_admin(user_id):
+        if is_admin:
             config = Storage.bot_config
+            invalidate_chat_cache(config.publish_channel_id)
+            invalidate_admin_channel_cache(config.publish_channel_id)
             config.publish_channel_id = None
             config.publish_channel_username = None
-            Storage.update_config(config)
+            await Storage.update_config_async(config)
             
             # Сбрасываем состояние пользователя
-            user = Storage.get_user(user_id)
-            user.current_state = None
-            Storage.update_user(user)
+            set_user_state(user, None)
             
-            await query.edit_message_text("✅ Настройки канала публикации очищены.")
+            await edit_query_message(query, "✅ Настройки канала публикации очищены.")
     
     elif data == "refresh_channels":
-        if Storage.is_admin(user_id):
-            # Сохраняем состояние пользователя (не сбрасываем)
-            user = Storage.get_user(user_id)
-            user.current_state = "channel_setup"
-            Storage.update_user(user)
+        if is_admin:
+            # Права бота могли измениться - перепроверяем все каналы
+            invalidate_admin_channel_cache()
             
-            # Обновляем интерфейс с новым списком каналов
+            # Обновляем интерфейс с новым списком каналов (состояние настройки канала сохраняется)
             await query.message.delete()
-            await show_channel_config(query, context)
+            await show_channel_config(query, context, user)
     
-    elif data.startswith("set_channel_"):
-        if Storage.is_admin(user_id):
-            channel_id = int(data.replace("set_channel_", ""))
+    elif (suffix := data.removeprefix("set_channel_")) != data:
+        if is_admin:
+            channel_id = parse_chat_id(suffix)
+            if channel_id is None:
+                await edit_query_message(query, INVALID_CALLBACK_TEXT)
+                return
             config = Storage.bot_config
             config.publish_channel_id = channel_id
+            invalidate_admin_channel_cache(channel_id)
             
             # Сбрасываем состояние пользователя
-            user = Storage.get_user(user_id)
-            user.current_state = None
-            Storage.update_user(user)
+            set_user_state(user, None)
             
             try:
                 # Получаем информацию о канале
-                chat = await context.bot.get_chat(channel_id)
+                chat = await get_chat_cached(context.bot, channel_id)
                 if chat.username:
                     config.publish_channel_username = chat.username
-                Storage.update_config(config)
+                await Storage.update_config_async(config)
                 
-                await query.edit_message_text(
+                await edit_query_message(
+                    query,
                     f"✅ <b>Канал настроен успешно!</b>\n\n"
                     f"📋 <b>ID канала:</b> {channel_id}\n"
-                    f"📝 <b>Название:</b> {html.escape(chat.title)}\n"
-                    f"🏷️ <b>Username:</b> @{html.escape(chat.username) if chat.username else 'отсутствует'}",
+                    f"📝 <b>Название:</b> {escape_cached(chat.title)}\n"
+                    f"🏷️ <b>Username:</b> @{chat.username or 'отсутствует'}",
                     parse_mode=ParseMode.HTML
                 )
             except Exception as e:
                 # Сохраняем ID даже если не удалось получить информацию
-                Storage.update_config(config)
-                await query.edit_message_text(
-                    f"⚠️ Канал настроен, но не удалось получить информацию: {html.escape(str(e))}\n\n"
+                await Storage.update_config_async(config)
+                await edit_query_message(
+                    query,
+                    f"⚠️ Канал настроен, но не удалось получить информацию: {escape_html(str(e))}\n\n"
                     f"📋 <b>ID канала:</b> {channel_id}",
                     parse_mode=ParseMode.HTML
                 )
     
-    elif data.startswith("force_set_channel_"):
-        if Storage.is_admin(user_id):
-            channel_id = int(data.replace("force_set_channel_", ""))
+    elif (suffix := data.removeprefix("force_set_channel_")) != data:
+        if is_admin:
+            channel_id = parse_chat_id(suffix)
+            if channel_id is None:
+                await edit_query_message(query, INVALID_CALLBACK_TEXT)
+                return
             config = Storage.bot_config
             config.publish_channel_id = channel_id
+            invalidate_admin_channel_cache(channel_id)
             
             # Сбрасываем состояние пользователя
-            user = Storage.get_user(user_id)
-            user.current_state = None
-            Storage.update_user(user)
+            set_user_state(user, None)
             
             try:
-                chat = await context.bot.get_chat(channel_id)
+                chat = await get_chat_cached(context.bot, channel_id)
                 if chat.username:
                     config.publish_channel_username = chat.username
-                Storage.update_config(config)
+                await Storage.update_config_async(config)
                 
-                await query.edit_message_text(
+                await edit_query_message(
+                    query,
                     f"✅ <b>Канал сохранен принудительно</b>\n\n"
-                    f"📝 <b>Название:</b> {html.escape(chat.title)}\n"
+                    f"📝 <b>Название:</b> {escape_cached(chat.title)}\n"
                     f"📋 <b>ID:</b> {channel_id}\n\n"
                     f"⚠️ <b>Внимание:</b> Для публикации постов добавьте бота как администратора",
                     parse_mode=ParseMode.HTML
                 )
             except Exception as e:
-                Storage.update_config(config)
-                await query.edit_message_text(
+                await Storage.update_config_async(config)
+                await edit_query_message(
+                    query,
                     f"✅ <b>Канал сохранен</b>\n\n"
                     f"📋 <b>ID:</b> {channel_id}\n"
-                    f"⚠️ <b>Не удалось получить информацию:</b> {html.escape(str(e))}",
+                    f"⚠️ <b>Не удалось получить информацию:</b> {escape_html(str(e))}",
                     parse_mode=ParseMode.HTML
                 )
     
     elif data == "cancel_channel_setup":
         # Сбрасываем состояние пользователя
-        user = Storage.get_user(user_id)
-        user.current_state = None
-        Storage.update_user(user)
+        set_user_state(user, None)
         
-        await query.edit_message_text(
+        await edit_query_message(
+            query,
             "❌ <b>Настройка канала отменена</b>\n\n"
             "💡 Добавьте бота как администратора в канал и попробуйте снова.",
             parse_mode=ParseMode.HTML
@@ -1914,7 +2173,8 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
                 if post:
                     await AdminService.notify_admins_about_new_post(context.bot, post)
                 
-                await query.edit_message_text(
+                await edit_query_message(
+                    query,
                     f"✅ <b>Пост отправлен на модерацию!</b>\n\n"
                     f"📋 <b>ID поста:</b> {post_id}\n"
                     f"⏳ <b>Статус:</b> Ожидает рассмотрения",
@@ -1925,86 +2185,76 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
                 context.user_data.pop('pending_post_text', None)
                 
             except Exception as e:
-                await query.edit_message_text(f"❌ Ошибка при отправке поста: {e}")
+                await edit_query_message(query, f"❌ Ошибка при отправке поста: {e}")
         else:
-            await query.edit_message_text("❌ Текст поста не найден.")
+            await edit_query_message(query, "❌ Текст поста не найден.")
     
     elif data == "my_submissions":
-        # Получаем посты пользователя
-        all_posts = Storage.get_pending_posts()
-        user_posts = [post for post in all_posts if post.user_id == user_id]
+        # Получаем только последние 10 постов пользователя
+        total_posts = Storage.count_pending_posts_by_user(user_id)
         
-        if not user_posts:
-            await query.edit_message_text(
+        if not total_posts:
+            await edit_query_message(
+                query,
                 "📄 <b>У вас нет предложенных постов</b>\n\n"
                 "Нажмите '📝 Предложить пост' в главном меню, чтобы отправить пост на модерацию.",
                 parse_mode=ParseMode.HTML
             )
             return
         
-        # Сортируем по дате
-        user_posts.sort(key=lambda x: x.submitted_at, reverse=True)
-        
-        text = "📄 <b>Ваши предложенные посты:</b>\n\n"
+        parts = ["📄 <b>Ваши предложенные посты:</b>\n\n"]
         
-        for post in user_posts[:10]:  # Показываем последние 10
-            status_emoji = {
-                PostStatus.PENDING: "⏳",
-                PostStatus.APPROVED: "✅",
-                PostStatus.REJECTED: "❌",
-                PostStatus.PUBLISHED: "📢"
-            }.get(post.status, "❓")
+        for post in Storage.get_pending_posts_by_user(user_id, limit=10):
+            status_label = STATUS_LABEL.get(post.status, UNKNOWN_STATUS_LABEL)
+            escaped = escape_html(post.message_text[:50])
             
-            status_text = {
-                PostStatus.PENDING: "Ожидает",
-                PostStatus.APPROVED: "Одобрен",
-                PostStatus.REJECTED: "Отклонен",
-                PostStatus.PUBLISHED: "Опубликован"
-            }.get(post.status, "Неизвестно")
-            
-            text += f"{status_emoji} <b>{status_text}</b> - {post.submitted_at.strftime('%d.%m %H:%M')}\n"
-            text += f"   {html.escape(post.message_text[:50])}{'...' if len(post.message_text) > 50 else ''}\n\n"
+            parts.append(f"{status_label} - {post.submitted_at.strftime('%d.%m %H:%M')}\n")
+            parts.append(f"   {escaped}{'...' if len(post.message_text) > 50 else ''}\n\n")
         
-        if len(user_posts) > 10:
-            text += f"<i>... и еще {len(user_posts) - 10} постов</i>"
+        if total_posts > 10:
+            parts.append(f"<i>... и еще {total_posts - 10} постов</i>")
         
-        await query.edit_message_text(text, parse_mode=ParseMode.HTML)
+        await edit_query_message_paged(query, parts, parse_mode=ParseMode.HTML)
     
     elif data == "cancel_submit":
         context.user_data.pop('pending_post_text', None)
-        await query.edit_message_text("❌ Отправка поста отменена.")
+        await edit_query_message(query, "❌ Отправка поста отменена.")
     
     # Confirmation callbacks
     elif data == "confirm_clear_monitoring":
         user.monitored_chats.clear()
         user.monitored_channels.clear()
-        Storage.update_user(user)
-        await query.edit_message_text("✅ Все источники мониторинга очищены.")
+        user.monitored_titles.clear()
+        await Storage.update_user_async(user)
+        await edit_query_message(query, "✅ Все источники мониторинга очищены.")
     
     elif data == "confirm_clear_data":
         user.monitored_chats.clear()
         user.monitored_channels.clear()
+        user.monitored_titles.clear()
         user.keywords.clear()
         user.exclude_keywords.clear()
-        Storage.update_user(user)
-        await query.edit_message_text("✅ Все ваши данные очищены.")
+        await Storage.update_user_async(user)
+        await edit_query_message(query, "✅ Все ваши данные очищены.")
     
     elif data == "confirm_clear_keywords":
         user.keywords.clear()
         user.exclude_keywords.clear()
-        Storage.update_user(user)
-        await query.edit_message_text("✅ Все ключевые слова очищены.")
+        await Storage.update_user_async(user)
+        await edit_query_message(query, "✅ Все ключевые слова очищены.")
     
     elif data == "cancel_clear":
-        await query.edit_message_text("❌ Действие отменено.")
+        await edit_query_message(query, "❌ Действие отменено.")
     
     # Refresh callbacks
     elif data == "stats_refresh":
         await show_statistics_interface(update, context, user)
     
     elif data == "admin_stats_refresh":
-        if Storage.is_admin(user_id):
+        if is_admin:
             await show_admin_statistics(update, context)
+        else:
+            answer_query_in_background(query)
     
     # Help callbacks
     elif data == "help_quickstart":
@@ -2017,18 +2267,25 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
         await show_faq_help(query)
     
     # Monitoring callbacks for forwarded messages
-    elif data.startswith("add_passive_monitoring_"):
-        parts = data.replace("add_passive_monitoring_", "").split("_")
-        chat_id = int(parts[0])
-        source_type = parts[1]
+    elif (suffix := data.removeprefix("add_passive_monitoring_")) != data:
+        chat_id_text, _, source_type = suffix.rpartition("_")
+        chat_id = parse_chat_id(chat_id_text)
+        if chat_id is None or source_type not in ("channel", "chat"):
+            await edit_query_message(query, INVALID_CALLBACK_TEXT)
+            return
         
-        user = Storage.get_user(user_id)
         if source_type == "channel":
             user.monitored_channels.add(chat_id)
         else:
             user.monitored_chats.add(chat_id)
         
-        Storage.update_user(user)
+        source_title = context.user_data.get('source_titles', {}).pop(chat_id, None)
+        if source_title:
+            user.monitored_titles[chat_id] = source_title
+        
+        Storage.update_user_debounced(user)
+        # Список источников покажет свежее название
+        invalidate_chat_cache(chat_id)
         
         # Синхронизируем с системой мониторинга
         if USERBOT_ENABLED:
@@ -2039,17 +2296,20 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
             except Exception as e:
                 logger.error(f"Ошибка синхронизации с системой мониторинга: {e}")
         
-        await query.edit_message_text(
+        await edit_query_message(
+            query,
             f"✅ <b>Источник добавлен в мониторинг!</b>\n\n"
             f"📊 {'Канал' if source_type == 'channel' else 'Чат'} (ID: {chat_id}) теперь отслеживается.\n\n"
             f"💡 Пересылайте сообщения из этого источника для автоматического анализа.",
             parse_mode=ParseMode.HTML
         )
     
-    elif data.startswith("analyze_once_"):
-        parts = data.replace("analyze_once_", "").split("_")
-        chat_id = int(parts[0])
-        source_type = parts[1]
+    elif (suffix := data.removeprefix("analyze_once_")) != data:
+        chat_id_text, _, source_type = suffix.rpartition("_")
+        chat_id = parse_chat_id(chat_id_text)
+        if chat_id is None or source_type not in ("channel", "chat"):
+            await edit_query_message(query, INVALID_CALLBACK_TEXT)
+            return
         
         # Get the forwarded message from context
         forwarded_msg = None
@@ -2065,37 +2325,36 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
                 chat_id=chat_id,
                 chat_title=f"{'Канал' if source_type == 'channel' else 'Чат'} {chat_id}",
                 text=forwarded_msg.text or forwarded_msg.caption or "",
-                date=datetime.now(),
+                date=message_local_date(forwarded_msg),
                 is_channel=source_type == "channel"
             )
             
             # Analyze importance
-            user = Storage.get_user(user_id)
-            importance_score = evaluate_message_importance(message, user)
+            importance_score = await evaluate_message_importance_async(message, user)
+            threshold = Storage.bot_config.importance_threshold
             
             result_text = (
                 f"🔍 <b>Анализ завершен</b>\n\n"
                 f"📊 <b>Оценка важности:</b> {importance_score:.2f}\n"
-                f"🎯 <b>Глобальный порог:</b> {Storage.bot_config.importance_threshold}\n\n"
-                f"{'✅ Сообщение важное!' if importance_score >= Storage.bot_config.importance_threshold else '❌ Сообщение не достигает порога важности.'}\n\n"
+                f"🎯 <b>Глобальный порог:</b> {threshold}\n\n"
+                f"{'✅ Сообщение важное!' if importance_score >= threshold else '❌ Сообщение не достигает порога важности.'}\n\n"
                 f"💡 Источник не сохранен в мониторинг."
             )
             
-            await query.edit_message_text(result_text, parse_mode=ParseMode.HTML)
+            await edit_query_message(query, result_text, parse_mode=ParseMode.HTML)
         else:
-            await query.edit_message_text("❌ Не удалось найти сообщение для анализа.")
+            await edit_query_message(query, "❌ Не удалось найти сообщение для анализа.")
     
     elif data == "skip_monitoring":
-        await query.edit_message_text("❌ Мониторинг пропущен.")
+        await edit_query_message(query, "❌ Мониторинг пропущен.")
     
-    elif data.startswith("submit_forwarded_"):
-        message_id = data.replace("submit_forwarded_", "")
-        
+    elif (message_id := data.removeprefix("submit_forwarded_")) != data:
         # Get the original forwarded message
         try:
             # This is a simplified approach - in a real implementation,
             # you might want to store the message content temporarily
-            await query.edit_message_text(
+            await edit_query_message(
+                query,
                 "📝 <b>Функция в разработке</b>\n\n"
                 "Используйте кнопку 'Предложить пост' в главном меню "
                 "или команду /submit_post для отправки поста на модерацию.",
@@ -2103,78 +2362,94 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
             )
         except Exception as e:
             logger.error(f"Ошибка при обработке submit_forwarded: {e}")
-            await query.edit_message_text("❌ Ошибка при отправке поста.")
+            await edit_query_message(query, "❌ Ошибка при отправке поста.")
     
     # Source removal callbacks
-    elif data.startswith("remove_chat_"):
-        chat_id = int(data.replace("remove_chat_", ""))
+    elif (suffix := data.removeprefix("remove_chat_")) != data:
+        chat_id = parse_chat_id(suffix)
+        if chat_id is None:
+            await edit_query_message(query, INVALID_CALLBACK_TEXT)
+            return
         user.monitored_chats.discard(chat_id)
-        Storage.update_user(user)
-        await query.edit_message_text(f"✅ Чат {chat_id} удален из мониторинга.")
-    
-    elif data.startswith("remove_channel_"):
-        channel_id = int(data.replace("remove_channel_", ""))
+        user.monitored_titles.pop(chat_id, None)
+        Storage.update_user_debounced(user)
+        await edit_query_message(query, f"✅ Чат {chat_id} удален из мониторинга.")
+    
+    elif (suffix := data.removeprefix("remove_channel_")) != data:
+        channel_id = parse_chat_id(suffix)
+        if channel_id is None:
+            await edit_query_message(query, INVALID_CALLBACK_TEXT)
+            return
         user.monitored_channels.discard(channel_id)
-        Storage.update_user(user)
-        await query.edit_message_text(f"✅ Канал {channel_id} удален из мониторинга.")
+        user.monitored_titles.pop(channel_id, None)
+        Storage.update_user_debounced(user)
+        await edit_query_message(query, f"✅ Канал {channel_id} удален из мониторинга.")
     
     # Keyword removal callbacks
-    elif data.startswith("delete_keyword_"):
-        parts = data.replace("delete_keyword_", "").split("_", 2)
+    elif (suffix := data.removeprefix("delete_keyword_")) != data:
+        parts = suffix.split("_", 2)
         keyword_type = parts[0]
         keyword = "_".join(parts[1:])  # Rejoin in case keyword contains underscores
         
         if keyword_type == "important":
             if keyword in user.keywords:
                 user.keywords.remove(keyword)
-                Storage.update_user(user)
-                await query.edit_message_text(f"✅ Важное слово '{keyword}' удалено.")
+                Storage.update_user_debounced(user)
+                await edit_query_message(query, f"✅ Важное слово '{keyword}' удалено.")
             else:
-                await query.edit_message_text(f"❌ Слово '{keyword}' не найдено.")
+                await edit_query_message(query, f"❌ Слово '{keyword}' не найдено.")
         else:
             if keyword in user.exclude_keywords:
                 user.exclude_keywords.remove(keyword)
-                Storage.update_user(user)
-                await query.edit_message_text(f"✅ Исключаемое слово '{keyword}' удалено.")
+                Storage.update_user_debounced(user)
+                await edit_query_message(query, f"✅ Исключаемое слово '{keyword}' удалено.")
             else:
-                await query.edit_message_text(f"❌ Слово '{keyword}' не найдено.")
+                await edit_query_message(query, f"❌ Слово '{keyword}' не найдено.")
     
     # Channel suggestion callbacks
-    elif data.startswith("add_suggested_channel_"):
-        if Storage.is_admin(user_id):
-            channel_text = data.replace("add_suggested_channel_", "")
+    elif (suggestion_id := data.removeprefix("add_suggested_channel_")) != data:
+        if is_admin:
+            channel_text = channel_suggestions.get(suggestion_id)
+            if channel_text is None:
+                # Предложение вытеснено из памяти или бот перезапускался
+                await edit_query_message(query, "⚠️ Предложение устарело. Добавьте канал через меню мониторинга.")
+                return
             
             # Пытаемся добавить канал в мониторинг
             try:
-                # Получаем информацию о канале
-                chat = await context.bot.get_chat(channel_text)
+                # Получаем информацию о канале (ссылку t.me приводим к @username)
+                chat = await get_chat_cached(context.bot, extract_username_from_link(channel_text))
                 
                 # Добавляем в мониторинг администратора
-                admin_user = Storage.get_user(user_id)
                 if chat.type == 'channel':
-                    admin_user.monitored_channels.add(chat.id)
+                    user.monitored_channels.add(chat.id)
                 else:
-                    admin_user.monitored_chats.add(chat.id)
-                Storage.update_user(admin_user)
+                    user.monitored_chats.add(chat.id)
+                if chat.title:
+                    user.monitored_titles[chat.id] = chat.title
+                await Storage.update_user_async(user)
                 
-                await query.edit_message_text(
+                await edit_query_message(
+                    query,
                     f"✅ <b>Канал добавлен в мониторинг!</b>\n\n"
-                    f"📝 <b>Название:</b> {html.escape(chat.title)}\n"
+                    f"📝 <b>Название:</b> {escape_cached(chat.title)}\n"
                     f"📋 <b>ID:</b> {chat.id}\n"
-                    f"🏷️ <b>Username:</b> @{html.escape(chat.username) if chat.username else 'отсутствует'}",
+                    f"🏷️ <b>Username:</b> @{chat.username or 'отсутствует'}",
                     parse_mode=ParseMode.HTML
                 )
             except Exception as e:
-                await query.edit_message_text(
+                await edit_query_message(
+                    query,
                     f"❌ <b>Не удалось добавить канал</b>\n\n"
-                    f"📋 <b>Ошибка:</b> {html.escape(str(e))}\n\n"
+                    f"📋 <b>Ошибка:</b> {escape_html(str(e))}\n\n"
                     f"💡 Проверьте корректность ссылки и доступность канала.",
                     parse_mode=ParseMode.HTML
                 )
     
     elif data == "reject_channel_suggestion":
-        if Storage.is_admin(user_id):
-            await query.edit_message_text(
+        if is_admin:
+            await edit_query_message(
+                query,
                 "❌ <b>Предложение канала отклонено</b>\n\n"
                 "Уведомление пользователю не отправляется.",
                 parse_mode=ParseMode.HTML
@@ -2184,85 +2459,197 @@ async def callback_handler(update: Update, context: CallbackContext) -> None:
 # HELPER FUNCTIONS FOR CALLBACKS
 # ===========================================
 
-async def show_monitoring_list(query, context: CallbackContext, user: UserPreferences) -> None:
-    """Show list of monitored sources."""
-    # Собираем все источники в один набор
-    all_sources = set()
+async def edit_query_message(query, text: str, **kwargs):
+    """Edit the callback message through the shared rate-limited outbox."""
+    message = query.message
+    if message is None:
+        # Inline-сообщения не привязаны к чату бота
+        return await query.edit_message_text(text, **kwargs)
+    return await outbox.edit(query.get_bot(), message.chat_id, message.message_id, text, **kwargs)
+
+async def respond(update: Update, text: str, reply_markup=None):
+    """Edit the message after a button press, or reply to a regular message."""
+    if update.callback_query:
+        return await edit_query_message(update.callback_query, text, reply_markup=reply_markup, parse_mode=ParseMode.HTML)
+    return await update.message.reply_text(text, reply_markup=reply_markup, parse_mode=ParseMode.HTML)
+
+def split_into_pages(parts: List[str], limit: int = MESSAGE_PAGE_LIMIT) -> List[str]:
+    """Join message parts into pages no longer than limit, never splitting a part."""
+    pages = []
+    current = []
+    running_len = 0
+    for part in parts:
+        if current and running_len + len(part) > limit:
+            pages.append("".join(current))
+            current = []
+            running_len = 0
+        current.append(part)
+        running_len += len(part)
+    if current:
+        pages.append("".join(current))
+    return pages
+
+def join_truncated(items: List[str], limit: int = 100, sep: str = ", ") -> str:
+    """Join items and cut the result to limit chars, stopping as soon as the limit is exceeded."""
+    parts = []
+    running_len = 0
+    for item in items:
+        if parts:
+            running_len += len(sep)
+        parts.append(item)
+        running_len += len(item)
+        if running_len > limit:
+            return sep.join(parts)[:limit] + "..."
+    return sep.join(parts)
+
+async def edit_query_message_paged(query, parts: List[str], **kwargs) -> None:
+    """Put the first page into the callback message and send the rest as new messages."""
+    pages = split_into_pages(parts)
+    await edit_query_message(query, pages[0], **kwargs)
+    if query.message is None:
+        return
+    for page in pages[1:]:
+        await outbox.send(query.get_bot(), query.message.chat_id, page, **kwargs)
+
+def answer_query_in_background(query, text: Optional[str] = None) -> None:
+    """Answer the callback query without blocking the handler on the API round-trip."""
+    task = asyncio.create_task(query.answer(text))
+    background_tasks.add(task)
+    task.add_done_callback(finish_answer_task)
+
+def finish_answer_task(task: asyncio.Task) -> None:
+    """Drop a finished answer task and log its failure, if any."""
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.warning(f"Не удалось ответить на callback: {task.exception()}")
+
+async def show_next_pending_post(query, context: CallbackContext, pending_posts: List[PendingPost], position: int = 1) -> None:
+    """Show the post at position in an already fetched moderation queue.
+    
+    position is 1 while the current post is still pending and 0 once it has left the queue.
+    """
+    if len(pending_posts) <= position:
+        await edit_query_message(
+            query,
+            "✅ <b>Больше нет постов на модерации</b>\n\n"
+            "Все предложенные посты обработаны.",
+            parse_mode=ParseMode.HTML
+        )
+        return
+    
+    next_post = pending_posts[position]
+    
+    parts = [
+        f"📝 <b>Пост на модерации</b> ({position + 1} из {len(pending_posts)})\n\n"
+        f"📋 <b>ID поста:</b> {next_post.post_id}\n"
+        f"👤 <b>От пользователя:</b> {next_post.user_id}\n"
+        f"📅 <b>Время:</b> {next_post.submitted_at.strftime('%d.%m.%Y %H:%M')}\n"
+    ]
+    
+    if next_post.source_info:
+        parts.append(f"📋 <b>Источник:</b> {escape_html(next_post.source_info)}\n")
+    
+    if next_post.importance_score:
+        parts.append(f"⭐ <b>Оценка ИИ:</b> {next_post.importance_score:.2f}\n")
+    
+    parts.append(f"\n📄 <b>Текст:</b>\n{escape_html(next_post.message_text[:400])}")
     
-    # Добавляем источники пользователя
-    all_sources.update(user.monitored_chats)
-    all_sources.update(user.monitored_channels)
+    if len(next_post.message_text) > 400:
+        parts.append("...")
+    post_text = "".join(parts)
     
-    # Добавляем источники из системы мониторинга если она включена
-    if USERBOT_ENABLED:
-        userbot = get_userbot()
-        if userbot.is_running:
-            userbot_sources = userbot.get_monitored_sources()
-            all_sources.update(userbot_sources)
+    reply_markup = get_moderation_keyboard(next_post.post_id)
+    
+    await edit_query_message(
+        query,
+        post_text,
+        reply_markup=reply_markup,
+        parse_mode=ParseMode.HTML
+    )
+
+async def show_monitoring_list(query, context: CallbackContext, user: UserPreferences) -> None:
+    """Show list of monitored sources."""
+    # Собираем источники пользователя и системы мониторинга в один набор
+    all_sources = collect_monitored_sources(user)
     
     if not all_sources:
-        await query.edit_message_text("❌ Нет источников в мониторинге.")
+        await edit_query_message(query, "❌ Нет источников в мониторинге.")
         return
     
-    list_text = "📋 <b>Список источников мониторинга:</b>\n\n"
+    parts = ["📋 <b>Список источников мониторинга:</b>\n\n"]
+    
+    # Запрашиваем информацию обо всех источниках параллельно
+    sorted_ids = sorted(all_sources)
+    chats = await get_chats_concurrently(context.bot, sorted_ids)
     
     # Показываем все источники в едином списке
-    for source_id in sorted(all_sources):
-        try:
-            chat = await context.bot.get_chat(source_id)
-            chat_title = html.escape(chat.title or "Без названия")
-            chat_link = f"https://t.me/{chat.username}" if chat.username else ""
-            
-            # Определяем тип источника
-            if chat.type == 'channel':
-                icon = "📢"
-            elif chat.type in ['group', 'supergroup']:
-                icon = "💬"
-            else:
-                icon = "👤"
-            
-            if chat_link:
-                list_text += f"{icon} <a href='{chat_link}'>{chat_title}</a> ({source_id})\n"
-            else:
-                list_text += f"{icon} {chat_title} ({source_id})\n"
-        except Exception:
-            list_text += f"❓ Источник ID: {source_id}\n"
+    for source_id, chat in zip(sorted_ids, chats):
+        if isinstance(chat, Exception):
+            parts.append(f"❓ Источник ID: {source_id}\n")
+            continue
+        
+        chat_title = escape_cached(chat.title or "Без названия")
+        chat_link = f"https://t.me/{chat.username}" if chat.username else ""
+        
+        # Определяем тип источника
+        icon = CHAT_TYPE_ICON.get(chat.type, "👤")
+        
+        if chat_link:
+            parts.append(f"{icon} <a href='{chat_link}'>{chat_title}</a> ({source_id})\n")
+        else:
+            parts.append(f"{icon} {chat_title} ({source_id})\n")
     
-    list_text += f"\n📊 <b>Всего источников:</b> {len(all_sources)}"
+    parts.append(f"\n📊 <b>Всего источников:</b> {len(all_sources)}")
     
-    await query.edit_message_text(list_text, parse_mode=ParseMode.HTML)
+    await edit_query_message(query, "".join(parts), parse_mode=ParseMode.HTML)
+
+# Сколько источников показывать в меню удаления за раз
+REMOVE_SOURCES_LIMIT = 50
 
 async def show_monitoring_remove(query, context: CallbackContext, user: UserPreferences) -> None:
     """Show interface to remove monitored sources."""
     if not user.monitored_chats and not user.monitored_channels:
-        await query.edit_message_text("❌ Нет источников для удаления.")
+        await edit_query_message(query, "❌ Нет источников для удаления.")
         return
     
     keyboard = []
     
+    # Telegram не примет клавиатуру больше чем на 100 кнопок - берем только первые источники
+    chat_ids = list(islice(user.monitored_chats, REMOVE_SOURCES_LIMIT))
+    channel_ids = list(islice(user.monitored_channels, REMOVE_SOURCES_LIMIT - len(chat_ids)))
+    
+    # Titles are stored when a source is added; only older entries need a lookup
+    titles = user.monitored_titles
+    missing_ids = [source_id for source_id in (*chat_ids, *channel_ids) if source_id not in titles]
+    if missing_ids:
+        results = await get_chats_concurrently(context.bot, missing_ids)
+        for source_id, chat in zip(missing_ids, results):
+            if not isinstance(chat, Exception) and chat.title:
+                titles[source_id] = chat.title
+        Storage.update_user_debounced(user)
+    
     # Add chat buttons
-    for chat_id in user.monitored_chats:
-        try:
-            chat = await context.bot.get_chat(chat_id)
-            chat_title = chat.title or "Без названия"
+    for chat_id in chat_ids:
+        chat_title = titles.get(chat_id)
+        if chat_title:
             button_text = f"💬 {chat_title[:30]}{'...' if len(chat_title) > 30 else ''}"
-        except Exception:
+        else:
             button_text = f"💬 Чат: {chat_id}"
         keyboard.append([InlineKeyboardButton(button_text, callback_data=f"remove_chat_{chat_id}")])
     
     # Add channel buttons
-    for channel_id in user.monitored_channels:
-        try:
-            channel = await context.bot.get_chat(channel_id)
-            channel_title = channel.title or "Без названия"
+    for channel_id in channel_ids:
+        channel_title = titles.get(channel_id)
+        if channel_title:
             button_text = f"📢 {channel_title[:30]}{'...' if len(channel_title) > 30 else ''}"
-        except Exception:
+        else:
             button_text = f"📢 Канал: {channel_id}"
         keyboard.append([InlineKeyboardButton(button_text, callback_data=f"remove_channel_{channel_id}")])
     
     reply_markup = InlineKeyboardMarkup(keyboard)
     
-    await query.edit_message_text(
+    await edit_query_message(
+        query,
         "🗑️ <b>Выберите источник для удаления:</b>",
         reply_markup=reply_markup,
         parse_mode=ParseMode.HTML
@@ -2274,7 +2661,7 @@ async def show_keywords_remove(query, context: CallbackContext, user: UserPrefer
     type_name = "важные" if keyword_type == "important" else "исключаемые"
     
     if not keywords_list:
-        await query.edit_message_text(f"❌ Нет {type_name} слов для удаления.")
+        await edit_query_message(query, f"❌ Нет {type_name} слов для удаления.")
         return
     
     keyboard = []
@@ -2284,7 +2671,8 @@ async def show_keywords_remove(query, context: CallbackContext, user: UserPrefer
     
     reply_markup = InlineKeyboardMarkup(keyboard)
     
-    await query.edit_message_text(
+    await edit_query_message(
+        query,
         f"🗑️ <b>Выберите {type_name} слово для удаления:</b>",
         reply_markup=reply_markup,
         parse_mode=ParseMode.HTML
@@ -2293,66 +2681,17 @@ async def show_keywords_remove(query, context: CallbackContext, user: UserPrefer
 # Help functions
 async def show_quickstart_help(query) -> None:
     """Show quickstart help."""
-    help_text = (
-        "🚀 <b>Быстрый старт</b>\n\n"
-        "1️⃣ <b>Перешлите сообщение</b>\n"
-        "Перешлите интересное сообщение из любого чата или канала боту\n\n"
-        "2️⃣ <b>Добавьте в мониторинг</b>\n"
-        "Выберите 'Добавить в мониторинг' в предложенном меню\n\n"
-        "3️⃣ <b>Настройте фильтры</b>\n"
-        "• Добавьте ключевые слова: +важно\n"
-        "• Настройте порог важности: 0.7\n\n"
-        "4️⃣ <b>Готово!</b>\n"
-        "Получайте уведомления о важных сообщениях"
-    )
-    
-    await query.edit_message_text(help_text, parse_mode=ParseMode.HTML)
+    await edit_query_message(query, QUICKSTART_HELP_TEXT, parse_mode=ParseMode.HTML)
 
 
 
 async def show_tips_help(query) -> None:
     """Show tips help."""
-    help_text = (
-        "💡 <b>Полезные советы</b>\n\n"
-        "🔑 <b>Ключевые слова:</b>\n"
-        "• Используйте конкретные термины\n"
-        "• Добавляйте синонимы\n"
-        "• Исключайте шум (+важно, -реклама)\n\n"
-        "📊 <b>Порог важности:</b>\n"
-        "• 0.3-0.5: Только критически важные\n"
-        "• 0.5-0.7: Сбалансированный режим\n"
-        "• 0.7-0.9: Большинство сообщений\n\n"
-        "📊 <b>Мониторинг:</b>\n"
-        "• Лучший способ отслеживания\n"
-        "• Работает 24/7 автоматически\n"
-        "• Конфиденциальный анализ\n\n"
-        "📝 <b>Посты:</b>\n"
-        "• Предлагайте интересный контент\n"
-        "• Используйте пересланные сообщения\n"
-        "• Следите за уведомлениями о статусе"
-    )
-    
-    await query.edit_message_text(help_text, parse_mode=ParseMode.HTML)
+    await edit_query_message(query, TIPS_HELP_TEXT, parse_mode=ParseMode.HTML)
 
 async def show_faq_help(query) -> None:
     """Show FAQ help."""
-    help_text = (
-        "❓ <b>Часто задаваемые вопросы</b>\n\n"
-        "<b>Q: Как добавить закрытый канал?</b>\n"
-        "A: Используйте функцию мониторинга - она может работать с любыми каналами\n\n"
-        "<b>Q: Почему не приходят уведомления?</b>\n"
-        "A: Проверьте порог важности и ключевые слова\n\n"
-        "<b>Q: Можно ли мониторить без добавления бота?</b>\n"
-        "A: Да, используйте функцию мониторинга или перешлите сообщение\n\n"
-        "<b>Q: Как предложить пост для публикации?</b>\n"
-        "A: Используйте кнопку 'Предложить пост' или команду /submit_post\n\n"
-        "<b>Q: Бот не отвечает на команды</b>\n"
-        "A: Используйте кнопки вместо команд - это удобнее\n\n"
-        "<b>Q: Как стать администратором?</b>\n"
-        "A: Обратитесь к текущему администратору"
-    )
-    
-    await query.edit_message_text(help_text, parse_mode=ParseMode.HTML)
+    await edit_query_message(query, FAQ_HELP_TEXT, parse_mode=ParseMode.HTML)
 
 # ===========================================
 # MESSAGE HANDLING FOR FORWARDED MESSAGES
@@ -2360,10 +2699,14 @@ async def show_faq_help(query) -> None:
 
 async def handle_message_forwarded(update: Update, context: CallbackContext) -> None:
     """Handle incoming forwarded messages and monitoring."""
-    logger.info(f"Получено сообщение: {update.message.text[:50] if update.message.text else 'Нет текста'}")
-    logger.info(f"Сообщение переслано: {hasattr(update.message, 'forward_origin')}")
-    logger.info(f"Тип чата: {update.message.chat.type if update.message.chat else 'Нет чата'}")
-    logger.info(f"ID чата: {update.message.chat.id if update.message.chat else 'Нет ID'}")
+    # Ленивое форматирование: строка собирается, только если запись будет выведена
+    logger.info(
+        "Получено сообщение: %s (переслано: %s, тип чата: %s, ID чата: %s)",
+        (update.message.text or 'Нет текста')[:50],
+        hasattr(update.message, 'forward_origin'),
+        update.message.chat.type if update.message.chat else 'Нет чата',
+        update.message.chat.id if update.message.chat else 'Нет ID'
+    )
     
     # Handle forwarded messages (PASSIVE MONITORING - no admin rights needed)
     if update.message and hasattr(update.message, 'forward_origin') and update.message.forward_origin:
@@ -2371,41 +2714,38 @@ async def handle_message_forwarded(update: Update, context: CallbackContext) ->
         user = Storage.get_user(user_id)
         
         # Handle different types of forward origins
+        # Каждый тип источника содержит только свое поле, остальные будут None
+        origin = update.message.forward_origin
+        origin_chat = getattr(origin, 'chat', None)
+        origin_sender = getattr(origin, 'sender_user', None)
+        origin_sender_name = getattr(origin, 'sender_user_name', None)
+        
         chat_id = None
         chat_title = "Неизвестный источник"
         is_channel = False
         
         # Check if forwarded from a chat/channel
-        if hasattr(update.message.forward_origin, 'chat') and update.message.forward_origin.chat:
-            chat = update.message.forward_origin.chat
-            chat_id = chat.id
-            chat_title = chat.title or f"Чат {chat_id}"
-            is_channel = chat.type == "channel"
+        if origin_chat:
+            chat_id = origin_chat.id
+            chat_title = origin_chat.title or f"Чат {chat_id}"
+            is_channel = origin_chat.type == "channel"
         # Check if forwarded from a user (private chat)
-        elif hasattr(update.message.forward_origin, 'sender_user') and update.message.forward_origin.sender_user:
-            sender = update.message.forward_origin.sender_user
-            chat_id = sender.id
-            chat_title = f"Личные сообщения от {sender.full_name}"
-            is_channel = False
+        elif origin_sender:
+            chat_id = origin_sender.id
+            chat_title = f"Личные сообщения от {origin_sender.full_name}"
         # Check if forwarded from hidden user
-        elif hasattr(update.message.forward_origin, 'sender_user_name'):
-            chat_title = f"Пересланное от {update.message.forward_origin.sender_user_name}"
-            chat_id = hash(update.message.forward_origin.sender_user_name)  # Create pseudo-ID
-            is_channel = False
+        elif origin_sender_name is not None:
+            chat_title = f"Пересланное от {origin_sender_name}"
+            chat_id = hidden_sender_id(origin_sender_name)  # Create pseudo-ID
         
         if chat_id:
             logger.info(f"Обрабатываю пересланное сообщение из {chat_title} (ID: {chat_id}, тип: {'канал' if is_channel else 'чат'})")
             
             # Check if this source is already being monitored (passive or active)
-            is_already_monitored = False
-            monitoring_type = "неизвестно"
-            
             if is_channel:
                 is_already_monitored = chat_id in user.monitored_channels
-                monitoring_type = "канал"
             else:
                 is_already_monitored = chat_id in user.monitored_chats
-                monitoring_type = "чат"
             
             # Always analyze forwarded messages from monitored sources
             if is_already_monitored:
@@ -2415,32 +2755,30 @@ async def handle_message_forwarded(update: Update, context: CallbackContext) ->
                     chat_id=chat_id,
                     chat_title=chat_title,
                     text=update.message.text or update.message.caption or "",
-                    date=datetime.now(),
+                    date=message_local_date(update.message),
                     is_channel=is_channel
                 )
                 
                 # Extract sender info if available
-                if hasattr(update.message.forward_origin, 'sender_user') and update.message.forward_origin.sender_user:
-                    message.sender_id = update.message.forward_origin.sender_user.id
-                    message.sender_name = update.message.forward_origin.sender_user.full_name
-                elif hasattr(update.message.forward_origin, 'sender_user_name'):
-                    message.sender_name = update.message.forward_origin.sender_user_name
+                if origin_sender:
+                    message.sender_id = origin_sender.id
+                    message.sender_name = origin_sender.full_name
+                elif origin_sender_name is not None:
+                    message.sender_name = origin_sender_name
                 
-                logger.info(f"Анализирую пересланное сообщение: {message.text[:50]}...")
+                logger.debug("Анализирую пересланное сообщение: %s...", message.text[:50])
                 
                 # Analyze message importance
-                importance_score = evaluate_message_importance(message, user)
+                threshold = Storage.bot_config.importance_threshold
+                importance_score = await evaluate_message_importance_async(message, user)
                 message.importance_score = importance_score
                 
-                logger.info(f"Оценка важности: {importance_score:.2f}, порог: {Storage.bot_config.importance_threshold}")
+                logger.debug("Оценка важности: %.2f, порог: %s", importance_score, threshold)
                 
                 # Check if the message is important enough to notify the user
-                if importance_score >= Storage.bot_config.importance_threshold:
+                if importance_score >= threshold:
                     # Create keyboard with option to submit for publication
-                    keyboard = [
-                        [InlineKeyboardButton("📝 Предложить для публикации", callback_data=f"submit_forwarded_{update.message.message_id}")]
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
+                    reply_markup = get_submit_forwarded_keyboard(update.message.message_id, important=True)
                     
                     await update.message.reply_text(
                         f"🔔 <b>ВАЖНОЕ СООБЩЕНИЕ ОБНАРУЖЕНО</b>\n\n"
@@ -2460,28 +2798,23 @@ async def handle_message_forwarded(update: Update, context: CallbackContext) ->
                         logger.error(f"Ошибка при обработке важного сообщения для публикации: {e}")
                 else:
                     # Also offer to submit less important messages
-                    keyboard = [
-                        [InlineKeyboardButton("📝 Всё равно предложить для публикации", callback_data=f"submit_forwarded_{update.message.message_id}")]
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
+                    reply_markup = get_submit_forwarded_keyboard(update.message.message_id, important=False)
                     
                     await update.message.reply_text(
                         f"📊 <b>Анализ завершен</b>\n\n"
                         f"Сообщение из {chat_title} имеет оценку важности <b>{importance_score:.2f}</b>, "
-                                            f"что ниже глобального порога <b>{Storage.bot_config.importance_threshold}</b>.\n\n"
+                                            f"что ниже глобального порога <b>{threshold}</b>.\n\n"
                     f"💡 Администраторы могут изменить глобальный порог важности.",
                         parse_mode=ParseMode.HTML,
                         reply_markup=reply_markup
                     )
                 return
             
+            # Запоминаем название, чтобы сохранить его при добавлении в мониторинг
+            context.user_data.setdefault('source_titles', {})[chat_id] = chat_title
+            
             # Offer to add to passive monitoring
-            keyboard = [
-                [InlineKeyboardButton("✅ Добавить в мониторинг", callback_data=f"add_passive_monitoring_{chat_id}_{'channel' if is_channel else 'chat'}")],
-                [InlineKeyboardButton("🔍 Просто проанализировать", callback_data=f"analyze_once_{chat_id}_{'channel' if is_channel else 'chat'}")],
-                [InlineKeyboardButton("❌ Пропустить", callback_data="skip_monitoring")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = get_new_source_keyboard(chat_id, 'channel' if is_channel else 'chat')
             
             await update.message.reply_text(
                 f"🔍 <b>Обнаружен новый источник:</b> {chat_title}\n\n"
@@ -2505,8 +2838,9 @@ async def handle_message_forwarded(update: Update, context: CallbackContext) ->
         chat_id = update.message.chat.id
         chat_title = update.message.chat.title or "Неизвестный чат"
         is_channel = update.message.chat.type == "channel"
+        source_kind = "канал" if is_channel else "чат"
         
-        logger.info(f"Получено прямое сообщение из {'канала' if is_channel else 'чата'}: {chat_title} (ID: {chat_id})")
+        logger.info("Получено прямое сообщение из %s: %s (ID: %s)", 'канала' if is_channel else 'чата', chat_title, chat_id)
         
         # Check if this chat/channel is being monitored by any user
         if is_channel:
@@ -2514,10 +2848,10 @@ async def handle_message_forwarded(update: Update, context: CallbackContext) ->
         else:
             monitored_users = Storage.get_users_monitoring_chat(chat_id)
         
-        logger.info(f"Пользователи, мониторящие {'канал' if is_channel else 'чат'} {chat_id}: {len(monitored_users)}")
+        logger.info("Пользователи, мониторящие %s %s: %d", source_kind, chat_id, len(monitored_users))
         
         if not monitored_users:
-            logger.info(f"Нет пользователей, мониторящих {'канал' if is_channel else 'чат'} {chat_id}")
+            logger.info("Нет пользователей, мониторящих %s %s", source_kind, chat_id)
             return
         
         # Create message object
@@ -2526,7 +2860,7 @@ async def handle_message_forwarded(update: Update, context: CallbackContext) ->
             chat_id=chat_id,
             chat_title=chat_title,
             text=update.message.text or update.message.caption or "",
-            date=datetime.now(),
+            date=message_local_date(update.message),
             is_channel=is_channel
         )
         
@@ -2534,44 +2868,62 @@ async def handle_message_forwarded(update: Update, context: CallbackContext) ->
             message.sender_id = update.message.from_user.id
             message.sender_name = update.message.from_user.full_name
         
-        logger.info(f"Анализирую сообщение для {len(monitored_users)} пользователей: {message.text[:50]}...")
+        logger.debug("Анализирую сообщение для %d пользователей: %s...", len(monitored_users), message.text[:50])
         
         # Analyze message for each monitoring user and find highest importance score
+        threshold = Storage.bot_config.importance_threshold
+        text_lower = message.text.lower()  # Один раз для всех пользователей
         max_importance_score = 0
         notified_users = []
+        to_notify = []  # (user_id, оценка, текст уведомления)
+        # Оценка зависит только от ключевых слов, поэтому пользователи
+        # с одинаковыми фильтрами получают одну общую оценку
+        scores_by_filter: Dict[tuple, float] = {}
         
         for user in monitored_users:
             try:
-                importance_score = evaluate_message_importance(message, user)
+                filter_key = (tuple(sorted(user.keywords)), tuple(sorted(user.exclude_keywords)))
+                importance_score = scores_by_filter.get(filter_key)
+                if importance_score is None:
+                    importance_score = await evaluate_message_importance_async(message, user, text_lower)
+                    scores_by_filter[filter_key] = importance_score
                 message.importance_score = importance_score
                 max_importance_score = max(max_importance_score, importance_score)
                 
-                logger.info(f"Оценка важности для пользователя {user.user_id}: {importance_score:.2f}, порог: {Storage.bot_config.importance_threshold}")
+                logger.debug("Оценка важности для пользователя %s: %.2f, порог: %s", user.user_id, importance_score, threshold)
                 
-                # If message is important enough, send notification to user
-                if importance_score >= Storage.bot_config.importance_threshold:
+                # If message is important enough, queue notification for the user
+                if importance_score >= threshold:
                     notification_text = (
                         f"🔔 <b>ВАЖНОЕ СООБЩЕНИЕ</b>\n\n"
                         f"{message.to_user_notification()}\n\n"
                         f"📋 <i>Источник: Активный мониторинг (бот в чате/канале)</i>"
                     )
-                    
-                    # Send notification to the user
-                    await context.bot.send_message(
-                        chat_id=user.user_id,
-                        text=notification_text,
-                        parse_mode=ParseMode.HTML
-                    )
-                    
-                    notified_users.append(user.user_id)
-                    logger.info(f"Отправлено уведомление пользователю {user.user_id} "
-                              f"из {chat_title} (оценка: {importance_score:.2f})")
+                    to_notify.append((user.user_id, importance_score, notification_text))
                 else:
-                    logger.info(f"Сообщение не достаточно важно для пользователя {user.user_id} "
-                              f"(оценка: {importance_score:.2f}, порог: {Storage.bot_config.importance_threshold})")
+                    logger.debug("Сообщение не достаточно важно для пользователя %s (оценка: %.2f, порог: %s)",
+                                 user.user_id, importance_score, threshold)
                     
             except Exception as e:
-                logger.error(f"Ошибка обработки сообщения для пользователя {user.user_id}: {e}")
+                logger.error("Ошибка обработки сообщения для пользователя %s: %s", user.user_id, e)
+        
+        # Send all notifications concurrently
+        async def notify(user_id: int, text: str):
+            async with notify_semaphore:
+                return await context.bot.send_message(chat_id=user_id, text=text, parse_mode=ParseMode.HTML)
+        
+        results = await asyncio.gather(
+            *(notify(user_id, text) for user_id, _, text in to_notify),
+            return_exceptions=True
+        )
+        
+        for (user_id, importance_score, _), result in zip(to_notify, results):
+            if isinstance(result, Exception):
+                logger.error("Ошибка обработки сообщения для пользователя %s: %s", user_id, result)
+                continue
+            notified_users.append(user_id)
+            logger.info("Отправлено уведомление пользователю %s из %s (оценка: %.2f)",
+                        user_id, chat_title, importance_score)
         
         # If message was important for at least one user, consider it for channel publication
         if notified_users and max_importance_score > 0:
@@ -2579,7 +2931,8 @@ async def handle_message_forwarded(update: Update, context: CallbackContext) ->
             try:
                 published = await AdminService.process_important_message(context.bot, message, max_importance_score)
                 if published:
-                    logger.info(f"Важное сообщение из {chat_title} автоматически опубликовано в канале (оценка: {max_importance_score:.2f})")
+                    logger.info("Важное сообщение из %s автоматически опубликовано в канале (оценка: %.2f)",
+                                chat_title, max_importance_score)
             except Exception as e:
                 logger.error(f"Ошибка при обработке важного сообщения для публикации: {e}")
 
@@ -2587,17 +2940,94 @@ async def handle_message_forwarded(update: Update, context: CallbackContext) ->
 # MAIN FUNCTION
 # ===========================================
 
+async def on_startup(application: Application) -> None:
+    """Start background services once the event loop is running."""
+    if not USERBOT_ENABLED:
+        return
+    
+    # Запускаем userbot в фоновом режиме
+    try:
+        from userbot import start_userbot
+        
+        # Создаем задачу для запуска userbot
+        async def start_userbot_task():
+            try:
+                # Передаем ссылку на основного бота
+                await start_userbot(application.bot)
+            except Exception as e:
+                logger.error(f"Ошибка запуска userbot: {e}")
+        
+        application.bot_data['userbot_task'] = asyncio.create_task(start_userbot_task())
+        logger.info("🤖 Userbot запускается в фоновом режиме...")
+        
+    except Exception as e:
+        logger.error(f"Не удалось запустить userbot: {e}")
+
+async def on_stop(application: Application) -> None:
+    """Deliver queued messages while the bot can still reach Telegram."""
+    # post_shutdown вызывается уже после закрытия соединений бота - отправлять там поздно
+    try:
+        await flush_suggestion_digest(application.bot)
+    except Exception as e:
+        logger.error(f"Ошибка отправки предложений каналов: {e}")
+    
+    # Очередь исходящих запросов: досылаем оставшееся и останавливаем обработчик
+    await outbox.close()
+
+async def on_shutdown(application: Application) -> None:
+    """Stop background services and save data before the event loop closes."""
+    async def stop_userbot_on_shutdown():
+        # Stop userbot if running
+        if not (USERBOT_ENABLED and application.bot_data.get('userbot_task')):
+            return
+        try:
+            from userbot import stop_userbot
+            await stop_userbot()
+            logger.info("🤖 Userbot остановлен")
+        except Exception as e:
+            logger.error(f"Ошибка остановки userbot: {e}")
+    
+    async def save_data_on_shutdown():
+        # Save data before exit
+        # Отложенное сохранение уже не успеет сработать - его покрывает полное сохранение ниже
+        Storage.cancel_pending_users_save()
+        try:
+            # Запись файлов не блокирует цикл, пока завершаются сетевые запросы
+            await Storage.save_to_file_async()
+            logger.info("📂 Данные сохранены")
+        except Exception as e:
+            logger.error(f"Ошибка сохранения данных: {e}")
+    
+    # Отключение userbot от Telegram и запись файлов не зависят друг от друга
+    await asyncio.gather(stop_userbot_on_shutdown(), save_data_on_shutdown())
+    
+    close_http_session()
+
 def main() -> None:
     """Start the simplified bot."""
-    import signal
-    import sys
-    
-    # Load storage data
-    Storage.load_from_file()
-    logger.info("📂 Данные загружены из файлов")
+    # Данные уже загружены при импорте models - повторное чтение файлов только задерживает старт
+    logger.info(f"📂 Данные загружены из файлов: {len(Storage.users)} пользователей, {len(Storage.pending_posts)} постов")
     
     # Create the Application and pass it your bot's token
-    application = Application.builder().token(TELEGRAM_TOKEN).build()
+    # Пул соединений рассчитан на параллельные рассылки и get_chat (по 20 запросов)
+    # SIGINT/SIGTERM обрабатывает run_polling: он останавливает бота и вызывает on_stop и on_shutdown
+    builder = (
+        Application.builder()
+        .token(TELEGRAM_TOKEN)
+        .connection_pool_size(CONNECTION_POOL_SIZE)
+        .pool_timeout(30)
+        .get_updates_connection_pool_size(GET_UPDATES_POOL_SIZE)
+        .concurrent_updates(True)
+        .post_init(on_startup)
+        .post_stop(on_stop)
+        .post_shutdown(on_shutdown)
+    )
+    try:
+        builder = builder.rate_limiter(AIORateLimiter(overall_max_rate=30, max_retries=3))
+    except RuntimeError as e:
+        # AIORateLimiter требует python-telegram-bot[rate-limiter]
+        logger.warning(f"⚠️ Ограничитель запросов недоступен: {e}")
+    application = builder.build()
 
     # Add minimal essential command handlers
     application.add_handler(CommandHandler("start", start_command))
@@ -2609,91 +3039,30 @@ def main() -> None:
     application.add_handler(CallbackQueryHandler(callback_handler))
     
     # Add text message handler (handles reply buttons and text input)
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text_messages))
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text_messages, block=False))
     
     # Add message handler for forwarded messages and monitoring
-    application.add_handler(MessageHandler(filters.ALL & ~filters.TEXT, handle_message_forwarded))
+    application.add_handler(MessageHandler(filters.ALL & ~filters.TEXT, handle_message_forwarded, block=False))
     
     # Make application globally available for userbot
     globals()['application'] = application
     
-    # Store userbot task for proper cleanup
-    userbot_task = None
-    
-    # Signal handler for graceful shutdown
-    def signal_handler(signum, frame):
-        logger.info(f"Получен сигнал {signum}, завершение работы...")
-        
-        # Stop userbot if running
-        if USERBOT_ENABLED and userbot_task:
-            try:
-                from userbot import stop_userbot
-                asyncio.create_task(stop_userbot())
-                logger.info("🤖 Userbot остановлен")
-            except Exception as e:
-                logger.error(f"Ошибка остановки userbot: {e}")
-        
-        # Save data before exit
-        try:
-            Storage.save_to_file()
-            logger.info("📂 Данные сохранены")
-        except Exception as e:
-            logger.error(f"Ошибка сохранения данных: {e}")
-        
-        sys.exit(0)
-    
-    # Register signal handlers
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    
     logger.info("🚀 Упрощенный бот запущен!")
     
-    # Запускаем userbot в фоновом режиме
-    if USERBOT_ENABLED:
-        try:
-            import asyncio
-            from userbot import start_userbot
-            
-            # Создаем задачу для запуска userbot
-            async def start_userbot_task():
-                try:
-                    # Передаем ссылку на основного бота
-                    await start_userbot(application.bot)
-                except Exception as e:
-                    logger.error(f"Ошибка запуска userbot: {e}")
-            
-            # Запускаем userbot в отдельной задаче
-            loop = asyncio.get_event_loop()
-            userbot_task = loop.create_task(start_userbot_task())
-            logger.info("🤖 Userbot запускается в фонов��м режиме...")
-            
-        except Exception as e:
-            logger.error(f"Не удалось запустить userbot: {e}")
-    
     try:
         # Start the Bot
-        application.run_polling()
+        # Запрашиваем только те типы обновлений, которые обрабатывают хендлеры
+        application.run_polling(
+            timeout=10,
+            poll_interval=0.0,
+            bootstrap_retries=-1,
+            allowed_updates=[Update.MESSAGE, Update.CALLBACK_QUERY, Update.CHANNEL_POST]
+        )
     except KeyboardInterrupt:
         logger.info("Получен сигнал прерывания, завершение работы...")
     except Exception as e:
         logger.error(f"Ошибка в основном цикле бота: {e}")
     finally:
-        # Cleanup
-        if USERBOT_ENABLED and userbot_task:
-            try:
-                from userbot import stop_userbot
-                asyncio.create_task(stop_userbot())
-                logger.info("🤖 Userbot остановлен")
-            except Exception as e:
-                logger.error(f"Ошибка остановки userbot: {e}")
-        
-        # Save data
-        try:
-            Storage.save_to_file()
-            logger.info("📂 Данные сохранены")
-        except Exception as e:
-            logger.error(f"Ошибка сохранения данных: {e}")
-        
         logger.info("Бот завершил работу")
 
 if __name__ == '__main__':
@@ -1,10 +1,15 @@
-from pydantic import BaseModel
-from typing import Dict, List, Optional, Set
+from pydantic import BaseModel, field_validator
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime
+import asyncio
+import heapq
 import json
 import os
 import logging
 import html
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 
 logger = logging.getLogger(__name__)
@@ -59,6 +64,7 @@ class UserPreferences(BaseModel):
     user_id: int
     monitored_chats: Set[int] = set()  # Set of chat IDs to monitor
     monitored_channels: Set[int] = set()  # Set of channel IDs to monitor
+    monitored_titles: Dict[int, str] = {}  # Названия источников, известные при добавлении
     keywords: List[str] = []  # Keywords to prioritize
     exclude_keywords: List[str] = []  # Keywords to deprioritize
     can_submit_posts: bool = True  # Может ли пользователь предлагать посты
@@ -66,6 +72,12 @@ class UserPreferences(BaseModel):
     created_at: datetime = datetime.now()
     updated_at: datetime = datetime.now()
     
+    @field_validator('keywords', 'exclude_keywords')
+    @classmethod
+    def unique_keywords(cls, value: List[str]) -> List[str]:
+        """Drop repeated keywords, keeping the order they were added in"""
+        return list(dict.fromkeys(value))
+    
     class Config:
         json_encoders = {
             datetime: lambda v: v.isoformat(),
@@ -107,6 +119,19 @@ class Storage:
     users: Dict[int, UserPreferences] = {}
     bot_config: BotConfig = BotConfig()
     pending_posts: Dict[str, PendingPost] = {}
+    user_posts: Dict[int, Dict[str, PendingPost]] = {}  # Индекс постов по user_id
+    # Все записи файлов идут через один поток: он сохраняет порядок снимков и не дает записям пересечься
+    save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+    pending_users_save: Optional[asyncio.TimerHandle] = None  # Отложенное сохранение пользователей
+    serialized_users: Dict[int, str] = {}  # Кэш JSON-фрагментов пользователей для save_users
+    dirty_users: Set[int] = set()  # Пользователи, измененные после последнего сохранения
+    dirty_lock = threading.Lock()
+    chat_users: Dict[int, Set[int]] = {}  # Обратный индекс: chat_id -> user_id
+    channel_users: Dict[int, Set[int]] = {}  # Обратный индекс: channel_id -> user_id
+    indexed_sources: Dict[int, Tuple[frozenset, frozenset]] = {}  # user_id -> (чаты, каналы) в индексе
+    monitored_totals: Counter = Counter()  # Сумма источников по всем пользователям: 'chats' и 'channels'
+    post_counts: Counter = Counter()  # Число постов по статусам
+    admin_usernames: Dict[str, int] = {}  # username (в нижнем регистре) -> ID администратора
     
     @classmethod
     def load_from_file(cls) -> None:
@@ -130,7 +155,7 @@ class Storage:
             logger.info(f"Создаю файл {cls.CONFIG_FILE}")
             default_config = BotConfig()
             config_dict = {
-                "admin_ids": list(default_config.admin_ids),
+                "admin_ids": sorted(default_config.admin_ids),
                 "publish_channel_id": default_config.publish_channel_id,
                 "publish_channel_username": default_config.publish_channel_username,
                 "importance_threshold": default_config.importance_threshold,
@@ -168,6 +193,8 @@ class Storage:
         try:
             with open(cls.DB_FILE, 'r', encoding='utf-8') as f:
                 data = json.load(f)
+            # Загруженные пользователи заменяют прежние объекты - кэш фрагментов устарел
+            cls.serialized_users = {}
                 
             for user_id_str, user_data in data.items():
                 user_id = int(user_id_str)
@@ -184,12 +211,17 @@ class Storage:
                     user_data['updated_at'] = datetime.fromisoformat(user_data['updated_at'])
                 
                 cls.users[user_id] = UserPreferences(**user_data)
+                cls.index_user_sources(cls.users[user_id])
                 
             logger.info(f"Загружено {len(cls.users)} пользователей из базы данных")
             
         except Exception as e:
             logger.error(f"Ошибка загрузки базы данных: {e}")
             cls.users = {}
+            cls.chat_users = {}
+            cls.channel_users = {}
+            cls.indexed_sources = {}
+            cls.monitored_totals = Counter()
     
     @classmethod
     def load_config(cls) -> None:
@@ -241,13 +273,19 @@ class Storage:
                 if 'reviewed_at' in post_data and post_data['reviewed_at']:
                     post_data['reviewed_at'] = datetime.fromisoformat(post_data['reviewed_at'])
                 
-                cls.pending_posts[post_id] = PendingPost(**post_data)
+                post = PendingPost(**post_data)
+                cls.pending_posts[post_id] = post
+                cls.user_posts.setdefault(post.user_id, {})[post_id] = post
             
+            # Пересчитываем целиком: повторная загрузка заменяет уже загруженные посты
+            cls.post_counts = Counter(post.status for post in cls.pending_posts.values())
             logger.info(f"Загружено {len(cls.pending_posts)} постов из очереди")
             
         except Exception as e:
             logger.error(f"Ошибка загрузки постов: {e}")
             cls.pending_posts = {}
+            cls.user_posts = {}
+            cls.post_counts = Counter()
     
     @classmethod
     def save_to_file(cls) -> None:
@@ -256,9 +294,76 @@ class Storage:
         cls.save_config()
         cls.save_posts()
     
+    @classmethod
+    async def save_to_file_async(cls) -> None:
+        """Snapshot all data on the event loop and write the files in a worker thread"""
+        await cls.save_users_async()
+        await cls.save_config_async()
+        await cls.save_posts_async()
+    
+    @classmethod
+    def write_in_background(cls, write, *snapshot) -> asyncio.Future:
+        """Write a snapshot taken on the event loop in the storage thread"""
+        return asyncio.get_running_loop().run_in_executor(cls.save_executor, write, *snapshot)
+    
+    @classmethod
+    def submit_write(cls, write, *snapshot) -> None:
+        """Queue a snapshot write in the storage thread; outside the event loop wait for it"""
+        future = cls.save_executor.submit(write, *snapshot)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Скрипты и тесты читают файл сразу после сохранения
+            future.result()
+    
     @classmethod
     def save_users(cls) -> None:
         """Save user preferences to JSON file with backup"""
+        snapshot = cls.snapshot_users()
+        if snapshot is not None:
+            cls.submit_write(cls.write_users, *snapshot)
+    
+    @classmethod
+    async def save_users_async(cls) -> None:
+        """Save user preferences, writing the file in the storage thread"""
+        snapshot = cls.snapshot_users()
+        if snapshot is not None:
+            await cls.write_in_background(cls.write_users, *snapshot)
+    
+    @classmethod
+    def save_users_in_background(cls) -> None:
+        """Save user preferences without waiting for the write (used by the debounced save)"""
+        cls.pending_users_save = None
+        snapshot = cls.snapshot_users()
+        if snapshot is not None:
+            cls.write_in_background(cls.write_users, *snapshot)
+    
+    @classmethod
+    def snapshot_users(cls) -> Optional[Tuple[str, int]]:
+        """Build content of the users file and the number of users; must run where users are changed (the event loop)"""
+        with cls.dirty_lock:
+            dirty, cls.dirty_users = cls.dirty_users, set()
+        try:
+            entries = []
+            for user_id, user in list(cls.users.items()):
+                # Сериализуем в JSON только измененных пользователей, остальные берем из кэша
+                fragment = cls.serialized_users.get(user_id)
+                if fragment is None or user_id in dirty:
+                    fragment = cls.serialize_user(user)
+                    cls.serialized_users[user_id] = fragment
+                entries.append(f'  "{user_id}": {fragment}')
+            
+            return ("{\n" + ",\n".join(entries) + "\n}" if entries else "{}"), len(entries)
+        except Exception as e:
+            logger.error(f"Ошибка сохранения базы данных: {e}")
+            # Возвращаем отметки, иначе следующее сохранение возьмет устаревшие фрагменты из кэша
+            with cls.dirty_lock:
+                cls.dirty_users |= dirty
+            return None
+    
+    @classmethod
+    def write_users(cls, content: str, count: int) -> None:
+        """Write users file content with backup"""
         try:
             # Создаем резервную копию если файл существует
             if os.path.exists(cls.DB_FILE):
@@ -266,18 +371,10 @@ class Storage:
                 backup_file = f"{cls.DB_FILE}.bak"
                 shutil.copy2(cls.DB_FILE, backup_file)
             
-            data = {}
-            for user_id, user in cls.users.items():
-                user_dict = user.dict()
-                # Convert sets to lists for JSON serialization
-                user_dict['monitored_chats'] = list(user.monitored_chats)
-                user_dict['monitored_channels'] = list(user.monitored_channels)
-                data[str(user_id)] = user_dict
-            
             with open(cls.DB_FILE, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+                f.write(content)
                 
-            logger.info(f"Сохранено {len(cls.users)} пользователей в базу данных")
+            logger.info(f"Сохранено {count} пользователей в базу данных")
             
         except Exception as e:
             logger.error(f"Ошибка сохранения базы данных: {e}")
@@ -288,15 +385,53 @@ class Storage:
                 shutil.copy2(backup_file, cls.DB_FILE)
                 logger.info("Восстановлена резервная копия базы данных")
     
+    @staticmethod
+    def serialize_user(user: UserPreferences) -> str:
+        """Serialize one user to a JSON fragment indented as a value of the top-level object"""
+        user_dict = user.dict()
+        # Convert sets to lists for JSON serialization
+        user_dict['monitored_chats'] = list(user.monitored_chats)
+        user_dict['monitored_channels'] = list(user.monitored_channels)
+        # Строки в JSON не содержат переводов строк, поэтому сдвиг отступа безопасен
+        return json.dumps(user_dict, indent=2, ensure_ascii=False, default=str).replace("\n", "\n  ")
+    
+    @classmethod
+    def mark_user_dirty(cls, user_id: int) -> None:
+        """Mark user as changed so the next save serializes it again"""
+        with cls.dirty_lock:
+            cls.dirty_users.add(user_id)
+    
     @classmethod
     def save_config(cls) -> None:
         """Save bot configuration to JSON file"""
+        content = cls.snapshot_config()
+        if content is not None:
+            cls.submit_write(cls.write_config, content)
+    
+    @classmethod
+    async def save_config_async(cls) -> None:
+        """Save bot configuration, writing the file in the storage thread"""
+        content = cls.snapshot_config()
+        if content is not None:
+            await cls.write_in_background(cls.write_config, content)
+    
+    @classmethod
+    def snapshot_config(cls) -> Optional[str]:
+        """Build content of the config file"""
         try:
             data = cls.bot_config.dict()
-            data['admin_ids'] = list(cls.bot_config.admin_ids)
-            
+            data['admin_ids'] = sorted(cls.bot_config.admin_ids)
+            return json.dumps(data, indent=2, ensure_ascii=False, default=str)
+        except Exception as e:
+            logger.error(f"Ошибка сохранения конфигурации: {e}")
+            return None
+    
+    @classmethod
+    def write_config(cls, content: str) -> None:
+        """Write config file content"""
+        try:
             with open(cls.CONFIG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+                f.write(content)
             
             logger.info("Сохранена конфигурация бота")
             
@@ -306,15 +441,37 @@ class Storage:
     @classmethod
     def save_posts(cls) -> None:
         """Save pending posts to JSON file"""
+        snapshot = cls.snapshot_posts()
+        if snapshot is not None:
+            cls.submit_write(cls.write_posts, *snapshot)
+    
+    @classmethod
+    async def save_posts_async(cls) -> None:
+        """Save pending posts, writing the file in the storage thread"""
+        snapshot = cls.snapshot_posts()
+        if snapshot is not None:
+            await cls.write_in_background(cls.write_posts, *snapshot)
+    
+    @classmethod
+    def snapshot_posts(cls) -> Optional[Tuple[str, int]]:
+        """Build content of the posts file and the number of posts"""
         try:
             data = {}
-            for post_id, post in cls.pending_posts.items():
+            for post_id, post in list(cls.pending_posts.items()):
                 data[post_id] = post.dict()
-            
+            return json.dumps(data, indent=2, ensure_ascii=False, default=str), len(data)
+        except Exception as e:
+            logger.error(f"Ошибка сохранения постов: {e}")
+            return None
+    
+    @classmethod
+    def write_posts(cls, content: str, count: int) -> None:
+        """Write posts file content"""
+        try:
             with open(cls.POSTS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+                f.write(content)
             
-            logger.info(f"Сохранено {len(cls.pending_posts)} постов в очереди")
+            logger.info(f"Сохранено {count} постов в очереди")
             
         except Exception as e:
             logger.error(f"Ошибка сохранения постов: {e}")
@@ -330,15 +487,62 @@ class Storage:
     @classmethod
     def update_user(cls, preferences: UserPreferences) -> None:
         """Update user preferences and save to file"""
+        cls.apply_user_update(preferences)
+        cls.save_users()
+    
+    @classmethod
+    async def update_user_async(cls, preferences: UserPreferences) -> None:
+        """Update user preferences on the event loop and write the file in the storage thread"""
+        cls.apply_user_update(preferences)
+        await cls.save_users_async()
+    
+    @classmethod
+    def update_user_debounced(cls, preferences: UserPreferences, delay: float = 0.25) -> None:
+        """Update user preferences and save to file once a burst of updates settles"""
+        cls.apply_user_update(preferences)
+        cls.schedule_users_save(delay)
+    
+    @classmethod
+    def apply_user_update(cls, preferences: UserPreferences) -> None:
+        """Store updated preferences in memory and in the source index"""
         preferences.updated_at = datetime.now()
         cls.users[preferences.user_id] = preferences
-        cls.save_users()
+        cls.mark_user_dirty(preferences.user_id)
+        cls.index_user_sources(preferences)
+    
+    @classmethod
+    def set_user_state(cls, user_id: int, state: Optional[str], delay: float = 0.25) -> None:
+        """Set user's dialog state; only this user is reserialized, with a debounced save"""
+        user = cls.get_user(user_id)
+        user.current_state = state
+        user.updated_at = datetime.now()
+        # Источники не меняются - переиндексация не нужна
+        cls.mark_user_dirty(user_id)
+        cls.schedule_users_save(delay)
+    
+    @classmethod
+    def schedule_users_save(cls, delay: float) -> None:
+        """Save users to file after delay, restarting the timer on every call"""
+        # Все пользователи хранятся в одном файле, поэтому достаточно одного таймера
+        if cls.pending_users_save:
+            cls.pending_users_save.cancel()
+        loop = asyncio.get_running_loop()
+        cls.pending_users_save = loop.call_later(delay, cls.save_users_in_background)
+    
+    @classmethod
+    def cancel_pending_users_save(cls) -> None:
+        """Cancel a scheduled debounced save (the caller saves users itself)"""
+        if cls.pending_users_save:
+            cls.pending_users_save.cancel()
+            cls.pending_users_save = None
     
     @classmethod
     def delete_user(cls, user_id: int) -> bool:
         """Delete user preferences"""
         if user_id in cls.users:
             del cls.users[user_id]
+            cls.serialized_users.pop(user_id, None)
+            cls.unindex_user_sources(user_id)
             cls.save_users()
             return True
         return False
@@ -348,15 +552,73 @@ class Storage:
         """Get all users"""
         return cls.users.copy()
     
+    @classmethod
+    def count_users(cls) -> int:
+        """Get number of users without copying the users dict"""
+        return len(cls.users)
+    
+    @classmethod
+    def index_user_sources(cls, preferences: UserPreferences) -> None:
+        """Sync the source -> users index with the user's monitored sources"""
+        chats = frozenset(preferences.monitored_chats)
+        channels = frozenset(preferences.monitored_channels)
+        with cls.dirty_lock:
+            old_chats, old_channels = cls.indexed_sources.get(preferences.user_id, (frozenset(), frozenset()))
+            if (old_chats, old_channels) == (chats, channels):
+                return
+            cls.reindex_sources(cls.chat_users, preferences.user_id, old_chats, chats)
+            cls.reindex_sources(cls.channel_users, preferences.user_id, old_channels, channels)
+            cls.indexed_sources[preferences.user_id] = (chats, channels)
+            cls.monitored_totals['chats'] += len(chats) - len(old_chats)
+            cls.monitored_totals['channels'] += len(channels) - len(old_channels)
+    
+    @classmethod
+    def unindex_user_sources(cls, user_id: int) -> None:
+        """Remove a user from the source -> users index"""
+        with cls.dirty_lock:
+            old_chats, old_channels = cls.indexed_sources.pop(user_id, (frozenset(), frozenset()))
+            cls.reindex_sources(cls.chat_users, user_id, old_chats, frozenset())
+            cls.reindex_sources(cls.channel_users, user_id, old_channels, frozenset())
+            cls.monitored_totals['chats'] -= len(old_chats)
+            cls.monitored_totals['channels'] -= len(old_channels)
+    
+    @staticmethod
+    def reindex_sources(index: Dict[int, Set[int]], user_id: int, old: frozenset, new: frozenset) -> None:
+        """Apply the difference between old and new sources of a user to an index"""
+        for source_id in old - new:
+            users = index.get(source_id)
+            if users:
+                users.discard(user_id)
+                if not users:
+                    del index[source_id]
+        for source_id in new - old:
+            index.setdefault(source_id, set()).add(user_id)
+    
     @classmethod
     def get_users_monitoring_chat(cls, chat_id: int) -> List[UserPreferences]:
         """Get all users monitoring a specific chat"""
-        return [user for user in cls.users.values() if chat_id in user.monitored_chats]
+        with cls.dirty_lock:
+            user_ids = list(cls.chat_users.get(chat_id, ()))
+        return [cls.users[user_id] for user_id in user_ids if user_id in cls.users]
     
     @classmethod
     def get_users_monitoring_channel(cls, channel_id: int) -> List[UserPreferences]:
         """Get all users monitoring a specific channel"""
-        return [user for user in cls.users.values() if channel_id in user.monitored_channels]
+        with cls.dirty_lock:
+            user_ids = list(cls.channel_users.get(channel_id, ()))
+        return [cls.users[user_id] for user_id in user_ids if user_id in cls.users]
+    
+    @classmethod
+    def get_monitored_channel_ids(cls) -> Set[int]:
+        """Get IDs of all channels monitored by at least one user"""
+        with cls.dirty_lock:
+            return set(cls.channel_users)
+    
+    @classmethod
+    def get_monitored_source_ids(cls) -> Set[int]:
+        """Get IDs of all chats and channels monitored by at least one user"""
+        with cls.dirty_lock:
+            return set(cls.chat_users).union(cls.channel_users)
     
     @classmethod
     def update_config(cls, config: BotConfig) -> None:
@@ -365,6 +627,13 @@ class Storage:
         cls.bot_config = config
         cls.save_config()
     
+    @classmethod
+    async def update_config_async(cls, config: BotConfig) -> None:
+        """Update bot configuration, writing the file in the storage thread"""
+        config.updated_at = datetime.now()
+        cls.bot_config = config
+        await cls.save_config_async()
+    
     @classmethod
     def is_admin(cls, user_id: int) -> bool:
         """Check if user is admin"""
@@ -376,16 +645,53 @@ class Storage:
         cls.bot_config.admin_ids.add(user_id)
         cls.save_config()
     
+    @classmethod
+    async def add_admin_async(cls, user_id: int) -> None:
+        """Add admin, writing the config file in the storage thread"""
+        cls.bot_config.admin_ids.add(user_id)
+        await cls.save_config_async()
+    
     @classmethod
     def remove_admin(cls, user_id: int) -> None:
         """Remove admin"""
-        cls.bot_config.admin_ids.discard(user_id)
+        cls.forget_admin(user_id)
         cls.save_config()
     
+    @classmethod
+    async def remove_admin_async(cls, user_id: int) -> None:
+        """Remove admin, writing the config file in the storage thread"""
+        cls.forget_admin(user_id)
+        await cls.save_config_async()
+    
+    @classmethod
+    def forget_admin(cls, user_id: int) -> None:
+        """Remove admin from the config and the username cache"""
+        cls.bot_config.admin_ids.discard(user_id)
+        cls.admin_usernames = {name: admin_id for name, admin_id in cls.admin_usernames.items() if admin_id != user_id}
+    
+    @classmethod
+    def remember_admin_username(cls, username: Optional[str], user_id: int) -> None:
+        """Remember username of an admin to resolve it without Telegram API"""
+        if username and user_id in cls.bot_config.admin_ids:
+            cls.admin_usernames[username.lower()] = user_id
+    
+    @classmethod
+    def find_admin_by_username(cls, username: str) -> Optional[int]:
+        """Get admin ID by username if it is known"""
+        admin_id = cls.admin_usernames.get(username.lower())
+        if admin_id is not None and admin_id in cls.bot_config.admin_ids:
+            return admin_id
+        return None
+    
     @classmethod
     def add_pending_post(cls, post: PendingPost) -> None:
         """Add post to pending queue"""
+        old_post = cls.pending_posts.get(post.post_id)
+        if old_post is not None:
+            cls.post_counts[old_post.status] -= 1
+        cls.post_counts[post.status] += 1
         cls.pending_posts[post.post_id] = post
+        cls.user_posts.setdefault(post.user_id, {})[post.post_id] = post
         cls.save_posts()
     
     @classmethod
@@ -396,16 +702,33 @@ class Storage:
     @classmethod
     def update_post_status(cls, post_id: str, status: PostStatus, admin_id: Optional[int] = None, comment: Optional[str] = None) -> bool:
         """Update post status"""
-        if post_id in cls.pending_posts:
-            post = cls.pending_posts[post_id]
-            post.status = status
-            post.reviewed_at = datetime.now()
-            post.reviewed_by = admin_id
-            post.admin_comment = comment
+        if cls.apply_post_status(post_id, status, admin_id, comment):
             cls.save_posts()
             return True
         return False
     
+    @classmethod
+    async def update_post_status_async(cls, post_id: str, status: PostStatus, admin_id: Optional[int] = None, comment: Optional[str] = None) -> bool:
+        """Update post status on the event loop and write the file in the storage thread"""
+        if cls.apply_post_status(post_id, status, admin_id, comment):
+            await cls.save_posts_async()
+            return True
+        return False
+    
+    @classmethod
+    def apply_post_status(cls, post_id: str, status: PostStatus, admin_id: Optional[int], comment: Optional[str]) -> bool:
+        """Change post status in memory and in the status counters"""
+        post = cls.pending_posts.get(post_id)
+        if post is None:
+            return False
+        cls.post_counts[post.status] -= 1
+        cls.post_counts[status] += 1
+        post.status = status
+        post.reviewed_at = datetime.now()
+        post.reviewed_by = admin_id
+        post.admin_comment = comment
+        return True
+    
     @classmethod
     def get_pending_posts(cls, status: Optional[PostStatus] = None) -> List[PendingPost]:
         """Get pending posts, optionally filtered by status"""
@@ -413,11 +736,44 @@ class Storage:
             return [post for post in cls.pending_posts.values() if post.status == status]
         return list(cls.pending_posts.values())
     
+    @classmethod
+    def count_pending_posts(cls, status: Optional[PostStatus] = None) -> int:
+        """Count posts, optionally filtered by status, without building a list"""
+        if status:
+            return cls.post_counts[status]
+        return len(cls.pending_posts)
+    
+    @classmethod
+    def count_posts_by_status(cls) -> Counter:
+        """Get post counts by status (kept up to date on every change)"""
+        return Counter(cls.post_counts)
+    
+    @classmethod
+    def get_monitored_totals(cls) -> Tuple[int, int]:
+        """Get total numbers of monitored chats and channels over all users"""
+        with cls.dirty_lock:
+            return cls.monitored_totals['chats'], cls.monitored_totals['channels']
+    
+    @classmethod
+    def get_pending_posts_by_user(cls, user_id: int, limit: Optional[int] = None) -> List[PendingPost]:
+        """Get posts submitted by a user; with limit, only the newest ones (newest first)"""
+        posts = cls.user_posts.get(user_id, {}).values()
+        if limit is not None:
+            return heapq.nlargest(limit, posts, key=lambda x: x.submitted_at)
+        return list(posts)
+    
+    @classmethod
+    def count_pending_posts_by_user(cls, user_id: int) -> int:
+        """Count posts submitted by a user"""
+        return len(cls.user_posts.get(user_id, {}))
+    
     @classmethod
     def delete_post(cls, post_id: str) -> bool:
         """Delete post from queue"""
         if post_id in cls.pending_posts:
-            del cls.pending_posts[post_id]
+            post = cls.pending_posts.pop(post_id)
+            cls.user_posts.get(post.user_id, {}).pop(post_id, None)
+            cls.post_counts[post.status] -= 1
             cls.save_posts()
             return True
         return False
@@ -0,0 +1,215 @@
+import asyncio
+import contextlib
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from telegram import Bot
+from telegram.error import RetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты операций: чем меньше число, тем раньше выполняется
+PRIORITY_SEND = 0
+PRIORITY_DELETE = 1
+PRIORITY_EDIT = 2
+
+# Минимальный интервал между запросами в один чат (секунды)
+PRIVATE_CHAT_INTERVAL = 1.0
+GROUP_CHAT_INTERVAL = 3.0
+
+# Сколько последних правок помнить для отсечения повторов
+LAST_EDITS_LIMIT = 1024
+
+# Сколько ждать отправки оставшихся запросов при остановке бота (секунды)
+CLOSE_TIMEOUT = 5.0
+
+# Сколько запросов выполняется одновременно: медленный запрос в один чат не задерживает остальные
+MAX_CONCURRENT_REQUESTS = 16
+
+# Размер таблицы пауз по чатам, после которого из нее удаляются истекшие записи
+NEXT_AT_PRUNE_SIZE = 1024
+
+
+class Outbox:
+    """
+    Общая очередь исходящих запросов к Telegram API
+    Выдерживает паузу между запросами в один чат, склеивает повторные
+    правки одного сообщения и приостанавливает отправку при ответе 429
+    """
+
+    def __init__(self):
+        self._queue = None  # asyncio.PriorityQueue, создается в работающем цикле
+        self._worker = None
+        self._slots = None  # asyncio.Semaphore на MAX_CONCURRENT_REQUESTS запросов
+        self._running = set()  # Выполняющиеся запросы
+        self._pending: Dict[Tuple, Tuple[Callable[[], Awaitable[Any]], asyncio.Future]] = {}
+        self._next_at: Dict[int, float] = {}  # chat_id -> время следующего разрешенного запроса
+        self._paused_until = 0.0  # Глобальная пауза после 429
+        self._counter = itertools.count()
+        self._last_edits: OrderedDict = OrderedDict()  # (chat_id, message_id) -> хэш последнего содержимого
+
+    async def send(self, bot: Bot, chat_id: int, text: str, **kwargs) -> Any:
+        """Отправка сообщения через очередь"""
+        key = ("send", chat_id, next(self._counter))
+        action = lambda: bot.send_message(chat_id=chat_id, text=text, **kwargs)
+        return await self._submit(PRIORITY_SEND, key, action)
+
+    async def delete(self, bot: Bot, chat_id: int, message_id: int) -> Any:
+        """Удаление сообщения через очередь"""
+        key = ("delete", chat_id, message_id)
+        action = lambda: bot.delete_message(chat_id=chat_id, message_id=message_id)
+        return await self._submit(PRIORITY_DELETE, key, action)
+
+    async def edit(self, bot: Bot, chat_id: int, message_id: int, text: str, **kwargs) -> Any:
+        """Редактирование сообщения через очередь (повторные правки склеиваются)"""
+        key = ("edit", chat_id, message_id)
+        message_key = (chat_id, message_id)
+        try:
+            fingerprint = hash((text, tuple(sorted(kwargs.items()))))
+        except TypeError:
+            fingerprint = None
+
+        # Telegram все равно отклонит правку без изменений ("message is not modified")
+        if fingerprint is not None and key not in self._pending and self._last_edits.get(message_key) == fingerprint:
+            return True
+
+        async def action():
+            result = await bot.edit_message_text(text=text, chat_id=chat_id, message_id=message_id, **kwargs)
+            self._remember_edit(message_key, fingerprint)
+            return result
+
+        return await self._submit(PRIORITY_EDIT, key, action)
+
+    def _remember_edit(self, message_key: Tuple, fingerprint) -> None:
+        """Запоминает содержимое последней успешной правки сообщения"""
+        if fingerprint is None:
+            self._last_edits.pop(message_key, None)
+            return
+        self._last_edits[message_key] = fingerprint
+        self._last_edits.move_to_end(message_key)
+        if len(self._last_edits) > LAST_EDITS_LIMIT:
+            self._last_edits.popitem(last=False)
+
+    async def _submit(self, priority: int, key: Tuple, action: Callable[[], Awaitable[Any]]) -> Any:
+        """Ставит запрос в очередь и ждет его выполнения"""
+        self._ensure_worker()
+
+        pending = self._pending.get(key)
+        if pending:
+            # Правка того же сообщения еще не отправлена - заменяем содержимое
+            future = pending[1]
+            self._pending[key] = (action, future)
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = (action, future)
+        self._queue.put_nowait((priority, time.monotonic(), key))
+        return await asyncio.shield(future)
+
+    async def close(self, timeout: float = CLOSE_TIMEOUT) -> None:
+        """Дожидается выполнения запросов в очереди (не дольше timeout), отменяет оставшиеся и останавливает обработчик"""
+        if self._pending and self._worker and not self._worker.done():
+            await asyncio.wait([future for _, future in self._pending.values()], timeout=timeout)
+
+        for _, future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+
+        for task in list(self._running):
+            task.cancel()
+
+        if self._worker:
+            self._worker.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._worker
+            self._worker = None
+
+    def _ensure_worker(self) -> None:
+        """Запускает обработчик очереди в текущем цикле событий"""
+        if self._worker and not self._worker.done():
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        for key in self._pending:
+            self._queue.put_nowait((PRIORITY_EDIT, time.monotonic(), key))
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    @staticmethod
+    def _interval(chat_id: int) -> float:
+        """Интервал между запросами для чата"""
+        return PRIVATE_CHAT_INTERVAL if chat_id > 0 else GROUP_CHAT_INTERVAL
+
+    async def _run(self) -> None:
+        """Основной цикл обработки очереди"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            entry = await self._queue.get()
+            priority, queued_at, key = entry
+            chat_id = key[1]
+
+            now = time.monotonic()
+            ready_at = max(self._next_at.get(chat_id, 0.0), self._paused_until)
+            if ready_at > now:
+                # Чат еще на паузе - возвращаем запрос в очередь позже, не блокируя остальные чаты
+                loop.call_later(ready_at - now, self._queue.put_nowait, entry)
+                continue
+
+            pending = self._pending.get(key)
+            if not pending:
+                continue
+            action, future = pending
+
+            if len(self._next_at) > NEXT_AT_PRUNE_SIZE:
+                self._next_at = {chat: next_at for chat, next_at in self._next_at.items() if next_at > now}
+            self._next_at[chat_id] = now + self._interval(chat_id)
+
+            # Запрос выполняется отдельной задачей, очередь тем временем обслуживает другие чаты
+            await self._slots.acquire()
+            task = loop.create_task(self._execute(entry, action, future))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, entry: Tuple, action, future: asyncio.Future) -> None:
+        """Выполняет один запрос и передает результат ожидающим"""
+        key = entry[2]
+        try:
+            result = await action()
+        except RetryAfter as e:
+            retry_after = e.retry_after
+            if isinstance(retry_after, timedelta):
+                retry_after = retry_after.total_seconds()
+            self._paused_until = time.monotonic() + retry_after
+            logger.warning(f"Telegram API: превышен лимит запросов, пауза {retry_after} сек.")
+            # Запрос остается в очереди и будет повторен после паузы
+            self._queue.put_nowait(entry)
+        except Exception as e:
+            self._finish(key, action, future, exception=e)
+        else:
+            self._finish(key, action, future, result=result)
+        finally:
+            self._slots.release()
+
+    def _finish(self, key: Tuple, action, future: asyncio.Future, result: Any = None, exception: Exception = None) -> None:
+        """Завершает запрос и передает результат ожидающим"""
+        current = self._pending.get(key)
+        if current and current[0] is not action:
+            # Пока запрос выполнялся, пришла новая правка - отправим ее следующей
+            self._queue.put_nowait((PRIORITY_EDIT, time.monotonic(), key))
+            return
+
+        self._pending.pop(key, None)
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+
+# Глобальный экземпляр очереди
+outbox = Outbox()
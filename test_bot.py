@@ -5,6 +5,8 @@
 import os
 import sys
 import asyncio
+import json
+from collections import Counter
 from datetime import datetime
 
 # Добавляем текущую директорию в путь
@@ -21,6 +23,7 @@ def test_storage():
     test_user_id = 123456789
     user = Storage.get_user(test_user_id)
     print(f"✅ Создан пользователь: {user.user_id}")
+    assert Storage.count_users() == len(Storage.get_all_users())
     
     # Добавляем администратора
     Storage.add_admin(test_user_id)
@@ -44,9 +47,61 @@ def test_storage():
     # Получаем посты на модерации
     pending_posts = Storage.get_pending_posts(PostStatus.PENDING)
     print(f"✅ Постов на модерации: {len(pending_posts)}")
+    assert Storage.count_pending_posts(PostStatus.PENDING) == len(pending_posts)
+    assert Storage.count_posts_by_status()[PostStatus.PENDING] == len(pending_posts)
+    
+    # Проверяем индекс постов пользователя
+    user_posts = Storage.get_pending_posts_by_user(test_user_id)
+    assert [p.post_id for p in user_posts] == ["test123"]
+    assert Storage.count_pending_posts_by_user(test_user_id) == 1
+    assert [p.post_id for p in Storage.get_pending_posts_by_user(test_user_id, limit=10)] == ["test123"]
+    print(f"✅ Постов пользователя: {len(user_posts)}")
+    
+    # Проверяем обратный индекс источников
+    chats_before, channels_before = Storage.get_monitored_totals()
+    user.monitored_channels.add(-1001)
+    Storage.update_user(user)
+    assert Storage.get_monitored_totals() == (chats_before, channels_before + 1)
+    assert [u.user_id for u in Storage.get_users_monitoring_channel(-1001)] == [test_user_id]
+    assert -1001 in Storage.get_monitored_channel_ids()
+    assert -1001 in Storage.get_monitored_source_ids()
+    user.monitored_channels.discard(-1001)
+    Storage.update_user(user)
+    assert Storage.get_users_monitoring_channel(-1001) == []
+    assert -1001 not in Storage.get_monitored_channel_ids()
+    assert -1001 not in Storage.get_monitored_source_ids()
+    assert Storage.get_monitored_totals() == (chats_before, channels_before)
+    print("✅ Индекс источников обновляется")
+    
+    # Счетчики по статусам совпадают с полным пересчетом
+    approved_before = Storage.count_pending_posts(PostStatus.APPROVED)
+    Storage.update_post_status("test123", PostStatus.APPROVED, admin_id=test_user_id)
+    assert Storage.count_pending_posts(PostStatus.APPROVED) == approved_before + 1
+    assert Storage.count_posts_by_status() == Counter(p.status for p in Storage.get_pending_posts())
+    Storage.update_post_status("test123", PostStatus.PENDING)
+    print("✅ Счетчики постов по статусам актуальны")
+    
+    # Ошибка сериализации не теряет отметку об изменении пользователя
+    serialize_user = Storage.serialize_user
+    def failing_serialize_user(user):
+        raise ValueError("serialization failed")
+    user.current_state = "waiting_for_source_link"
+    Storage.mark_user_dirty(test_user_id)
+    Storage.serialize_user = staticmethod(failing_serialize_user)
+    try:
+        Storage.save_users()
+    finally:
+        Storage.serialize_user = staticmethod(serialize_user)
+    Storage.save_users()
+    with open(Storage.DB_FILE, encoding='utf-8') as f:
+        assert json.load(f)[str(test_user_id)]["current_state"] == "waiting_for_source_link"
+    print("✅ Пользователь сохраняется после ошибки сериализации")
     
     # Очищаем тестовые данные
+    pending_before = Storage.count_pending_posts(PostStatus.PENDING)
     Storage.delete_post("test123")
+    assert Storage.count_pending_posts(PostStatus.PENDING) == pending_before - 1
+    assert Storage.get_pending_posts_by_user(test_user_id) == []
     Storage.remove_admin(test_user_id)
     Storage.delete_user(test_user_id)
     print("✅ Тестовые данные очищены")
@@ -81,6 +136,51 @@ def test_menu_structure():
     
     return True
 
+def test_admin_username_command():
+    """Проверяем, что +@username доходит до поиска администратора, а не становится ключевым словом"""
+    print("\n🧪 Тестирование добавления администратора по username...")
+    
+    import bot
+    from types import SimpleNamespace
+    
+    admin_id, new_admin_id = 999999998, 999999997
+    Storage.add_admin(admin_id)
+    user = Storage.get_user(admin_id)
+    replies, resolved = [], []
+    
+    async def reply_text(text, **kwargs):
+        replies.append(text)
+    
+    async def resolve_username(bot_, username):
+        resolved.append(username)
+        return new_admin_id
+    
+    async def get_chat_cached(bot_, chat_id, ttl=None):
+        raise RuntimeError("no network in tests")
+    
+    update = SimpleNamespace(
+        effective_user=SimpleNamespace(id=admin_id),
+        message=SimpleNamespace(text="+@alice", reply_text=reply_text)
+    )
+    context = SimpleNamespace(bot=None, user_data={})
+    
+    original = bot.resolve_username, bot.get_chat_cached
+    bot.resolve_username, bot.get_chat_cached = resolve_username, get_chat_cached
+    try:
+        asyncio.run(bot.handle_text_messages(update, context))
+    finally:
+        bot.resolve_username, bot.get_chat_cached = original
+        Storage.remove_admin(new_admin_id)
+        Storage.remove_admin(admin_id)
+        Storage.delete_user(admin_id)
+    
+    assert resolved == ["alice"]
+    assert "@alice" not in user.keywords and "alice" not in user.keywords
+    assert replies == [f"✅ Пользователь {new_admin_id} добавлен в администраторы."]
+    print("✅ +@username добавляет администратора")
+    
+    return True
+
 def test_ai_evaluation():
     """Тестируем оценку важности сообщений"""
     print("\n🧪 Тестирование ИИ оценки...")
@@ -123,6 +223,7 @@ def main():
     tests = [
         ("Хранилище данных", test_storage),
         ("Структура меню", test_menu_structure),
+        ("Администратор по username", test_admin_username_command),
         ("ИИ оценка", test_ai_evaluation)
     ]
     
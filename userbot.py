@@ -7,7 +7,7 @@ from pyrogram.types import Message as PyrogramMessage
 from pyrogram.errors import FloodWait, AuthKeyUnregistered, UserDeactivated
 
 from models import Message, Storage, UserPreferences
-from ai_service import evaluate_message_importance
+from ai_service import evaluate_message_importance_async
 from config import DEFAULT_IMPORTANCE_THRESHOLD
 
 # Setup logging
@@ -23,6 +23,7 @@ class UserBot:
         self.app = None
         self.is_running = False
         self.monitored_sources = set()  # Множество ID каналов/чатов для мониторинга
+        self.sources_snapshot = None  # Неизменяемая копия monitored_sources, сбрасывается при изменениях
         self.main_bot = None  # Ссылка на основного бота
         
         # Получаем учетные данные из переменных окружения
@@ -118,7 +119,7 @@ class UserBot:
         
         for user in monitoring_users:
             try:
-                importance_score = evaluate_message_importance(msg, user)
+                importance_score = await evaluate_message_importance_async(msg, user)
                 msg.importance_score = importance_score
                 max_importance_score = max(max_importance_score, importance_score)
                 
@@ -213,19 +214,14 @@ class UserBot:
     async def sync_monitoring_sources(self):
         """Синхронизация источников мониторинга с данными пользователей"""
         try:
-            # Получаем всех пользователей
-            all_users = Storage.get_all_users()
-            
-            # Собираем все источники, которые мониторят пользователи
-            all_sources = set()
-            for user in all_users.values():
-                all_sources.update(user.monitored_channels)
-                all_sources.update(user.monitored_chats)
+            # Все источники, которые мониторят пользователи, берем из индекса Storage
+            all_sources = Storage.get_monitored_source_ids()
             
             logger.info(f"Найдено {len(all_sources)} источников для мониторинга: {list(all_sources)}")
             
             # Обновляем список мониторимых источников userbot
             self.monitored_sources = all_sources
+            self.sources_snapshot = None
             
             logger.info(f"Userbot синхронизирован с {len(self.monitored_sources)} источниками")
             
@@ -308,6 +304,7 @@ class UserBot:
             
             # Добавляем в список мониторинга
             self.monitored_sources.add(chat_id)
+            self.sources_snapshot = None
             
             logger.info(f"Userbot присоединился к {chat.title} (ID: {chat_id})")
             return True
@@ -330,6 +327,7 @@ class UserBot:
             
             # Удаляем из списка мониторинга
             self.monitored_sources.discard(chat_id)
+            self.sources_snapshot = None
             
             logger.info(f"Userbot покинул чат {chat_id}")
             return True
@@ -341,20 +339,19 @@ class UserBot:
     def add_monitoring_source(self, chat_id: int):
         """Добавление источника в мониторинг"""
         self.monitored_sources.add(chat_id)
+        self.sources_snapshot = None
         logger.info(f"Userbot добавил в мониторинг источник {chat_id}")
     
     def remove_monitoring_source(self, chat_id: int):
         """Удаление источника из мониторинга"""
         self.monitored_sources.discard(chat_id)
+        self.sources_snapshot = None
         logger.info(f"Userbot удалил из мониторинга источник {chat_id}")
         
         # Проверяем, мониторит ли этот источник хоть один пользователь
-        all_users = Storage.get_all_users()
-        still_monitored = False
-        for user in all_users.values():
-            if chat_id in user.monitored_channels or chat_id in user.monitored_chats:
-                still_monitored = True
-                break
+        still_monitored = bool(
+            Storage.get_users_monitoring_channel(chat_id) or Storage.get_users_monitoring_chat(chat_id)
+        )
         
         # Если никто больше не мониторит, удаляем из userbot
         if not still_monitored:
@@ -383,9 +380,12 @@ class UserBot:
             logger.error(f"Userbot: ошибка получения информации о чате {chat_username_or_id}: {e}")
             return None
     
-    def get_monitored_sources(self) -> set:
+    def get_monitored_sources(self) -> frozenset:
         """Получение списка мониторимых источников"""
-        return self.monitored_sources.copy()
+        # Копия строится заново только после изменения списка, а не при каждом показе меню
+        if self.sources_snapshot is None:
+            self.sources_snapshot = frozenset(self.monitored_sources)
+        return self.sources_snapshot
 
     def set_main_bot(self, bot):
         """Устанавливает ссылку на основного бота"""
@@ -411,6 +411,13 @@ async def stop_userbot():
     """Остановка userbot"""
     await userbot.stop()
 
+async def reset_userbot_session():
+    """Остановка userbot и удаление файла сессии"""
+    # Файл сессии открыт клиентом - удаляем только после остановки
+    await userbot.stop()
+    # Удаление файла - блокирующий вызов, выполняем вне цикла событий
+    return await asyncio.to_thread(userbot.reset_session)
+
 def get_userbot() -> UserBot:
     """Получение экземпляра userbot"""
     return userbot
\ No newline at end of file
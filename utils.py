@@ -1,5 +1,6 @@
 import logging
 import json
+import re
 from typing import Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
@@ -15,6 +16,21 @@ def setup_logging(level: str = "INFO") -> None:
         ]
     )
 
+HTML_UNSAFE_RE = re.compile(r'[&<>"\']')
+HTML_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#x27;',
+})
+
+def escape_html(text: str) -> str:
+    """Escape text like html.escape, returning it untouched when there is nothing to escape."""
+    if HTML_UNSAFE_RE.search(text) is None:
+        return text
+    return text.translate(HTML_ESCAPE_TABLE)
+
 def safe_json_parse(text: str) -> Optional[Dict[str, Any]]:
     """Safely parse JSON from text, handling various formats."""
     try: